@@ -0,0 +1,77 @@
+import os
+
+# Ajustes de rendimiento configurables por variables de entorno
+
+# Numero maximo de llamadas simultaneas a TrueLayer por sincronizacion
+TRUELAYER_MAX_CONCURRENCY = int(os.getenv("TRUELAYER_MAX_CONCURRENCY", "5"))
+
+# Cliente HTTP compartido (pool de conexiones keep-alive)
+HTTP_CLIENT_HTTP2 = os.getenv("HTTP_CLIENT_HTTP2", "false").lower() in ("1", "true", "yes")
+HTTP_CLIENT_MAX_CONNECTIONS = int(os.getenv("HTTP_CLIENT_MAX_CONNECTIONS", "50"))
+HTTP_CLIENT_MAX_KEEPALIVE = int(os.getenv("HTTP_CLIENT_MAX_KEEPALIVE", "20"))
+HTTP_CLIENT_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_CLIENT_KEEPALIVE_EXPIRY", "30"))
+HTTP_CLIENT_CONNECT_TIMEOUT = float(os.getenv("HTTP_CLIENT_CONNECT_TIMEOUT", "5"))
+HTTP_CLIENT_READ_TIMEOUT = float(os.getenv("HTTP_CLIENT_READ_TIMEOUT", "30"))
+HTTP_CLIENT_POOL_TIMEOUT = float(os.getenv("HTTP_CLIENT_POOL_TIMEOUT", "10"))
+
+# Sincronización incremental de transacciones
+TRANSACTION_SYNC_INITIAL_DAYS = int(os.getenv("TRANSACTION_SYNC_INITIAL_DAYS", "30"))
+TRANSACTION_SYNC_OVERLAP_DAYS = int(os.getenv("TRANSACTION_SYNC_OVERLAP_DAYS", "3"))
+TRANSACTION_BACKFILL_CHUNK_DAYS = int(os.getenv("TRANSACTION_BACKFILL_CHUNK_DAYS", "90"))
+TRANSACTION_BACKFILL_MAX_DAYS = int(os.getenv("TRANSACTION_BACKFILL_MAX_DAYS", "730"))
+
+# Caché de tokens de Firebase verificados
+FIREBASE_TOKEN_CACHE_SIZE = int(os.getenv("FIREBASE_TOKEN_CACHE_SIZE", "1024"))
+FIREBASE_TOKEN_CACHE_MARGIN = int(os.getenv("FIREBASE_TOKEN_CACHE_MARGIN", "60"))
+FIREBASE_CHECK_REVOKED = os.getenv("FIREBASE_CHECK_REVOKED", "false").lower() in ("1", "true", "yes")
+
+# Caché de lecturas por usuario (listados de referencia). La invalidación es
+# local al proceso: con varios workers el TTL acota cuánto puede quedar obsoleta
+READ_CACHE_BACKEND = os.getenv("READ_CACHE_BACKEND", "memory")
+READ_CACHE_TTL = float(os.getenv("READ_CACHE_TTL", "60"))
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "10000"))
+READ_CACHE_MAX_BYTES = int(os.getenv("READ_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Importación de extractos bancarios (POST /accounts/{account_id}/import)
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(50 * 1024 * 1024)))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+
+# Sincronización en segundo plano (en el lifespan o con `python manage.py sync-worker`).
+# Con varios workers de uvicorn, activar solo uno o usar el proceso aparte
+SYNC_SCHEDULER_ENABLED = os.getenv("SYNC_SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")
+# Antigüedad máxima de una cuenta antes de volver a sincronizarla
+SYNC_INTERVAL_SECONDS = float(os.getenv("SYNC_INTERVAL_SECONDS", "900"))
+# Cada cuánto se buscan cuentas pendientes, más un retardo aleatorio de hasta SYNC_JITTER_SECONDS
+SYNC_POLL_SECONDS = float(os.getenv("SYNC_POLL_SECONDS", "60"))
+SYNC_JITTER_SECONDS = float(os.getenv("SYNC_JITTER_SECONDS", "15"))
+# Usuarios sincronizados a la vez, y cuentas por usuario en cada pasada
+SYNC_MAX_CONCURRENCY = int(os.getenv("SYNC_MAX_CONCURRENCY", "4"))
+SYNC_MAX_ACCOUNTS_PER_USER = int(os.getenv("SYNC_MAX_ACCOUNTS_PER_USER", "5"))
+
+# Tokens de TrueLayer: se guardan cifrados en la base de datos (claves Fernet separadas por
+# comas; la primera cifra y el resto solo descifran, para poder rotarlas)
+TOKEN_ENCRYPTION_KEYS = [key.strip() for key in os.getenv("TOKEN_ENCRYPTION_KEYS", "").split(",") if key.strip()]
+# Solo para desarrollo local: sin TOKEN_ENCRYPTION_KEYS, cifrar con una clave efímera en lugar de no arrancar
+# (los tokens guardados no se pueden leer tras reiniciar ni desde otro worker)
+TOKEN_ENCRYPTION_ALLOW_EPHEMERAL = os.getenv("TOKEN_ENCRYPTION_ALLOW_EPHEMERAL", "false").lower() in ("1", "true", "yes")
+TRUELAYER_TOKEN_CACHE_SIZE = int(os.getenv("TRUELAYER_TOKEN_CACHE_SIZE", "1024"))
+# Segundos antes de la caducidad a partir de los cuales el token se renueva
+TRUELAYER_TOKEN_REFRESH_MARGIN = int(os.getenv("TRUELAYER_TOKEN_REFRESH_MARGIN", "60"))
+
+# Sincronizaciones simultáneas del mismo usuario/cuenta se unen a la que ya está en curso;
+# además, una que terminó hace menos de estos segundos se reutiliza (0 = desactivado)
+SYNC_COALESCE_FRESH_SECONDS = float(os.getenv("SYNC_COALESCE_FRESH_SECONDS", "0"))
+
+# Resiliencia de las llamadas a TrueLayer: timeouts, reintentos con backoff, presupuesto
+# de peticiones y circuit breaker
+TRUELAYER_CONNECT_TIMEOUT = float(os.getenv("TRUELAYER_CONNECT_TIMEOUT", "5"))
+TRUELAYER_READ_TIMEOUT = float(os.getenv("TRUELAYER_READ_TIMEOUT", "20"))
+TRUELAYER_MAX_ATTEMPTS = int(os.getenv("TRUELAYER_MAX_ATTEMPTS", "4"))
+TRUELAYER_BACKOFF_BASE = float(os.getenv("TRUELAYER_BACKOFF_BASE", "0.5"))
+TRUELAYER_BACKOFF_MAX = float(os.getenv("TRUELAYER_BACKOFF_MAX", "10"))
+# Un Retry-After mayor que esto no se espera: se devuelve la respuesta al llamante
+TRUELAYER_RETRY_AFTER_MAX = float(os.getenv("TRUELAYER_RETRY_AFTER_MAX", "30"))
+TRUELAYER_MAX_IN_FLIGHT = int(os.getenv("TRUELAYER_MAX_IN_FLIGHT", "20"))
+TRUELAYER_RATE_PER_SECOND = float(os.getenv("TRUELAYER_RATE_PER_SECOND", "20"))
+TRUELAYER_BREAKER_FAILURES = int(os.getenv("TRUELAYER_BREAKER_FAILURES", "5"))
+TRUELAYER_BREAKER_RESET_SECONDS = float(os.getenv("TRUELAYER_BREAKER_RESET_SECONDS", "30"))
@@ -0,0 +1,43 @@
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+# Los clientes deben revalidar siempre; con el ETag la respuesta es un 304 vacío
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(user_id: str, versions: Dict[str, int], *variant) -> str:
+    """Weak ETag for a user's view of some resources at the given versions.
+
+    `variant` covers query parameters that change the representation
+    (e.g. the dashboard period).
+    """
+    parts = [user_id] + [f"{resource}={versions[resource]}" for resource in sorted(versions)]
+    parts += [str(value) for value in variant]
+    digest = hashlib.sha256("|".join(parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Weak comparison of If-None-Match against the current ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Return a 304 if the client already has this version; otherwise tag the 200 response."""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
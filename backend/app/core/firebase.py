@@ -1,9 +1,14 @@
 import os
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 import firebase_admin
 from firebase_admin import credentials, auth
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import logging
+from .config import FIREBASE_TOKEN_CACHE_SIZE, FIREBASE_TOKEN_CACHE_MARGIN, FIREBASE_CHECK_REVOKED
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -30,9 +35,86 @@ except Exception as e:
 # Instancia de seguridad HTTP Bearer
 security = HTTPBearer()
 
+
+class TokenCache:
+    """LRU cache of decoded ID tokens, keyed by a SHA-256 of the raw token.
+
+    Entries are dropped once the token's own `exp` minus `margin` seconds has
+    passed, so a cached token is never accepted after Firebase would reject it.
+    """
+
+    def __init__(self, max_size: int = FIREBASE_TOKEN_CACHE_SIZE, margin: int = FIREBASE_TOKEN_CACHE_MARGIN):
+        self.max_size = max_size
+        self.margin = margin
+        self._entries = OrderedDict()
+        # get_current_user es síncrona y FastAPI la ejecuta en el threadpool
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                claims, expires_at = entry
+                if time.time() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return claims
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, claims: dict):
+        expires_at = claims.get("exp", 0) - self.margin
+        if expires_at <= time.time() or self.max_size <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (claims, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+token_cache = TokenCache()
+
+
+def _verify_id_token(token: str) -> dict:
+    # Con la comprobación de revocación activada cada petición debe consultar a Firebase
+    if FIREBASE_CHECK_REVOKED:
+        return auth.verify_id_token(token, check_revoked=True)
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = auth.verify_id_token(token)
+        token_cache.put(token, claims)
+    return claims
+
 def verify_firebase_token(token: str):
     try:
-        decoded_token = auth.verify_id_token(token)
+        decoded_token = _verify_id_token(token)
         return decoded_token
     except Exception as e:
         logger.error(f"Error al verificar el token: {e}")
@@ -49,7 +131,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         token = credentials.credentials
    # logger.info(f"Token recibido: {token}")
     try:
-        decoded_token = auth.verify_id_token(token)
+        decoded_token = _verify_id_token(token)
         return decoded_token
     except Exception as e:
         logger.error(f"Error al verificar el token: {e}")
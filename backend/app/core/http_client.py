@@ -0,0 +1,109 @@
+import logging
+from typing import Optional
+
+import httpx
+
+from .config import (
+    HTTP_CLIENT_HTTP2,
+    HTTP_CLIENT_MAX_CONNECTIONS,
+    HTTP_CLIENT_MAX_KEEPALIVE,
+    HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    HTTP_CLIENT_CONNECT_TIMEOUT,
+    HTTP_CLIENT_READ_TIMEOUT,
+    HTTP_CLIENT_POOL_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Cliente HTTP compartido por toda la aplicación (creado y cerrado en el lifespan de FastAPI)
+_client: Optional[httpx.AsyncClient] = None
+
+
+class HTTPClientMetrics:
+    """Counts requests and new connections to show how often keep-alive is reused."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    async def trace(self, event_name: str, info: dict):
+        # httpcore emite un evento connect_tcp solo cuando abre una conexión nueva
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    async def on_request(self, request: httpx.Request):
+        self.requests += 1
+        request.extensions["trace"] = self.trace
+
+    def snapshot(self) -> dict:
+        reused = max(self.requests - self.connections_opened, 0)
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "connections_reused": reused,
+            "reuse_ratio": reused / self.requests if self.requests else 0.0,
+        }
+
+
+metrics = HTTPClientMetrics()
+
+
+def _http2_available() -> bool:
+    if not HTTP_CLIENT_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP_CLIENT_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+def create_http_client(**kwargs) -> httpx.AsyncClient:
+    options = {
+        "http2": _http2_available(),
+        "limits": httpx.Limits(
+            max_connections=HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_CLIENT_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_CLIENT_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(
+            HTTP_CLIENT_READ_TIMEOUT,
+            connect=HTTP_CLIENT_CONNECT_TIMEOUT,
+            pool=HTTP_CLIENT_POOL_TIMEOUT,
+        ),
+        "event_hooks": {"request": [metrics.on_request]},
+    }
+    options.update(kwargs)
+    return httpx.AsyncClient(**options)
+
+
+async def start_http_client(**kwargs) -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client(**kwargs)
+        logger.info("Shared HTTP client started")
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        logger.info(f"Shared HTTP client closed. Metrics: {metrics.snapshot()}")
+    _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily when running outside the app lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
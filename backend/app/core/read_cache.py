@@ -0,0 +1,245 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .config import READ_CACHE_BACKEND, READ_CACHE_TTL, READ_CACHE_MAX_ENTRIES, READ_CACHE_MAX_BYTES
+from .etag import CACHE_CONTROL, is_not_modified
+
+logger = logging.getLogger(__name__)
+
+# Contadores de generación repartidos por hash de la clave: memoria fija; una
+# colisión solo hace que se descarte un relleno de caché, nunca sirve datos viejos
+GENERATION_SLOTS = 4096
+
+
+class CacheBackend(ABC):
+    """Byte store behind the read cache.
+
+    Values are opaque bytes with a TTL, so a Redis-compatible store
+    (GET / SET EX / DEL) can implement it without changing any caller.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float):
+        ...
+
+    @abstractmethod
+    def delete(self, *keys: str):
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process TTL + LRU store bounded by entry count and total bytes."""
+
+    def __init__(self, max_entries: int = READ_CACHE_MAX_ENTRIES, max_bytes: int = READ_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        # Los handlers síncronos se ejecutan en el threadpool
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _size(key: str, value: bytes) -> int:
+        return len(key) + len(value)
+
+    def _drop(self, key: str):
+        value, _ = self._entries.pop(key)
+        self._bytes -= self._size(key, value)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                self._drop(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float):
+        size = self._size(key, value)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._drop(key)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def create_backend(name: str = READ_CACHE_BACKEND) -> CacheBackend:
+    if name == "memory":
+        return MemoryCacheBackend()
+    raise ValueError(f"Unknown READ_CACHE_BACKEND: {name}")
+
+
+class CachedRead:
+    """Outcome of a cache lookup for one (user, resource): a hit, or a slot to fill."""
+
+    def __init__(self, cache: "ReadCache", key: str, entry: Optional[Tuple[str, bytes]], generation: int):
+        self.cache = cache
+        self.key = key
+        self.entry = entry
+        self.generation = generation
+
+    @property
+    def hit(self) -> bool:
+        return self.entry is not None
+
+    def response(self, request: Request) -> Response:
+        etag, body = self.entry
+        return _response(request, etag, body)
+
+    def store(self, request: Request, etag: str, schema: Any, data: Any) -> Response:
+        """Serialize `data` as `schema` once, cache the bytes and answer with them."""
+        body = _adapter(schema).dump_json(_adapter(schema).validate_python(data, from_attributes=True))
+        self.cache.put(self.key, self.generation, etag, body)
+        return _response(request, etag, body)
+
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def _adapter(schema: Any) -> TypeAdapter:
+    adapter = _adapters.get(schema)
+    if adapter is None:
+        adapter = _adapters[schema] = TypeAdapter(schema)
+    return adapter
+
+
+def _response(request: Request, etag: str, body: bytes) -> Response:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class ReadCache:
+    """Per-user cache of serialized list responses, keyed by (user_id, resource).
+
+    Entries hold the ETag and the JSON body, so a hit answers both a plain
+    GET and an If-None-Match without touching the database. Writes drop the
+    user's entries once their transaction commits (see invalidate_on_commit).
+    A generation counter per key (hash slot) stops a read that started
+    before an invalidation from storing what it read afterwards.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = READ_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._generations = [0] * GENERATION_SLOTS
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(user_id: str, resource: str) -> str:
+        return f"read:{user_id}:{resource}"
+
+    @staticmethod
+    def _slot(key: str) -> int:
+        return hash(key) % GENERATION_SLOTS
+
+    def lookup(self, user_id: str, resource: str) -> CachedRead:
+        key = self.key(user_id, resource)
+        with self._lock:
+            generation = self._generations[self._slot(key)]
+        raw = self.backend.get(key) if self.ttl > 0 else None
+        entry = None
+        if raw is not None:
+            etag, _, body = raw.partition(b"\n")
+            entry = (etag.decode(), body)
+        with self._lock:
+            if entry is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return CachedRead(self, key, entry, generation)
+
+    def put(self, key: str, generation: int, etag: str, body: bytes):
+        # Comprobación y escritura bajo el mismo lock que invalidate()
+        with self._lock:
+            if self._generations[self._slot(key)] == generation:
+                self.backend.set(key, etag.encode() + b"\n" + body, self.ttl)
+
+    def invalidate(self, user_id: str, *resources: str):
+        keys = [self.key(user_id, resource) for resource in resources]
+        with self._lock:
+            for key in keys:
+                self._generations[self._slot(key)] += 1
+            self.invalidations += len(keys)
+            self.backend.delete(*keys)
+
+    def invalidate_on_commit(self, db, user_id: str, *resources: str):
+        """Invalidate once the session's current transaction commits; forgotten on rollback."""
+        db.info.setdefault("read_cache_invalidations", set()).update((user_id, resource) for resource in resources)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            **self.backend.stats(),
+        }
+
+
+read_cache = ReadCache(create_backend())
+
+
+# Los eventos de Session también cubren las AsyncSession (se apoyan en una Session síncrona)
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session):
+    pending = session.info.pop("read_cache_invalidations", None)
+    for user_id, resource in pending or ():
+        read_cache.invalidate(user_id, resource)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session):
+    session.info.pop("read_cache_invalidations", None)
@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from .http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+# Errores de transporte en los que la petición no llegó a enviarse: siempre se pueden reintentar
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class ProviderUnavailableError(HTTPException):
+    """The provider's circuit breaker is open: fail fast with 503 instead of waiting on it."""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail=f"{provider} is temporarily unavailable, please try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(maximum, base * 2**attempt))."""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and rejects calls for `reset_timeout`.
+
+    After that one probe call is let through (half-open): success closes the
+    breaker again, failure re-opens it for another reset_timeout.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at: Optional[float] = None
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+            self.probe_started_at = None
+        # Una sola sonda a la vez; si se pierde (p. ej. cancelada) se permite otra pasado el timeout
+        if self.probe_started_at is not None and now - self.probe_started_at < self.reset_timeout:
+            return False
+        self.probe_started_at = now
+        return True
+
+    def retry_after(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        if self.state != "closed":
+            logger.info("Circuit breaker closed")
+        self.state = "closed"
+        self.failures = 0
+        self.probe_started_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+                logger.warning(f"Circuit breaker opened after {self.failures} consecutive failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.probe_started_at = None
+
+
+class RateBudget:
+    """Caps a provider's concurrent requests and their rate (token bucket, burst of one second)."""
+
+    def __init__(self, max_in_flight: int, rate_per_second: float):
+        self.rate = rate_per_second
+        self.capacity = max(1.0, rate_per_second)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._lock = asyncio.Lock()
+        self.waited_seconds = 0.0
+
+    async def _take_token(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+                self._tokens = 1.0
+                self._updated = time.monotonic()
+            self._tokens -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._semaphore:
+            await self._take_token()
+            yield
+
+
+class ResilientClient:
+    """Provider calls over the shared HTTP client with timeouts, retries, a rate budget and a breaker.
+
+    429 and 5xx responses and transport errors are retried with exponential
+    backoff and jitter, waiting for Retry-After when the provider sends one
+    (unless it is longer than retry_after_max). Non-idempotent calls
+    (idempotent=False) are only retried when the request was certainly not
+    processed: a 429, or a connection that never got established. When
+    retries run out the last response is returned as is, so callers keep
+    their status handling. Timeouts, transport errors and 5xx count towards
+    the circuit breaker; while it is open calls raise ProviderUnavailableError.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: httpx.Timeout,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+        retry_after_max: float,
+        budget: RateBudget,
+        breaker: CircuitBreaker,
+        client_factory: Callable[[], httpx.AsyncClient] = get_http_client
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.budget = budget
+        self.breaker = breaker
+        self.client_factory = client_factory
+        self.counters = Counter()
+
+    async def request(self, method: str, url: str, idempotent: bool = True, **kwargs) -> httpx.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_attempts):
+            last_attempt = attempt == self.max_attempts - 1
+            if not self.breaker.allow():
+                self.counters["rejected_open_circuit"] += 1
+                raise ProviderUnavailableError(self.name, self.breaker.retry_after())
+            self.counters["requests"] += 1
+            try:
+                async with self.budget.slot():
+                    response = await self.client_factory().request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                self.counters["timeouts" if isinstance(e, httpx.TimeoutException) else "transport_errors"] += 1
+                self.breaker.record_failure()
+                if last_attempt or not (idempotent or isinstance(e, _NOT_SENT_ERRORS)):
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                logger.warning(f"{self.name} {method} {url} failed ({type(e).__name__}); retrying in {delay:.2f}s")
+            else:
+                status = response.status_code
+                if status != 429 and status < 500:
+                    self.breaker.record_success()
+                    return response
+                self.counters[f"status_{status}"] += 1
+                # Un 429 indica que el proveedor responde: no cuenta para el breaker
+                if status >= 500:
+                    self.breaker.record_failure()
+                if last_attempt or not (idempotent or status == 429):
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None and retry_after > self.retry_after_max:
+                    return response
+                delay = retry_after if retry_after is not None else backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                await response.aclose()
+                logger.warning(f"{self.name} {method} {url} returned {status}; retrying in {delay:.2f}s")
+            self.counters["retries"] += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, idempotent: bool = False, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, idempotent=idempotent, **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "circuit_state": self.breaker.state,
+            "circuit_opened": self.breaker.times_opened,
+            "rate_limit_wait_seconds": round(self.budget.waited_seconds, 3),
+        }
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into a single execution.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await that same task and get its result (or exception).
+    The task is shielded, so a caller that disconnects does not cancel the
+    work for the others. With fresh_for > 0 a call also returns the last
+    successful result for the key if it finished less than fresh_for
+    seconds ago, without running anything.
+    """
+
+    def __init__(self, max_recent: int = 1024):
+        self.max_recent = max_recent
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # key -> (fin en time.monotonic(), resultado)
+        self._recent = OrderedDict()
+        self.executions = 0
+        self.coalesced = 0
+        self.fresh_hits = 0
+
+    def _fresh(self, key: Hashable, fresh_for: float):
+        entry = self._recent.get(key)
+        if entry is not None and time.monotonic() - entry[0] <= fresh_for:
+            return entry
+        return None
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        if task.exception() is None:
+            self._recent[key] = (time.monotonic(), task.result())
+            self._recent.move_to_end(key)
+            while len(self._recent) > self.max_recent:
+                self._recent.popitem(last=False)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], fresh_for: float = 0) -> Any:
+        if fresh_for > 0:
+            entry = self._fresh(key, fresh_for)
+            if entry is not None:
+                self.fresh_hits += 1
+                return entry[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.info(f"Joining in-flight call for {key}")
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "fresh_hits": self.fresh_hits,
+        }
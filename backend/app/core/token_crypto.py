@@ -0,0 +1,37 @@
+import logging
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+
+from .config import TOKEN_ENCRYPTION_ALLOW_EPHEMERAL, TOKEN_ENCRYPTION_KEYS
+
+logger = logging.getLogger(__name__)
+
+
+def _create_fernet(keys, allow_ephemeral: bool = False) -> MultiFernet:
+    if not keys:
+        # Con una clave efímera cada worker cifra con la suya y todo se pierde al reiniciar:
+        # solo se permite si se pide expresamente
+        if not allow_ephemeral:
+            raise RuntimeError(
+                "TOKEN_ENCRYPTION_KEYS is not set. Generate a key with "
+                "python -c \"from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())\" "
+                "or set TOKEN_ENCRYPTION_ALLOW_EPHEMERAL=true for local development"
+            )
+        logger.warning("TOKEN_ENCRYPTION_KEYS is not set; using a temporary key (TOKEN_ENCRYPTION_ALLOW_EPHEMERAL). Stored bank tokens will not survive a restart")
+        keys = [Fernet.generate_key().decode()]
+    return MultiFernet([Fernet(key) for key in keys])
+
+
+_fernet = _create_fernet(TOKEN_ENCRYPTION_KEYS, TOKEN_ENCRYPTION_ALLOW_EPHEMERAL)
+
+
+def encrypt(value: str) -> str:
+    return _fernet.encrypt(value.encode()).decode()
+
+
+def decrypt(value: str) -> str:
+    """Decrypt with any configured key. Raises ValueError if none of them fits."""
+    try:
+        return _fernet.decrypt(value.encode()).decode()
+    except InvalidToken:
+        raise ValueError("Stored token cannot be decrypted with the configured keys")
@@ -1,7 +1,15 @@
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import auth,accounts,budgets 
+from .routers import auth,accounts,budgets,rules,dashboard,exports,sync_jobs
+from .core import http_client
+from .core.firebase import token_cache
+from .core.read_cache import read_cache
+from .core.config import SYNC_SCHEDULER_ENABLED
+from .services.sync_scheduler import scheduler
+from .services.accounts_service import token_manager, sync_flights, truelayer
+from .database import async_engine
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -10,7 +18,22 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-app = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_client.start_http_client()
+    if SYNC_SCHEDULER_ENABLED:
+        scheduler.start()
+    try:
+        yield
+    finally:
+        await scheduler.stop()
+        await http_client.close_http_client()
+        await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Configurar CORS
 app.add_middleware(
@@ -24,7 +47,11 @@ app.add_middleware(
 # Incluir routers
 app.include_router(auth.router)
 app.include_router(accounts.router)
-app.include_router(budgets.router) 
+app.include_router(budgets.router)
+app.include_router(rules.router)
+app.include_router(dashboard.router)
+app.include_router(exports.router)
+app.include_router(sync_jobs.router)
 
 
 # Configuración del logging
@@ -47,6 +74,18 @@ logging.getLogger('app.routers.accounts').setLevel(logging.DEBUG)
 async def root():
     return {"message": "Bienvenido a la API de Presupuesto Fácil"}
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "http_client": http_client.metrics.snapshot(),
+        "firebase_token_cache": token_cache.stats(),
+        "read_cache": read_cache.stats(),
+        "sync_scheduler": scheduler.stats(),
+        "truelayer_tokens": token_manager.stats(),
+        "sync_single_flight": sync_flights.stats(),
+        "truelayer": truelayer.stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
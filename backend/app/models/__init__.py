@@ -4,5 +4,11 @@ from .budget import Budget
 from .transaction import TransactionModel
 from .ready_to_assign import ReadyToAssign
 from .user import UserModel
+from .account_sync_state import AccountSyncState
+from .category_spend import CategorySpend
+from .categorization_rule import CategorizationRule
+from .data_version import DataVersion
+from .sync_job import SyncJob, SyncJobAccount
+from .truelayer_token import TrueLayerToken
 
-__all__ = ["CategoryGroup", "Category", "Budget", "TransactionModel", "ReadyToAssign", "UserModel"]
\ No newline at end of file
+__all__ = ["CategoryGroup", "Category", "Budget", "TransactionModel", "ReadyToAssign", "UserModel", "AccountSyncState", "CategorySpend", "CategorizationRule", "DataVersion", "SyncJob", "SyncJobAccount", "TrueLayerToken"]
\ No newline at end of file
@@ -7,7 +7,7 @@ class AccountModel(Base):
     __tablename__ = "accounts"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, ForeignKey("users.firebase_uid"))
+    user_id = Column(String, ForeignKey("users.firebase_uid"), index=True)
     account_id = Column(String, unique=True, index=True)
     account_type = Column(String)
     account_name = Column(String)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey
+from ..database import Base
+
+class AccountSyncState(Base):
+    __tablename__ = "account_sync_states"
+
+    account_id = Column(String, ForeignKey("accounts.account_id"), primary_key=True)
+    # Inicio (UTC) de la última sincronización completada con éxito
+    last_synced_at = Column(DateTime, nullable=True)
+    # Fecha de la transacción más reciente recibida de TrueLayer
+    latest_transaction_at = Column(DateTime, nullable=True)
+    # Fecha más antigua hasta la que se ha recorrido el histórico (modo backfill)
+    backfilled_from = Column(DateTime, nullable=True)
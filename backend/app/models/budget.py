@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, Date
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, Date, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 from datetime import datetime
 
 class Budget(Base):
     __tablename__ = "budgets"
+    # Búsqueda del presupuesto de una categoría para la fecha de una transacción
+    __table_args__ = (
+        Index("ix_budgets_user_category_period", "user_id", "category_id", "period_start", "period_end"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from ..database import Base
+from datetime import datetime
+
+class CategorizationRule(Base):
+    __tablename__ = "categorization_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String, ForeignKey("users.firebase_uid"), nullable=False, index=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    # description_contains, description_regex, merchant, transaction_category o amount
+    match_type = Column(String, nullable=False)
+    pattern = Column(String, nullable=True)
+    min_amount = Column(Float, nullable=True)
+    max_amount = Column(Float, nullable=True)
+    # Menor número = mayor prioridad cuando varias reglas coinciden
+    priority = Column(Integer, nullable=False, default=100)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
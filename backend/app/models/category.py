@@ -10,7 +10,7 @@ class Category(Base):
     name = Column(String, nullable=False)
     type = Column(String, default="regular")
     group_id = Column(Integer, ForeignKey("category_groups.id"))
-    user_id = Column(String, ForeignKey("users.firebase_uid"), nullable=False)
+    user_id = Column(String, ForeignKey("users.firebase_uid"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -8,7 +8,7 @@ class CategoryGroup(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    user_id = Column(String, ForeignKey("users.firebase_uid"), nullable=False)
+    user_id = Column(String, ForeignKey("users.firebase_uid"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Numeric
+from ..database import Base
+
+class CategorySpend(Base):
+    """Gasto acumulado por usuario, categoría y mes (se mantiene al escribir transacciones)."""
+    __tablename__ = "category_spend"
+
+    user_id = Column(String, ForeignKey("users.firebase_uid"), primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    # Primer día del mes
+    month = Column(Date, primary_key=True)
+    spent = Column(Numeric(12, 2), nullable=False, default=0)
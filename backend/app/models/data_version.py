@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from ..database import Base
+
+class DataVersion(Base):
+    """Contador de cambios por usuario y recurso; de él se derivan los ETag de los listados."""
+    __tablename__ = "data_versions"
+
+    user_id = Column(String, ForeignKey("users.firebase_uid"), primary_key=True)
+    # category_groups, categories, budgets, accounts, spend, ready_to_assign, rules
+    resource = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from ..database import Base
+from datetime import datetime
+
+class SyncJob(Base):
+    """Sincronización lanzada en segundo plano (p. ej. tras el callback de TrueLayer)."""
+    __tablename__ = "sync_jobs"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String, ForeignKey("users.firebase_uid"), nullable=False, index=True)
+    # pending, running, succeeded, partial (alguna cuenta falló) o failed
+    status = Column(String, nullable=False, default="pending")
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    accounts = relationship("SyncJobAccount", back_populates="job", order_by="SyncJobAccount.id")
+
+class SyncJobAccount(Base):
+    """Progreso de una cuenta dentro de un SyncJob."""
+    __tablename__ = "sync_job_accounts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, ForeignKey("sync_jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Sin clave foránea: una cuenta cuyo saldo no se pudo leer no llega a crearse
+    account_id = Column(String, nullable=False)
+    # pending, running, succeeded o failed
+    status = Column(String, nullable=False, default="pending")
+    inserted = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    job = relationship("SyncJob", back_populates="accounts")
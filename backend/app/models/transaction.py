@@ -1,10 +1,17 @@
 # SQLAlchemy Model
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 
 class TransactionModel(Base):
     __tablename__ = "transactions"
+    # Índices para la paginación por cursor (timestamp, id) de GET /transactions/ y sus filtros
+    __table_args__ = (
+        Index("ix_transactions_user_timestamp_id", "user_id", "timestamp", "id"),
+        Index("ix_transactions_user_account_timestamp_id", "user_id", "account_id", "timestamp", "id"),
+        Index("ix_transactions_user_category_timestamp_id", "user_id", "category_id", "timestamp", "id"),
+        Index("ix_transactions_account_timestamp", "account_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(String, ForeignKey("accounts.account_id"))
@@ -15,6 +22,7 @@ class TransactionModel(Base):
     description = Column(String)
     transaction_type = Column(String)
     transaction_category = Column(String)
+    merchant_name = Column(String, nullable=True)
     timestamp = Column(DateTime)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
 
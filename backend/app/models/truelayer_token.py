@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey
+from ..database import Base
+from datetime import datetime
+
+class TrueLayerToken(Base):
+    """Tokens OAuth de TrueLayer de un usuario, cifrados con app.core.token_crypto."""
+    __tablename__ = "truelayer_tokens"
+
+    user_id = Column(String, ForeignKey("users.firebase_uid"), primary_key=True)
+    access_token = Column(String, nullable=False)
+    refresh_token = Column(String, nullable=True)
+    # Caducidad del access token (UTC)
+    expires_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,25 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
-from sqlalchemy.orm import Session
-from ..database import get_db
-from ..services import accounts_service
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
+from ..services import accounts_service, import_service, sync_jobs_service, version_service
+from ..services.statement_parsers import StatementFormatError
 from ..core.firebase import get_current_user
+from ..core.etag import make_etag, conditional_response
+from ..core.read_cache import read_cache
+from ..core.config import TRANSACTION_BACKFILL_MAX_DAYS, IMPORT_MAX_BYTES, SYNC_COALESCE_FRESH_SECONDS
 from ..models.account import AccountModel
 from ..schemas.account import Account, AccountCreate
 from ..schemas.transaction import Transaction
-from typing import List
-from fastapi.responses import JSONResponse
+from ..schemas.statement_import import CsvImportMapping, ImportResult
+from ..schemas.sync_job import SyncJobAccepted
+from typing import List, Literal
+from fastapi.responses import JSONResponse, ORJSONResponse
+import codecs
+import csv
+import io
 import logging
+import tempfile
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.post("/connect-truelayer", response_model=dict)
-async def connect_truelayer(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+async def connect_truelayer(current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     auth_url = accounts_service.get_truelayer_auth_url(current_user['uid'])
     return {"auth_url": auth_url}
 
-@router.get("/callback")
-async def truelayer_callback(code: str, state: str, db: Session = Depends(get_db)):
+@router.get("/callback", status_code=202, response_model=SyncJobAccepted)
+async def truelayer_callback(code: str, state: str, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
     try:
         logger.info(f"Recibido callback de Truelayer. Code: {code}, State: {state}")
         
@@ -29,10 +40,14 @@ async def truelayer_callback(code: str, state: str, db: Session = Depends(get_db
         
         logger.info(f"Procesando callback para user_id: {user_id}")
         
-        accounts = await accounts_service.process_truelayer_callback(code, user_id, db)
-        logger.info(f"Proceso de callback completado. Cuentas procesadas: {len(accounts)}")
-        
-        return {"message": "Accounts and transactions synced successfully", "accounts": [Account.from_orm(account) for account in accounts]}
+        # Solo el intercambio del código se hace dentro de la petición; cuentas, saldos y
+        # transacciones se sincronizan en segundo plano y se consultan en /sync-jobs/{job_id}
+        await accounts_service.exchange_truelayer_code(code, user_id)
+        job = await sync_jobs_service.create_job(db, user_id)
+        background_tasks.add_task(sync_jobs_service.run_job, job.id, user_id)
+        logger.info(f"Callback procesado para user_id: {user_id}. Sync job encolado: {job.id}")
+
+        return SyncJobAccepted(job_id=job.id, status=job.status, status_url=f"/sync-jobs/{job.id}")
     except HTTPException as e:
         if e.status_code == 400 and "ya ha sido utilizado" in e.detail:
             logger.warning(f"Código de autorización ya utilizado: {e.detail}")
@@ -44,39 +59,59 @@ async def truelayer_callback(code: str, state: str, db: Session = Depends(get_db
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
 @router.get("/accounts", response_model=List[Account])
-async def get_accounts(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_accounts(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
     try:
         logger.info(f"Fetching accounts for user: {current_user['uid']}")
-        accounts = accounts_service.get_user_accounts_from_db(db, current_user['uid'])
+        cached = read_cache.lookup(current_user['uid'], version_service.ACCOUNTS)
+        if cached.hit:
+            return cached.response(request)
+        versions = await version_service.get_versions_async(db, current_user['uid'], version_service.ACCOUNTS)
+        etag = make_etag(current_user['uid'], versions)
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
+        accounts = await accounts_service.get_user_accounts_from_db(db, current_user['uid'])
         logger.info(f"Found {len(accounts)} accounts for user: {current_user['uid']}")
-        return accounts
+        return cached.store(request, etag, List[Account], accounts)
     except Exception as e:
         logger.error(f"Unexpected error in get_accounts: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="An error occurred while fetching accounts")
 
-@router.get("/accounts/{account_id}/transactions", response_model=List[Transaction])
+@router.get("/accounts/{account_id}/transactions", response_model=List[Transaction], response_class=ORJSONResponse)
 async def get_account_transactions(
     account_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    account = db.query(AccountModel).filter(AccountModel.account_id == account_id, AccountModel.user_id == current_user['uid']).first()
+    account = await db.scalar(select(AccountModel).where(AccountModel.account_id == account_id, AccountModel.user_id == current_user['uid']))
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
-    transactions = accounts_service.get_account_transactions_from_db(db, account_id)
-    return transactions
+    # Filas planas codificadas con orjson; se devuelve la respuesta directamente para
+    # que FastAPI no vuelva a validar cada fila contra response_model
+    rows = await accounts_service.get_account_transaction_rows(db, account_id)
+    return ORJSONResponse(rows)
 
 @router.post("/accounts/sync", response_model=List[Account])
 async def sync_accounts(
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    max_age: float = Query(SYNC_COALESCE_FRESH_SECONDS, ge=0, description="Reuse a sync that finished less than this many seconds ago"),
+    current_user: dict = Depends(get_current_user)
 ):
     try:
         logger.info(f"Syncing accounts for user: {current_user['uid']}")
-        synced_accounts = await accounts_service.sync_user_accounts(current_user['uid'], db)
+        # Las peticiones simultáneas del mismo usuario comparten una única sincronización
+        synced_accounts = await accounts_service.coalesced_sync_user_accounts(current_user['uid'], max_age)
         logger.info(f"Synced {len(synced_accounts)} accounts for user: {current_user['uid']}")
         return synced_accounts
+    except HTTPException as e:
+        # p. ej. el 503 con Retry-After del circuit breaker de TrueLayer
+        logger.error(f"HTTP exception syncing accounts: {e.detail}")
+        raise
     except Exception as e:
         logger.error(f"Error syncing accounts: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="An error occurred while syncing accounts")
@@ -84,12 +119,59 @@ async def sync_accounts(
 @router.post("/accounts/{account_id}/sync-transactions", response_model=dict)
 async def sync_account_transactions(
     account_id: str,
+    backfill: bool = False,
+    backfill_days: int = Query(TRANSACTION_BACKFILL_MAX_DAYS, ge=1, le=3650),
+    max_age: float = Query(SYNC_COALESCE_FRESH_SECONDS, ge=0, description="Reuse a sync that finished less than this many seconds ago"),
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    account = db.query(AccountModel).filter(AccountModel.account_id == account_id, AccountModel.user_id == current_user['uid']).first()
+    account = await db.scalar(select(AccountModel).where(AccountModel.account_id == account_id, AccountModel.user_id == current_user['uid']))
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
-    synced_transactions = await accounts_service.sync_account_transactions(db, current_user['uid'], account_id)
-    return {"message": "Transactions synced successfully", "count": len(synced_transactions)}
\ No newline at end of file
+    counts = await accounts_service.coalesced_sync_account_transactions(
+        current_user['uid'], account_id, backfill=backfill, backfill_days=backfill_days, fresh_for=max_age
+    )
+    return {"message": "Transactions synced successfully", "count": counts["inserted"] + counts["updated"] + counts["unchanged"], **counts}
+
+# Por encima de este tamaño el cuerpo subido pasa de memoria a un fichero temporal
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+@router.post("/accounts/{account_id}/import", response_model=ImportResult)
+async def import_statement(
+    account_id: str,
+    request: Request,
+    format: Literal["csv", "ofx", "qif"] = Query(...),
+    encoding: str = Query("utf-8-sig"),
+    mapping: CsvImportMapping = Depends(),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Import a statement file sent as the raw request body (no multipart needed)."""
+    account = await db.scalar(select(AccountModel).where(AccountModel.account_id == account_id, AccountModel.user_id == current_user['uid']))
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        raise HTTPException(status_code=400, detail=f"Unknown encoding: {encoding}")
+
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as upload:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > IMPORT_MAX_BYTES:
+                raise HTTPException(status_code=413, detail=f"Statement files are limited to {IMPORT_MAX_BYTES} bytes")
+            upload.write(chunk)
+        upload.seek(0)
+
+        logger.info(f"Importing {format} statement ({size} bytes) into account {account_id} for user: {current_user['uid']}")
+        # newline="" para que el lector CSV vea los saltos de línea dentro de campos entre comillas
+        lines = io.TextIOWrapper(upload, encoding=encoding, newline="")
+        try:
+            return await import_service.import_statement(db, current_user['uid'], account, lines, format, mapping)
+        except (StatementFormatError, UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Could not read the statement file: {e}")
+        finally:
+            # El fichero lo cierra el with; el wrapper no debe cerrarlo dos veces
+            lines.detach()
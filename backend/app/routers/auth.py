@@ -5,9 +5,9 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.user import User,UserCreate
-from app.database import get_db
+from app.database import get_async_db
 from app.services import auth_service
 from app.core.firebase import get_current_user
 
@@ -19,18 +19,18 @@ router = APIRouter()
 security = HTTPBearer()
 
 @router.post("/register", response_model=User)
-async def register(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+async def register(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_async_db)):
     firebase_user = get_current_user(credentials.credentials)
-    user = auth_service.get_or_create_user(db, firebase_user)
+    user = await auth_service.get_or_create_user(db, firebase_user)
     return user
 
 @router.get("/me", response_model=User)
-async def read_users_me(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+async def read_users_me(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_async_db)):
     try:
         firebase_user = get_current_user(credentials.credentials)
         logger.info(f"Firebase user: {firebase_user}")
         
-        user = auth_service.get_user_by_email(db, firebase_user['email'])
+        user = await auth_service.get_user_by_email(db, firebase_user['email'])
         
         if user is None:
             # Si el usuario no existe, lo creamos
@@ -40,7 +40,7 @@ async def read_users_me(credentials: HTTPAuthorizationCredentials = Depends(secu
                 email=firebase_user['email'],
                 firebase_uid=firebase_user['uid']
             )
-            user = auth_service.create_user(db, user_data)
+            user = await auth_service.create_user(db, user_data)
             logger.info(f"New user created: {user}")
         else:
             logger.info(f"Existing user found: {user}")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func, text
 from ..database import get_db
@@ -6,9 +6,17 @@ from ..models import CategoryGroup, Category, Budget, TransactionModel as Transa
 from ..schemas.category_group import CategoryGroupCreate, CategoryGroup as CategoryGroupSchema
 from ..schemas.category import CategoryCreate, Category as CategorySchema, CategoryUpdate
 from ..schemas.budget import BudgetCreate, Budget as BudgetSchema
-from ..schemas.transaction import TransactionCreate, Transaction as TransactionSchema, TransactionUpdate
+from ..schemas.transaction import (
+    TransactionCreate, Transaction as TransactionSchema, TransactionUpdate, TransactionPage,
+    TransactionBulkUpdate, TransactionBulkUpdateResult
+)
 from ..core.firebase import get_current_user
-from typing import List, Dict
+from ..core.pagination import encode_cursor, decode_cursor
+from ..core.etag import make_etag, conditional_response
+from ..core.read_cache import read_cache
+from ..services import spend_service, budget_service, transaction_service, version_service
+from typing import List, Dict, Optional, Literal
+from datetime import datetime
 from decimal import Decimal
 import logging
 
@@ -17,27 +25,39 @@ router = APIRouter()
 
 # Category Group Routes
 @router.post("/category-groups/", response_model=List[CategoryGroupSchema])
-async def create_category_group(
+def create_category_group(
     group: CategoryGroupCreate,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     db_group = CategoryGroup(**group.model_dump(), user_id=current_user["uid"])
     db.add(db_group)
+    version_service.bump(db, current_user["uid"], version_service.CATEGORY_GROUPS)
     db.commit()
     db.refresh(db_group)
-    return db.query(CategoryGroup).filter(CategoryGroup.user_id == current_user["uid"]).all()
+    return db.scalars(budget_service.category_groups_query(current_user["uid"])).all()
 
 @router.get("/category-groups/", response_model=List[CategoryGroupSchema])
 def get_category_groups(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     logger.info(f"Getting category groups for user: {current_user['uid']}")
     try:
-        groups = db.query(CategoryGroup).filter(CategoryGroup.user_id == current_user["uid"]).all()
+        cached = read_cache.lookup(current_user["uid"], version_service.CATEGORY_GROUPS)
+        if cached.hit:
+            return cached.response(request)
+        # La versión se lee antes que las filas: como mucho el ETag queda atrasado, nunca adelantado
+        versions = version_service.get_versions(db, current_user["uid"], version_service.CATEGORY_GROUPS)
+        etag = make_etag(current_user["uid"], versions)
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
+        groups = db.scalars(budget_service.category_groups_query(current_user["uid"])).all()
         logger.info(f"Found {len(groups)} category groups")
-        return groups
+        return cached.store(request, etag, List[CategoryGroupSchema], groups)
     except Exception as e:
         logger.error(f"Error getting category groups: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -45,14 +65,24 @@ def get_category_groups(
 # Category Routes
 @router.get("/categories/", response_model=List[CategorySchema])
 def get_categories(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     logger.info(f"Getting categories for user: {current_user['uid']}")
     try:
-        categories = db.query(Category).filter(Category.user_id == current_user["uid"]).all()
+        cached = read_cache.lookup(current_user["uid"], version_service.CATEGORIES)
+        if cached.hit:
+            return cached.response(request)
+        versions = version_service.get_versions(db, current_user["uid"], version_service.CATEGORIES)
+        etag = make_etag(current_user["uid"], versions)
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
+        categories = db.scalars(budget_service.categories_query(current_user["uid"])).all()
         logger.info(f"Found {len(categories)} categories")
-        return categories
+        return cached.store(request, etag, List[CategorySchema], categories)
     except Exception as e:
         logger.error(f"Error getting categories: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -67,6 +97,7 @@ def create_category(
     try:
         db_category = Category(**category.model_dump(), user_id=current_user["uid"])
         db.add(db_category)
+        version_service.bump(db, current_user["uid"], version_service.CATEGORIES)
         db.commit()
         db.refresh(db_category)
         logger.info(f"Category created: {db_category.id}")
@@ -77,7 +108,7 @@ def create_category(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/categories/{category_id}", response_model=CategorySchema)
-async def update_category(
+def update_category(
     category_id: int, 
     category_data: CategoryUpdate, 
     db: Session = Depends(get_db), 
@@ -92,6 +123,7 @@ async def update_category(
         for key, value in category_data.model_dump(exclude_unset=True).items():
             setattr(db_category, key, value)
         
+        version_service.bump(db, current_user["uid"], version_service.CATEGORIES)
         db.commit()
         db.refresh(db_category)
         logger.info(f"Category {category_id} updated successfully")
@@ -104,14 +136,24 @@ async def update_category(
 # Budget Routes
 @router.get("/budgets/", response_model=List[BudgetSchema])
 def get_budgets(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     logger.info(f"Getting budgets for user: {current_user['uid']}")
     try:
-        budgets = db.query(Budget).filter(Budget.user_id == current_user["uid"]).all()
+        cached = read_cache.lookup(current_user["uid"], version_service.BUDGETS)
+        if cached.hit:
+            return cached.response(request)
+        versions = version_service.get_versions(db, current_user["uid"], version_service.BUDGETS)
+        etag = make_etag(current_user["uid"], versions)
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
+        budgets = db.scalars(budget_service.budgets_query(current_user["uid"])).all()
         logger.info(f"Found {len(budgets)} budgets")
-        return budgets
+        return cached.store(request, etag, List[BudgetSchema], budgets)
     except Exception as e:
         logger.error(f"Error getting budgets: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -126,6 +168,7 @@ def create_budget(
     try:
         db_budget = Budget(**budget.model_dump(), user_id=current_user["uid"])
         db.add(db_budget)
+        version_service.bump(db, current_user["uid"], version_service.BUDGETS)
         db.commit()
         db.refresh(db_budget)
         logger.info(f"Budget created: {db_budget.id}")
@@ -138,19 +181,29 @@ def create_budget(
 # Ready to Assign Routes
 @router.get("/ready-to-assign/")
 def get_ready_to_assign(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     logger.info(f"Calculating ready to assign for user: {current_user['uid']}")
     try:
-        ready_to_assign = db.query(ReadyToAssign).filter(ReadyToAssign.user_id == current_user["uid"]).first()
+        cached = read_cache.lookup(current_user["uid"], version_service.READY_TO_ASSIGN)
+        if cached.hit:
+            return cached.response(request)
+        versions = version_service.get_versions(db, current_user["uid"], version_service.READY_TO_ASSIGN)
+        etag = make_etag(current_user["uid"], versions)
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
+        ready_to_assign = db.scalar(budget_service.ready_to_assign_query(current_user["uid"]))
         if not ready_to_assign:
             ready_to_assign = ReadyToAssign(user_id=current_user["uid"])
             db.add(ready_to_assign)
             db.commit()
             db.refresh(ready_to_assign)
         logger.info(f"Ready to assign amount: {ready_to_assign.amount}")
-        return {"ready_to_assign": float(ready_to_assign.amount)}
+        return cached.store(request, etag, Dict[str, float], {"ready_to_assign": float(ready_to_assign.amount)})
     except Exception as e:
         logger.error(f"Error calculating ready to assign: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -163,12 +216,13 @@ def update_ready_to_assign(
 ):
     logger.info(f"Updating ready to assign for user: {current_user['uid']}")
     try:
-        ready_to_assign = db.query(ReadyToAssign).filter(ReadyToAssign.user_id == current_user["uid"]).first()
+        ready_to_assign = db.scalar(budget_service.ready_to_assign_query(current_user["uid"]))
         if not ready_to_assign:
             ready_to_assign = ReadyToAssign(user_id=current_user["uid"], amount=amount)
             db.add(ready_to_assign)
         else:
             ready_to_assign.amount = amount
+        version_service.bump(db, current_user["uid"], version_service.READY_TO_ASSIGN)
         db.commit()
         db.refresh(ready_to_assign)
         logger.info(f"Updated ready to assign amount: {ready_to_assign.amount}")
@@ -186,25 +240,39 @@ def create_transaction(
 ):
     db_transaction = Transaction(**transaction.model_dump(), user_id=current_user["uid"])
     db.add(db_transaction)
+    deltas = {}
+    spend_service.add_spend(deltas, db_transaction.category_id, db_transaction.amount, db_transaction.timestamp)
+    spend_service.apply_spend_deltas(db, current_user["uid"], deltas)
+    budget_service.adjust_budget_for_transaction(db, db_transaction, current_user["uid"])
     db.commit()
     db.refresh(db_transaction)
 
-    if db_transaction.category_id:
-        update_budget_for_transaction(db, db_transaction, current_user["uid"])
-
     return db_transaction
 
-@router.get("/transactions/", response_model=List[TransactionSchema])
+@router.get("/transactions/", response_model=TransactionPage)
 def get_transactions(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
-    skip: int = 0,
-    limit: int = 100
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    account_id: Optional[str] = None,
+    category_id: Optional[int] = None,
+    uncategorized: bool = False,
+    amount_sign: Optional[Literal["positive", "negative"]] = None
 ):
-    transactions = db.query(Transaction).filter(
-        Transaction.user_id == current_user["uid"]
-    ).offset(skip).limit(limit).all()
-    return transactions
+    # Orden estable (timestamp, id) descendente; el cursor apunta a la última fila devuelta
+    rows = db.scalars(transaction_service.transactions_page_query(
+        current_user["uid"], limit, decode_cursor(cursor) if cursor else None, date_from, date_to,
+        account_id, category_id, uncategorized, amount_sign
+    )).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+    return {"items": rows, "next_cursor": next_cursor}
 
 @router.get("/transactions/{transaction_id}", response_model=TransactionSchema)
 def get_transaction(
@@ -212,14 +280,73 @@ def get_transaction(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    transaction = db.query(Transaction).filter(
-        Transaction.transaction_id == transaction_id,
-        Transaction.user_id == current_user["uid"]
-    ).first()
+    transaction = db.scalars(transaction_service.transaction_query(current_user["uid"], transaction_id)).first()
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return transaction
 
+@router.post("/transactions/bulk-update", response_model=List[TransactionBulkUpdateResult])
+def bulk_update_transactions(
+    bulk_update: TransactionBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Apply many TransactionUpdate changes in one DB transaction.
+
+    Budget and spend deltas are summed across all items and applied with one
+    statement each before the single commit.
+    """
+    user_id = current_user["uid"]
+    logger.info(f"Bulk update of {len(bulk_update.items)} transactions for user: {user_id}")
+
+    transaction_ids = {item.transaction_id for item in bulk_update.items}
+    transactions = {
+        transaction.transaction_id: transaction
+        for transaction in db.scalars(transaction_service.transactions_by_ids_query(user_id, transaction_ids))
+    }
+    requested_categories = {item.category_id for item in bulk_update.items if item.category_id is not None}
+    own_categories = {
+        category_id for (category_id,) in db.query(Category.id).filter(
+            Category.id.in_(requested_categories),
+            Category.user_id == user_id
+        ).all()
+    } if requested_categories else set()
+
+    deltas, budget_deltas = {}, {}
+    results = []
+    for item in bulk_update.items:
+        db_transaction = transactions.get(item.transaction_id)
+        if db_transaction is None:
+            results.append({"transaction_id": item.transaction_id, "status": "not_found"})
+            continue
+        if item.category_id is not None and item.category_id not in own_categories:
+            results.append({"transaction_id": item.transaction_id, "status": "invalid_category"})
+            continue
+
+        spend_service.add_spend(deltas, db_transaction.category_id, db_transaction.amount, db_transaction.timestamp, sign=-1)
+        budget_service.add_budget_delta(budget_deltas, db_transaction.category_id, db_transaction.amount, db_transaction.timestamp, sign=-1)
+        for key, value in item.model_dump(exclude_unset=True, exclude={"transaction_id"}).items():
+            setattr(db_transaction, key, value)
+        spend_service.add_spend(deltas, db_transaction.category_id, db_transaction.amount, db_transaction.timestamp)
+        budget_service.add_budget_delta(budget_deltas, db_transaction.category_id, db_transaction.amount, db_transaction.timestamp)
+        # Se serializa antes del commit para no recargar cada fila expirada después
+        results.append({
+            "transaction_id": item.transaction_id,
+            "status": "updated",
+            "transaction": TransactionSchema.model_validate(db_transaction)
+        })
+
+    try:
+        spend_service.apply_spend_deltas(db, user_id, deltas)
+        budget_service.apply_budget_deltas(db, user_id, budget_deltas)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Error in bulk transaction update: {str(e)}")
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return results
+
 @router.put("/transactions/{transaction_id}", response_model=TransactionSchema)
 def update_transaction(
     transaction_id: str,
@@ -227,31 +354,24 @@ def update_transaction(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    db_transaction = db.query(Transaction).filter(
-        Transaction.transaction_id == transaction_id,
-        Transaction.user_id == current_user["uid"]
-    ).first()
+    db_transaction = db.scalars(transaction_service.transaction_query(current_user["uid"], transaction_id)).first()
     
     logger.info(f"Received update request for transaction {transaction_id}: {transaction_update}")
     if not db_transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
 
-    # Si la categoría ha cambiado, actualizamos el presupuesto
-    if transaction_update.category_id is not None and transaction_update.category_id != db_transaction.category_id:
-        # Primero, revertimos el efecto en el presupuesto anterior si existía
-        if db_transaction.category_id:
-            update_budget_for_transaction(db, db_transaction, current_user["uid"], reverse=True)
-        
-        # Luego, actualizamos la categoría
-        db_transaction.category_id = transaction_update.category_id
-        
-        # Finalmente, actualizamos el nuevo presupuesto
-        update_budget_for_transaction(db, db_transaction, current_user["uid"])
+    # Contribución previa al gasto y al presupuesto, para descontarla tras los cambios
+    deltas, budget_deltas = {}, {}
+    spend_service.add_spend(deltas, db_transaction.category_id, db_transaction.amount, db_transaction.timestamp, sign=-1)
+    budget_service.add_budget_delta(budget_deltas, db_transaction.category_id, db_transaction.amount, db_transaction.timestamp, sign=-1)
 
-    # Actualizamos los demás campos
     for key, value in transaction_update.model_dump(exclude_unset=True).items():
         setattr(db_transaction, key, value)
 
+    spend_service.add_spend(deltas, db_transaction.category_id, db_transaction.amount, db_transaction.timestamp)
+    budget_service.add_budget_delta(budget_deltas, db_transaction.category_id, db_transaction.amount, db_transaction.timestamp)
+    spend_service.apply_spend_deltas(db, current_user["uid"], deltas)
+    budget_service.apply_budget_deltas(db, current_user["uid"], budget_deltas)
     db.commit()
     db.refresh(db_transaction)
     return db_transaction
@@ -262,63 +382,35 @@ def delete_transaction(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    db_transaction = db.query(Transaction).filter(
-        Transaction.transaction_id == transaction_id,
-        Transaction.user_id == current_user["uid"]
-    ).first()
+    db_transaction = db.scalars(transaction_service.transaction_query(current_user["uid"], transaction_id)).first()
     
     if not db_transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
 
-    # Si la transacción tenía una categoría, actualizamos el presupuesto
-    if db_transaction.category_id:
-        update_budget_for_transaction(db, db_transaction, current_user["uid"], reverse=True)
+    # Si la transacción tenía una categoría, revertimos su efecto en el presupuesto
+    budget_service.adjust_budget_for_transaction(db, db_transaction, current_user["uid"], reverse=True)
+
+    deltas = {}
+    spend_service.add_spend(deltas, db_transaction.category_id, db_transaction.amount, db_transaction.timestamp, sign=-1)
+    spend_service.apply_spend_deltas(db, current_user["uid"], deltas)
 
     db.delete(db_transaction)
     db.commit()
     return {"detail": "Transaction deleted successfully"}
 
-def update_budget_for_transaction(db: Session, transaction: Transaction, user_id: str, reverse: bool = False):
-    budget = db.query(Budget).filter(
-        Budget.category_id == transaction.category_id,
-        Budget.user_id == user_id,
-        Budget.period_start <= transaction.timestamp.date(),
-        Budget.period_end >= transaction.timestamp.date()
-    ).first()
-
-    if budget:
-        amount = transaction.amount if not reverse else -transaction.amount
-        budget.spent_amount += amount
-        db.commit()
-
-
-# Utility function for updating budgets
-def update_budget_for_transaction(db: Session, transaction: Transaction, user_id: str, reverse: bool = False):
-    budget = db.query(Budget).filter(
-        Budget.category_id == transaction.category_id,
-        Budget.user_id == user_id,
-        Budget.period_start <= transaction.timestamp.date(),
-        Budget.period_end >= transaction.timestamp.date()
-    ).first()
-
-    if budget:
-        amount = transaction.amount if not reverse else -transaction.amount
-        budget.spent_amount += amount
-        db.commit()
-
 @router.get("/categories/spent", response_model=Dict[int, float])
 def get_spent_by_category(
+    request: Request,
+    response: Response,
+    period: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="Month as YYYY-MM; all time if omitted"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    spent_by_category = db.query(
-        Transaction.category_id,
-        func.sum(Transaction.amount).label("total_spent")
-    ).filter(
-        Transaction.user_id == current_user["uid"],
-        Transaction.amount < 0,  # Asumiendo que los gastos son negativos
-        Transaction.category_id.isnot(None)  # Excluir transacciones sin categoría
-    ).group_by(Transaction.category_id).all()
-
-    return {item.category_id: abs(item.total_spent) for item in spent_by_category}
+    # Se sirve desde la tabla agregada category_spend (solo gastos: importes negativos)
+    month = spend_service.parse_period(period) if period else None
+    versions = version_service.get_versions(db, current_user["uid"], version_service.SPEND)
+    not_modified = conditional_response(request, response, make_etag(current_user["uid"], versions, month))
+    if not_modified:
+        return not_modified
+    return spend_service.get_spent_by_category(db, current_user["uid"], month)
 
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..schemas.dashboard import Dashboard
+from ..core.firebase import get_current_user
+from ..core.etag import make_etag, conditional_response
+from ..services import dashboard_service, spend_service, version_service
+from typing import Optional
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.get("/dashboard", response_model=Dashboard)
+def get_dashboard(
+    request: Request,
+    response: Response,
+    period: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="Month as YYYY-MM; current month if omitted"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    # Sustituye a las cinco llamadas de la pantalla de presupuesto en una sola petición
+    month = spend_service.parse_period(period) if period else spend_service.month_start(datetime.utcnow().date())
+    versions = version_service.get_versions(db, current_user["uid"], *dashboard_service.DASHBOARD_RESOURCES)
+    not_modified = conditional_response(request, response, make_etag(current_user["uid"], versions, month))
+    if not_modified:
+        return not_modified
+    logger.info(f"Building dashboard for user: {current_user['uid']}, period: {month}")
+    return dashboard_service.get_dashboard(db, current_user["uid"], month)
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from ..core.firebase import get_current_user
+from ..services import export_service
+from typing import Optional, Literal
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+@router.get("/exports/transactions")
+async def export_transactions(
+    current_user: dict = Depends(get_current_user),
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    account_id: Optional[str] = None,
+    category_id: Optional[int] = None
+):
+    if date_from is not None and date_to is not None and date_from >= date_to:
+        raise HTTPException(status_code=400, detail="date_from must be earlier than date_to")
+
+    logger.info(f"Exporting transactions for user: {current_user['uid']} as {format}")
+    query = export_service.export_query(current_user["uid"], date_from, date_to, account_id, category_id)
+    chunks = export_service.ndjson_chunks(query) if format == "ndjson" else export_service.csv_chunks(query)
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'}
+    )
@@ -0,0 +1,104 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..models import Category, CategorizationRule
+from ..schemas.rule import RuleCreate, Rule as RuleSchema, RuleApplyResult
+from ..core.firebase import get_current_user
+from ..core.etag import make_etag, conditional_response
+from ..services import rules_service, version_service
+from typing import List
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+def _check_category(db: Session, category_id: int, user_id: str):
+    category = db.query(Category).filter(Category.id == category_id, Category.user_id == user_id).first()
+    if not category:
+        raise HTTPException(status_code=404, detail="Category not found")
+
+def _get_rule(db: Session, rule_id: int, user_id: str) -> CategorizationRule:
+    rule = db.query(CategorizationRule).filter(
+        CategorizationRule.id == rule_id,
+        CategorizationRule.user_id == user_id
+    ).first()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    return rule
+
+@router.get("/rules/", response_model=List[RuleSchema])
+def get_rules(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    versions = version_service.get_versions(db, current_user["uid"], version_service.RULES)
+    not_modified = conditional_response(request, response, make_etag(current_user["uid"], versions))
+    if not_modified:
+        return not_modified
+    return db.query(CategorizationRule).filter(
+        CategorizationRule.user_id == current_user["uid"]
+    ).order_by(CategorizationRule.priority, CategorizationRule.id).all()
+
+@router.post("/rules/", response_model=RuleSchema)
+def create_rule(
+    rule: RuleCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    _check_category(db, rule.category_id, current_user["uid"])
+    db_rule = CategorizationRule(**rule.model_dump(), user_id=current_user["uid"])
+    db.add(db_rule)
+    version_service.bump(db, current_user["uid"], version_service.RULES)
+    db.commit()
+    db.refresh(db_rule)
+    rules_service.matcher_cache.invalidate(current_user["uid"])
+    logger.info(f"Rule created: {db_rule.id}")
+    return db_rule
+
+# Debe declararse antes de /rules/{rule_id}
+@router.post("/rules/apply", response_model=RuleApplyResult)
+def apply_rules(
+    only_uncategorized: bool = Query(True, description="Leave already categorized transactions untouched"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    try:
+        scanned, categorized = rules_service.apply_rules_to_history(
+            db, current_user["uid"], overwrite=not only_uncategorized
+        )
+    except Exception as e:
+        logger.error(f"Error applying rules: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return RuleApplyResult(scanned=scanned, categorized=categorized)
+
+@router.put("/rules/{rule_id}", response_model=RuleSchema)
+def update_rule(
+    rule_id: int,
+    rule: RuleCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    db_rule = _get_rule(db, rule_id, current_user["uid"])
+    _check_category(db, rule.category_id, current_user["uid"])
+    for key, value in rule.model_dump().items():
+        setattr(db_rule, key, value)
+    version_service.bump(db, current_user["uid"], version_service.RULES)
+    db.commit()
+    db.refresh(db_rule)
+    rules_service.matcher_cache.invalidate(current_user["uid"])
+    return db_rule
+
+@router.delete("/rules/{rule_id}")
+def delete_rule(
+    rule_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    db_rule = _get_rule(db, rule_id, current_user["uid"])
+    db.delete(db_rule)
+    version_service.bump(db, current_user["uid"], version_service.RULES)
+    db.commit()
+    rules_service.matcher_cache.invalidate(current_user["uid"])
+    return {"message": "Rule deleted successfully"}
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
+from ..core.firebase import get_current_user
+from ..schemas.sync_job import SyncJob
+from ..services import sync_jobs_service
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.get("/sync-jobs/{job_id}", response_model=SyncJob)
+async def get_sync_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    job = await sync_jobs_service.get_job(db, job_id, current_user["uid"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return job
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List
+from .category import Category
+from .category_group import CategoryGroup
+from .budget import Budget
+
+class DashboardCategory(Category):
+    # Presupuestos que se solapan con el periodo y gasto del mes
+    budgets: List[Budget] = []
+    spent: float = 0.0
+
+class DashboardGroup(CategoryGroup):
+    categories: List[DashboardCategory] = []
+
+class Dashboard(BaseModel):
+    period: date
+    ready_to_assign: float
+    groups: List[DashboardGroup]
+    ungrouped: List[DashboardCategory]
@@ -0,0 +1,52 @@
+import re
+from pydantic import BaseModel, model_validator
+from datetime import datetime
+from typing import Optional, Literal
+
+MatchType = Literal["description_contains", "description_regex", "merchant", "transaction_category", "amount"]
+
+# Las expresiones se combinan en un único patrón: no se admiten grupos con nombre ni referencias numéricas
+_UNSUPPORTED_REGEX = re.compile(r"\(\?P|\\[1-9]")
+
+class RuleBase(BaseModel):
+    category_id: int
+    match_type: MatchType
+    pattern: Optional[str] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    priority: int = 100
+
+    @model_validator(mode="after")
+    def check_rule(self):
+        if self.match_type == "amount":
+            if self.min_amount is None and self.max_amount is None:
+                raise ValueError("amount rules need min_amount and/or max_amount")
+        elif not self.pattern:
+            raise ValueError(f"{self.match_type} rules need a pattern")
+        if self.min_amount is not None and self.max_amount is not None and self.min_amount > self.max_amount:
+            raise ValueError("min_amount must not be greater than max_amount")
+        if self.match_type == "description_regex":
+            if _UNSUPPORTED_REGEX.search(self.pattern):
+                raise ValueError("named groups and numeric backreferences are not supported")
+            try:
+                # Se valida tal como se combina en CompiledRules (p. ej. rechaza flags globales como (?i))
+                re.compile(f"(?=[\\s\\S]*?(?:{self.pattern}))")
+            except re.error as e:
+                raise ValueError(f"invalid regular expression: {e}")
+        return self
+
+class RuleCreate(RuleBase):
+    pass
+
+class Rule(RuleBase):
+    id: int
+    user_id: str
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class RuleApplyResult(BaseModel):
+    scanned: int
+    categorized: int
@@ -0,0 +1,35 @@
+from pydantic import BaseModel, model_validator
+from typing import List, Literal, Optional
+
+class CsvImportMapping(BaseModel):
+    """Which CSV columns hold each transaction field (names as they appear in the header)."""
+    date_column: str = "date"
+    # Un único importe con signo, o dos columnas separadas de cargo y abono
+    amount_column: Optional[str] = "amount"
+    debit_column: Optional[str] = None
+    credit_column: Optional[str] = None
+    description_column: str = "description"
+    id_column: Optional[str] = None
+    merchant_column: Optional[str] = None
+    category_column: Optional[str] = None
+    delimiter: str = ","
+    decimal_separator: Literal[".", ","] = "."
+    # Formato strptime; sin él se prueba ISO 8601 y después formatos habituales día/mes
+    date_format: Optional[str] = None
+
+    @model_validator(mode="after")
+    def prefer_debit_credit(self):
+        # Las columnas de cargo/abono sustituyen a la de importe por defecto.
+        # Las combinaciones incompletas se rechazan al leer el fichero (StatementFormatError)
+        if self.debit_column or self.credit_column:
+            self.amount_column = None
+        return self
+
+class ImportResult(BaseModel):
+    parsed: int
+    inserted: int
+    # Ya importadas antes o repetidas dentro del mismo fichero
+    duplicates: int
+    categorized: int
+    skipped: int
+    errors: List[str]
@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class SyncJobAccount(BaseModel):
+    account_id: str
+    status: str
+    inserted: int
+    updated: int
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class SyncJob(BaseModel):
+    id: str
+    status: str
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    accounts: List[SyncJobAccount] = []
+
+    class Config:
+        from_attributes = True
+
+class SyncJobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
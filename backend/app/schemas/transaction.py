@@ -1,7 +1,7 @@
 # Pydantic Schemas
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 class TransactionBase(BaseModel):
     account_id: str
@@ -13,6 +13,7 @@ class TransactionBase(BaseModel):
     transaction_category: str
     timestamp: datetime
     category_id: Optional[int] = None
+    merchant_name: Optional[str] = None
 
 class TransactionCreate(TransactionBase):
     pass
@@ -24,8 +25,24 @@ class Transaction(TransactionBase):
     class Config:
         from_attributes = True
 
+class TransactionPage(BaseModel):
+    items: List[Transaction]
+    next_cursor: Optional[str] = None
+
 class TransactionUpdate(BaseModel):
     category_id: Optional[int] = None
     description: Optional[str] = None
     transaction_type: Optional[str] = None
-    transaction_category: Optional[str] = None
\ No newline at end of file
+    transaction_category: Optional[str] = None
+
+class TransactionBulkUpdateItem(TransactionUpdate):
+    transaction_id: str
+
+class TransactionBulkUpdate(BaseModel):
+    items: List[TransactionBulkUpdateItem] = Field(..., min_length=1, max_length=1000)
+
+class TransactionBulkUpdateResult(BaseModel):
+    transaction_id: str
+    # "updated", "not_found" o "invalid_category"
+    status: str
+    transaction: Optional[Transaction] = None
@@ -1,29 +1,85 @@
-import pytz
+import os
 import secrets
+import weakref
+from collections import OrderedDict
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, select, update
 from ..models.account import AccountModel
 from ..models.transaction import TransactionModel
+from ..models.account_sync_state import AccountSyncState
+from ..models.truelayer_token import TrueLayerToken
 from ..schemas.transaction import TransactionCreate
-from ..models.transaction import TransactionModel
 from ..schemas.account import AccountCreate, Account
 from fastapi import HTTPException
 import httpx
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import logging
-from typing import List
+from typing import List, Dict, Optional, Tuple
 import asyncio
 from sqlalchemy.exc import SQLAlchemyError
 from ..schemas.account import AccountCreate, Account
 from ..schemas.transaction import Transaction
+from ..core.config import (
+    TRUELAYER_MAX_CONCURRENCY,
+    TRANSACTION_SYNC_INITIAL_DAYS,
+    TRANSACTION_SYNC_OVERLAP_DAYS,
+    TRANSACTION_BACKFILL_CHUNK_DAYS,
+    TRANSACTION_BACKFILL_MAX_DAYS,
+    TRUELAYER_TOKEN_CACHE_SIZE,
+    TRUELAYER_TOKEN_REFRESH_MARGIN,
+    SYNC_COALESCE_FRESH_SECONDS,
+    TRUELAYER_CONNECT_TIMEOUT,
+    TRUELAYER_READ_TIMEOUT,
+    TRUELAYER_MAX_ATTEMPTS,
+    TRUELAYER_BACKOFF_BASE,
+    TRUELAYER_BACKOFF_MAX,
+    TRUELAYER_RETRY_AFTER_MAX,
+    TRUELAYER_MAX_IN_FLIGHT,
+    TRUELAYER_RATE_PER_SECOND,
+    TRUELAYER_BREAKER_FAILURES,
+    TRUELAYER_BREAKER_RESET_SECONDS,
+)
+from ..core import token_crypto
+from ..core.resilience import CircuitBreaker, ProviderUnavailableError, RateBudget, ResilientClient
+from ..core.single_flight import SingleFlight
+from ..database import AsyncSessionLocal, dialect_insert
+from . import spend_service, budget_service, rules_service, version_service
 
 # TrueLayer configurations
 TRUELAYER_CLIENT_ID = "sandbox-dividendtree-757325"
 TRUELAYER_CLIENT_SECRET = "51d894c8-a3ea-4288-b581-e07c27709487"
 TRUELAYER_REDIRECT_URI = "http://localhost:3000/truelayer-callback"
-TRUELAYER_AUTH_URL = "https://auth.truelayer-sandbox.com"
-TRUELAYER_API_URL = "https://api.truelayer-sandbox.com"
+# Se pueden apuntar a un TrueLayer local (python -m benchmarks.fake_truelayer)
+TRUELAYER_AUTH_URL = os.getenv("TRUELAYER_AUTH_URL", "https://auth.truelayer-sandbox.com")
+TRUELAYER_API_URL = os.getenv("TRUELAYER_API_URL", "https://api.truelayer-sandbox.com")
+
+# Number of transactions written per INSERT ... ON CONFLICT statement during sync
+TRANSACTION_UPSERT_BATCH_SIZE = 500
+
+# Columns owned by TrueLayer; category_id and user_id are never overwritten by a sync
+TRANSACTION_SYNC_FIELDS = (
+    "account_id",
+    "amount",
+    "currency",
+    "description",
+    "transaction_type",
+    "transaction_category",
+    "merchant_name",
+    "timestamp",
+)
+
+# Todas las llamadas a TrueLayer pasan por aquí (reintentos, presupuesto y circuit breaker compartidos)
+truelayer = ResilientClient(
+    "TrueLayer",
+    timeout=httpx.Timeout(TRUELAYER_READ_TIMEOUT, connect=TRUELAYER_CONNECT_TIMEOUT),
+    max_attempts=TRUELAYER_MAX_ATTEMPTS,
+    backoff_base=TRUELAYER_BACKOFF_BASE,
+    backoff_max=TRUELAYER_BACKOFF_MAX,
+    retry_after_max=TRUELAYER_RETRY_AFTER_MAX,
+    budget=RateBudget(TRUELAYER_MAX_IN_FLIGHT, TRUELAYER_RATE_PER_SECOND),
+    breaker=CircuitBreaker(TRUELAYER_BREAKER_FAILURES, TRUELAYER_BREAKER_RESET_SECONDS),
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO,
@@ -31,40 +87,175 @@ logging.basicConfig(level=logging.INFO,
 logger = logging.getLogger(__name__)
 
 class TokenManager:
-    def __init__(self):
-        self.tokens = {}
-
-    def store_tokens(self, user_id: str, access_token: str, refresh_token: str | None, expires_in: int):
-        expiry = datetime.now() + timedelta(seconds=expires_in)
-        self.tokens[user_id] = {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "expiry": expiry
-        }
+    """TrueLayer tokens stored encrypted in the database and shared by every worker.
+
+    Access tokens are also kept in a small in-process LRU until `margin`
+    seconds before they expire, so the hot path does not touch the database.
+    Refreshes are serialized per user by an asyncio.Lock inside the process.
+    Across processes no database lock or connection is held during the call
+    to TrueLayer: the new tokens are saved with a compare-and-swap on the
+    refresh token that was spent, and a worker that loses the race (or whose
+    refresh fails because the token was already spent) reuses the tokens the
+    winner stored.
+    """
+
+    def __init__(self, max_size: int = TRUELAYER_TOKEN_CACHE_SIZE, margin: int = TRUELAYER_TOKEN_REFRESH_MARGIN,
+                 session_factory=AsyncSessionLocal):
+        self.max_size = max_size
+        self.margin = margin
+        self.session_factory = session_factory
+        # user_id -> (access_token, expiry UTC)
+        self._cache = OrderedDict()
+        self._refresh_locks = weakref.WeakValueDictionary()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _usable(self, expiry: datetime) -> bool:
+        return datetime.utcnow() + timedelta(seconds=self.margin) < expiry
+
+    def _cached(self, user_id: str) -> Optional[str]:
+        entry = self._cache.get(user_id)
+        if entry is not None:
+            access_token, expiry = entry
+            if self._usable(expiry):
+                self._cache.move_to_end(user_id)
+                return access_token
+            del self._cache[user_id]
+        return None
+
+    def _remember(self, user_id: str, access_token: str, expiry: datetime):
+        if self.max_size <= 0:
+            return
+        self._cache[user_id] = (access_token, expiry)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    async def _save(db: AsyncSession, user_id: str, access_token: str, refresh_token: str | None, expiry: datetime):
+        insert = dialect_insert(db.get_bind().dialect.name)
+        stmt = insert(TrueLayerToken).values(
+            user_id=user_id,
+            access_token=token_crypto.encrypt(access_token),
+            refresh_token=token_crypto.encrypt(refresh_token) if refresh_token else None,
+            expires_at=expiry,
+            updated_at=datetime.utcnow()
+        )
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[TrueLayerToken.user_id],
+            set_={
+                "access_token": stmt.excluded.access_token,
+                # Si TrueLayer no devuelve un refresh token nuevo se conserva el anterior
+                "refresh_token": func.coalesce(stmt.excluded.refresh_token, TrueLayerToken.refresh_token),
+                "expires_at": stmt.excluded.expires_at,
+                "updated_at": stmt.excluded.updated_at,
+            }
+        ))
+
+    async def store_tokens(self, user_id: str, access_token: str, refresh_token: str | None, expires_in: int):
+        expiry = datetime.utcnow() + timedelta(seconds=expires_in)
+        async with self.session_factory() as db:
+            await self._save(db, user_id, access_token, refresh_token, expiry)
+            await db.commit()
+        self._remember(user_id, access_token, expiry)
 
     async def get_valid_access_token(self, user_id: str):
+        access_token = self._cached(user_id)
+        if access_token is not None:
+            self.hits += 1
+            return access_token
+        self.misses += 1
         logger.info(f"Attempting to get valid access token for user_id: {user_id}")
-        if user_id in self.tokens:
-            token_info = self.tokens[user_id]
-            if datetime.now() < token_info["expiry"]:
-                logger.info(f"Valid access token found for user_id: {user_id}")
-                return token_info["access_token"]
-            else:
-                logger.info(f"Access token expired for user_id: {user_id}. Attempting to refresh.")
-                new_tokens = await self.refresh_token(user_id)
-                if new_tokens:
-                    logger.info(f"Successfully refreshed token for user_id: {user_id}")
-                    self.store_tokens(user_id, new_tokens["access_token"], new_tokens["refresh_token"], new_tokens["expires_in"])
-                    return new_tokens["access_token"]
-                else:
+        try:
+            async with self.session_factory() as db:
+                stored = await db.get(TrueLayerToken, user_id)
+            if stored is None:
+                logger.error(f"No token information found for user_id: {user_id}")
+                return None
+            if self._usable(stored.expires_at):
+                access_token = token_crypto.decrypt(stored.access_token)
+                self._remember(user_id, access_token, stored.expires_at)
+                return access_token
+            logger.info(f"Access token expired for user_id: {user_id}. Attempting to refresh.")
+            return await self._refresh(user_id)
+        except ValueError as e:
+            logger.error(f"Unusable stored token for user_id {user_id}: {e}")
+            return None
+
+    @staticmethod
+    async def _swap(db: AsyncSession, user_id: str, spent_refresh_token: str, access_token: str,
+                    refresh_token: str | None, expiry: datetime) -> bool:
+        """Save refreshed tokens only if the stored refresh token is still the one that was spent."""
+        result = await db.execute(
+            update(TrueLayerToken)
+            .where(TrueLayerToken.user_id == user_id, TrueLayerToken.refresh_token == spent_refresh_token)
+            .values(
+                access_token=token_crypto.encrypt(access_token),
+                # Si TrueLayer no devuelve un refresh token nuevo se conserva el anterior
+                refresh_token=token_crypto.encrypt(refresh_token) if refresh_token else spent_refresh_token,
+                expires_at=expiry,
+                updated_at=datetime.utcnow()
+            )
+        )
+        return result.rowcount == 1
+
+    async def _stored_access_token(self, user_id: str) -> Optional[str]:
+        async with self.session_factory() as db:
+            stored = await db.get(TrueLayerToken, user_id)
+        if stored is None or not self._usable(stored.expires_at):
+            return None
+        access_token = token_crypto.decrypt(stored.access_token)
+        self._remember(user_id, access_token, stored.expires_at)
+        return access_token
+
+    async def _refresh(self, user_id: str) -> Optional[str]:
+        lock = self._refresh_locks.get(user_id)
+        if lock is None:
+            lock = self._refresh_locks[user_id] = asyncio.Lock()
+        async with lock:
+            # Otra corrutina de este proceso puede haberlo renovado mientras esperábamos
+            access_token = self._cached(user_id)
+            if access_token is not None:
+                return access_token
+            # Lectura sin bloqueo; la conexión vuelve al pool antes de llamar a TrueLayer
+            async with self.session_factory() as db:
+                stored = await db.get(TrueLayerToken, user_id)
+            if stored is None:
+                return None
+            if self._usable(stored.expires_at):
+                # ...u otro worker
+                access_token = token_crypto.decrypt(stored.access_token)
+                self._remember(user_id, access_token, stored.expires_at)
+                return access_token
+            if not stored.refresh_token:
+                logger.error(f"No refresh token stored for user_id: {user_id}")
+                return None
+            spent = stored.refresh_token
+            new_tokens = await self.refresh_token(token_crypto.decrypt(spent))
+            if not new_tokens:
+                # Puede que otro worker gastara antes el mismo refresh token y guardara el resultado
+                access_token = await self._stored_access_token(user_id)
+                if access_token is None:
                     logger.error(f"Failed to refresh token for user_id: {user_id}")
-        else:
-            logger.error(f"No token information found for user_id: {user_id}")
-        return None
-
-    async def refresh_token(self, user_id: str):
-        logger.info(f"Attempting to refresh token for user_id: {user_id}")
-        refresh_token = self.tokens[user_id]["refresh_token"]
+                return access_token
+            expiry = datetime.utcnow() + timedelta(seconds=new_tokens["expires_in"])
+            async with self.session_factory() as db:
+                swapped = await self._swap(db, user_id, spent, new_tokens["access_token"],
+                                           new_tokens.get("refresh_token"), expiry)
+                await db.commit()
+            if not swapped:
+                # Otro worker guardó antes sus tokens: los suyos son los que quedan en la base de datos
+                logger.info(f"Token for user_id {user_id} was refreshed concurrently by another worker")
+                access_token = await self._stored_access_token(user_id)
+                if access_token is not None:
+                    return access_token
+            self.refreshes += 1
+            logger.info(f"Successfully refreshed token for user_id: {user_id}")
+            self._remember(user_id, new_tokens["access_token"], expiry)
+            return new_tokens["access_token"]
+
+    async def refresh_token(self, refresh_token: str):
         payload = {
             'grant_type': 'refresh_token',
             'client_id': TRUELAYER_CLIENT_ID,
@@ -73,14 +264,24 @@ class TokenManager:
         }
         headers = {'Content-Type': 'application/x-www-form-urlencoded'}
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(f"{TRUELAYER_AUTH_URL}/connect/token", data=payload, headers=headers)
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                logger.error(f"Error refreshing token: {e}")
-                return None
+        try:
+            response = await truelayer.post(f"{TRUELAYER_AUTH_URL}/connect/token", data=payload, headers=headers)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error refreshing token: {e}")
+            return None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "cached": len(self._cache),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "refreshes": self.refreshes,
+        }
 
 token_manager = TokenManager()
 
@@ -120,9 +321,9 @@ async def exchange_truelayer_code(code: str, user_id: str):
     logger.debug(f"Payload for code exchange: {payload}")
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(f"{TRUELAYER_AUTH_URL}/connect/token", data=payload, headers=headers)
-            response.raise_for_status()
+        # Un código de autorización solo sirve una vez: truelayer.post no reintenta si pudo llegar a TrueLayer
+        response = await truelayer.post(f"{TRUELAYER_AUTH_URL}/connect/token", data=payload, headers=headers)
+        response.raise_for_status()
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error during code exchange: {e}")
         logger.error(f"Response content: {e.response.text}")
@@ -137,6 +338,9 @@ async def exchange_truelayer_code(code: str, user_id: str):
         logger.error(f"Network error during code exchange: {e}")
         used_auth_codes.remove(code)
         raise HTTPException(status_code=500, detail=f"Network error when connecting to TrueLayer: {str(e)}")
+    except ProviderUnavailableError:
+        used_auth_codes.remove(code)
+        raise
     except Exception as e:
         logger.error(f"Unexpected error during code exchange: {e}")
         used_auth_codes.remove(code)
@@ -144,7 +348,7 @@ async def exchange_truelayer_code(code: str, user_id: str):
 
     if response.status_code == 200:
         tokens = response.json()
-        token_manager.store_tokens(
+        await token_manager.store_tokens(
             user_id,
             tokens['access_token'],
             tokens.get('refresh_token'),
@@ -158,26 +362,51 @@ async def exchange_truelayer_code(code: str, user_id: str):
 
 # Añadir estas nuevas funciones al principio del archivo
 
-def get_user_accounts_from_db(db: Session, user_id: str) -> List[Account]:
+def user_accounts_query(user_id: str):
+    return select(AccountModel).where(AccountModel.user_id == user_id)
+
+async def get_user_accounts_from_db(db: AsyncSession, user_id: str) -> List[Account]:
     try:
         logger.info(f"Obteniendo cuentas de la base de datos para user_id: {user_id}")
-        db_accounts = db.query(AccountModel).filter(AccountModel.user_id == user_id).all()
+        db_accounts = (await db.execute(user_accounts_query(user_id))).scalars().all()
         logger.info(f"Se encontraron {len(db_accounts)} cuentas para user_id: {user_id}")
         return [Account.from_orm(account) for account in db_accounts]
     except Exception as e:
         logger.error(f"Error al obtener cuentas de la base de datos para user_id {user_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Error interno al obtener las cuentas")
 
-def get_account_transactions_from_db(db: Session, account_id: str) -> List[Transaction]:
+async def get_account_transactions_from_db(db: AsyncSession, account_id: str) -> List[Transaction]:
     try:
         logger.info(f"Obteniendo transacciones de la base de datos para account_id: {account_id}")
-        db_transactions = db.query(TransactionModel).filter(TransactionModel.account_id == account_id).all()
+        db_transactions = (await db.execute(select(TransactionModel).where(TransactionModel.account_id == account_id))).scalars().all()
         logger.info(f"Se encontraron {len(db_transactions)} transacciones para account_id: {account_id}")
-        return [Transaction.model_validate(transaction.__dict__) for transaction in db_transactions]
+        return [Transaction.model_validate(transaction) for transaction in db_transactions]
     except Exception as e:
         logger.error(f"Error al obtener transacciones de la base de datos para account_id {account_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Error interno al obtener las transacciones")
 
+# Columnas de la respuesta, en el mismo orden que el esquema Transaction
+TRANSACTION_RESPONSE_FIELDS = tuple(Transaction.model_fields)
+
+def account_transaction_rows_query(account_id: str):
+    return select(*[getattr(TransactionModel, field) for field in TRANSACTION_RESPONSE_FIELDS]).where(
+        TransactionModel.account_id == account_id
+    )
+
+async def get_account_transaction_rows(db: AsyncSession, account_id: str) -> List[dict]:
+    """Transactions of an account as plain dicts, ready for a fast JSON encoder.
+
+    Selects only the columns of the Transaction schema, so no ORM instances
+    are built; the rows already have the types the schema declares.
+    """
+    try:
+        result = await db.execute(account_transaction_rows_query(account_id))
+        rows = [dict(zip(TRANSACTION_RESPONSE_FIELDS, row)) for row in result.all()]
+        logger.info(f"Se encontraron {len(rows)} transacciones para account_id: {account_id}")
+        return rows
+    except Exception as e:
+        logger.error(f"Error al obtener transacciones de la base de datos para account_id {account_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error interno al obtener las transacciones")
 
 async def get_truelayer_accounts(user_id: str):
     try:
@@ -190,8 +419,7 @@ async def get_truelayer_accounts(user_id: str):
         headers = {'Authorization': f"Bearer {access_token}"}
         logger.debug(f"Making GET request to {TRUELAYER_API_URL}/data/v1/accounts")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{TRUELAYER_API_URL}/data/v1/accounts", headers=headers)
+        response = await truelayer.get(f"{TRUELAYER_API_URL}/data/v1/accounts", headers=headers)
 
         response.raise_for_status()
 
@@ -207,6 +435,9 @@ async def get_truelayer_accounts(user_id: str):
         logger.error(f"Network error when getting accounts for user_id: {user_id}. Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Network error occurred while fetching accounts: {str(e)}")
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         logger.error(f"Unexpected error when getting accounts for user_id: {user_id}. Error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
@@ -221,8 +452,7 @@ async def get_truelayer_balance(user_id: str, account_id: str):
         "Accept": "application/json"
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{TRUELAYER_API_URL}/data/v1/accounts/{account_id}/balance", headers=headers)
+    response = await truelayer.get(f"{TRUELAYER_API_URL}/data/v1/accounts/{account_id}/balance", headers=headers)
 
     if response.status_code == 200:
         return response.json()
@@ -230,85 +460,98 @@ async def get_truelayer_balance(user_id: str, account_id: str):
         logger.error(f"Failed to fetch balance. Status: {response.status_code}, Response: {response.text}")
         raise HTTPException(status_code=response.status_code, detail=f"Failed to fetch balance from TrueLayer: {response.text}")
 
-async def sync_user_accounts(user_id: str, db: Session):
+def _account_from_truelayer(user_id: str, account: dict, balance_data: dict) -> AccountCreate:
+    current_balance = balance_data['results'][0]['current'] if balance_data.get('results') else -1
+    return AccountCreate(
+        user_id=user_id,
+        account_id=account['account_id'],
+        account_type=account['account_type'],
+        account_name=account.get('display_name', 'Unknown Account'),
+        balance=current_balance,
+        currency=account['currency'],
+        institution_name=account.get('provider', {}).get('display_name', 'Unknown Institution')
+    )
+
+async def fetch_truelayer_account_details(
+    user_id: str,
+    accounts: List[dict],
+    max_concurrency: int = TRUELAYER_MAX_CONCURRENCY
+) -> Tuple[List[AccountCreate], Dict[str, Exception]]:
+    """Fetch balances for all accounts concurrently, at most max_concurrency at a time.
+
+    A failing account does not abort the others: it is returned in the
+    failures dict keyed by account_id.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(account: dict) -> AccountCreate:
+        async with semaphore:
+            balance_data = await get_truelayer_balance(user_id, account['account_id'])
+        return _account_from_truelayer(user_id, account, balance_data)
+
+    results = await asyncio.gather(*(fetch(account) for account in accounts), return_exceptions=True)
+
+    fetched, failures = [], {}
+    for account, result in zip(accounts, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not fetch account {account['account_id']} for user_id {user_id}: {result}")
+            failures[account['account_id']] = result
+        else:
+            fetched.append(result)
+
+    if accounts and not fetched:
+        # Si fallan todas las cuentas no hay resultado parcial que devolver
+        raise next(iter(failures.values()))
+    return fetched, failures
+
+async def _sync_truelayer_accounts(user_id: str, db: AsyncSession) -> List[AccountModel]:
+    accounts_data = await get_truelayer_accounts(user_id)
+    accounts = accounts_data.get('results', [])
+    logger.info(f"Account data obtained for user_id: {user_id}. Number of accounts: {len(accounts)}")
+
+    fetched, failures = await fetch_truelayer_account_details(user_id, accounts)
+    if failures:
+        logger.warning(f"Partial account sync for user_id {user_id}: {len(failures)} of {len(accounts)} accounts failed")
+    return await bulk_create_or_update_accounts(db, fetched)
+
+async def sync_user_accounts(user_id: str, db: AsyncSession):
     try:
         logger.info(f"Iniciando sincronización de cuentas para user_id: {user_id}")
-        accounts_data = await get_truelayer_accounts(user_id)
-        
-        synced_accounts = []
-        for account in accounts_data.get('results', []):
-            balance_data = await get_truelayer_balance(user_id, account['account_id'])
-            current_balance = balance_data['results'][0]['current'] if balance_data.get('results') else -1
-            
-            account_data = AccountCreate(
-                user_id=user_id,
-                account_id=account['account_id'],
-                account_type=account['account_type'],
-                account_name=account.get('display_name', 'Unknown Account'),
-                balance=current_balance,
-                currency=account['currency'],
-                institution_name=account.get('provider', {}).get('display_name', 'Unknown Institution')
-            )
-            
-            db_account = create_or_update_account(db, account_data)
-            synced_accounts.append(db_account)
-        
+        synced_accounts = await _sync_truelayer_accounts(user_id, db)
         logger.info(f"Sincronización completada para user_id: {user_id}. Cuentas sincronizadas: {len(synced_accounts)}")
         return synced_accounts
     except Exception as e:
         logger.error(f"Error en sync_user_accounts: {e}", exc_info=True)
         raise
 
-async def process_truelayer_callback(code: str, user_id: str, db: Session):
+async def process_truelayer_callback(code: str, user_id: str, db: AsyncSession):
     try:
         logger.info(f"Starting process_truelayer_callback for user_id: {user_id}")
         tokens = await exchange_truelayer_code(code, user_id)
         logger.info(f"Tokens obtained for user_id: {user_id}")
-        
-        accounts_data = await get_truelayer_accounts(user_id)
-        logger.info(f"Account data obtained for user_id: {user_id}. Number of accounts: {len(accounts_data.get('results', []))}")
-        
-        processed_accounts = []
-        for account in accounts_data.get('results', []):
-            logger.info(f"Processing account: {account['account_id']} for user_id: {user_id}")
-            balance_data = await get_truelayer_balance(user_id, account['account_id'])
-            current_balance = balance_data['results'][0]['current'] if balance_data.get('results') else -1
-            
-            account_data = AccountCreate(
-                user_id=user_id,
-                account_id=account['account_id'],
-                account_type=account['account_type'],
-                account_name=account.get('display_name', 'Unknown Account'),
-                balance=current_balance,
-                currency=account['currency'],
-                institution_name=account.get('provider', {}).get('display_name', 'Unknown Institution')
-            )
-            
-            logger.info(f"Creating/updating account in database: {account_data.account_id}")
-            db_account = create_or_update_account(db, account_data)
-            logger.info(f"Account created/updated: {db_account.account_id}")
-            processed_accounts.append(db_account)
-        
+
+        processed_accounts = await _sync_truelayer_accounts(user_id, db)
+
         logger.info(f"process_truelayer_callback completed for user_id: {user_id}. Accounts processed: {len(processed_accounts)}")
         return processed_accounts
     except Exception as e:
         logger.error(f"Error in process_truelayer_callback: {e}", exc_info=True)
         raise
 
-def get_user_accounts(db: Session, user_id: str) -> List[Account]:
+async def get_user_accounts(db: AsyncSession, user_id: str) -> List[Account]:
     try:
         logger.info(f"Getting accounts for user_id: {user_id}")
-        db_accounts = db.query(AccountModel).filter(AccountModel.user_id == user_id).all()
+        db_accounts = (await db.execute(select(AccountModel).where(AccountModel.user_id == user_id))).scalars().all()
         logger.info(f"Found {len(db_accounts)} accounts for user_id: {user_id}")
         return [Account.from_orm(account) for account in db_accounts]
     except Exception as e:
         logger.error(f"Error getting accounts for user_id {user_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal error when getting accounts")
 
-def create_or_update_account(db: Session, account: AccountCreate) -> AccountModel:
+async def create_or_update_account(db: AsyncSession, account: AccountCreate) -> AccountModel:
     logger.info(f"Starting create_or_update_account for account_id: {account.account_id}")
     try:
-        existing_account = db.query(AccountModel).filter(AccountModel.account_id == account.account_id).first()
+        existing_account = await db.scalar(select(AccountModel).where(AccountModel.account_id == account.account_id))
         logger.info(f"Existing account found: {existing_account is not None}")
         
         if existing_account:
@@ -320,18 +563,47 @@ def create_or_update_account(db: Session, account: AccountCreate) -> AccountMode
             logger.info(f"Creating new account: {account.account_id}")
             existing_account = AccountModel(**account.dict(exclude={'created_at'}))
             db.add(existing_account)
+        await version_service.bump_async(db, account.user_id, version_service.ACCOUNTS)
         
         logger.info("Performing commit")
-        db.commit()
-        db.refresh(existing_account)
+        await db.commit()
+        await db.refresh(existing_account)
         logger.info(f"Account created/updated successfully: {existing_account.account_id}")
         return existing_account
     except Exception as e:
         logger.error(f"Error creating/updating account: {e}")
-        db.rollback()
+        await db.rollback()
         raise
 
-async def get_truelayer_transactions(user_id: str, account_id: str, db: Session):
+async def bulk_create_or_update_accounts(db: AsyncSession, accounts: List[AccountCreate]) -> List[AccountModel]:
+    """Create or update many accounts with one lookup query and a single commit."""
+    if not accounts:
+        return []
+    account_ids = [account.account_id for account in accounts]
+    try:
+        existing = {
+            account.account_id: account
+            for account in (await db.execute(select(AccountModel).where(AccountModel.account_id.in_(account_ids)))).scalars()
+        }
+        for account in accounts:
+            db_account = existing.get(account.account_id)
+            if db_account:
+                for key, value in account.dict().items():
+                    setattr(db_account, key, value)
+            else:
+                db.add(AccountModel(**account.dict()))
+        for user_id in {account.user_id for account in accounts}:
+            await version_service.bump_async(db, user_id, version_service.ACCOUNTS)
+
+        await db.commit()
+        logger.info(f"Created/updated {len(accounts)} accounts ({len(accounts) - len(existing)} new)")
+        return (await db.execute(select(AccountModel).where(AccountModel.account_id.in_(account_ids)))).scalars().all()
+    except Exception as e:
+        logger.error(f"Error creating/updating accounts: {e}")
+        await db.rollback()
+        raise
+
+async def get_truelayer_transactions(user_id: str, account_id: str, from_date: datetime, to_date: datetime):
     access_token = await token_manager.get_valid_access_token(user_id)
     if not access_token:
         raise HTTPException(status_code=401, detail="No valid access token found")
@@ -341,22 +613,12 @@ async def get_truelayer_transactions(user_id: str, account_id: str, db: Session)
         "Accept": "application/json"
     }
 
-    today = datetime.now(pytz.UTC)
-    from_date = today - timedelta(days=30)
-    
-    account = db.query(AccountModel).filter(AccountModel.account_id == account_id).first()
-    if not account:
-        raise HTTPException(status_code=404, detail="Account not found")
-
-    from_date = max(from_date, account.created_at.replace(tzinfo=pytz.UTC))
-    to_date = today
-
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{TRUELAYER_API_URL}/data/v1/accounts/{account_id}/transactions",
-            headers=headers,
-            params={"from": from_date.strftime("%Y-%m-%d"), "to": to_date.strftime("%Y-%m-%d")}
-        )
+    logger.info(f"Fetching transactions for account_id {account_id} from {from_date:%Y-%m-%d} to {to_date:%Y-%m-%d}")
+    response = await truelayer.get(
+        f"{TRUELAYER_API_URL}/data/v1/accounts/{account_id}/transactions",
+        headers=headers,
+        params={"from": from_date.strftime("%Y-%m-%d"), "to": to_date.strftime("%Y-%m-%d")}
+    )
 
     if response.status_code == 200:
         return response.json()
@@ -364,9 +626,9 @@ async def get_truelayer_transactions(user_id: str, account_id: str, db: Session)
         logger.error(f"Failed to fetch transactions. Status: {response.status_code}, Response: {response.text}")
         raise HTTPException(status_code=response.status_code, detail=f"Failed to fetch transactions from TrueLayer: {response.text}")
 
-def create_or_update_transaction(db: Session, transaction: TransactionCreate) -> TransactionModel:
+async def create_or_update_transaction(db: AsyncSession, transaction: TransactionCreate, user_id: str | None = None) -> TransactionModel:
     try:
-        existing_transaction = db.query(TransactionModel).filter(TransactionModel.transaction_id == transaction.transaction_id).first()
+        existing_transaction = await db.scalar(select(TransactionModel).where(TransactionModel.transaction_id == transaction.transaction_id))
         
         if existing_transaction:
             logger.info(f"Updating existing transaction: {transaction.transaction_id}")
@@ -374,46 +636,229 @@ def create_or_update_transaction(db: Session, transaction: TransactionCreate) ->
                 setattr(existing_transaction, key, value)
         else:
             logger.info(f"Creating new transaction: {transaction.transaction_id}")
-            existing_transaction = TransactionModel(**transaction.dict())
+            existing_transaction = TransactionModel(**transaction.dict(), user_id=user_id)
             db.add(existing_transaction)
         
-        db.commit()
-        db.refresh(existing_transaction)
+        await db.commit()
+        await db.refresh(existing_transaction)
         logger.info(f"Transaction created/updated successfully: {existing_transaction.transaction_id}")
         return existing_transaction
     except Exception as e:
         logger.error(f"Error creating/updating transaction: {e}")
-        db.rollback()
+        await db.rollback()
         raise
 
-async def sync_account_transactions(db: Session, user_id: str, account_id: str):
+def _naive_utc(value: datetime) -> datetime:
+    # Las columnas DateTime no guardan zona horaria; normalizamos a UTC sin tzinfo
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+async def bulk_upsert_transactions(
+    db: AsyncSession,
+    user_id: str,
+    transactions: List[TransactionCreate],
+    batch_size: int = TRANSACTION_UPSERT_BATCH_SIZE
+) -> Dict[str, int]:
+    """Insert or update transactions in batches, committing once per batch.
+
+    Each batch costs one SELECT (to classify rows) and at most one
+    INSERT ... ON CONFLICT (transaction_id) DO UPDATE statement. Rows whose
+    provider fields did not change are not written at all. Changes to the
+    spend of already categorized rows are applied to category_spend and to
+    the matching budgets in the same transaction. New uncategorized rows are
+    run through the user's compiled categorization rules before the INSERT.
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "categorized": 0}
+    insert = dialect_insert(db.get_bind().dialect.name)
+    matcher = await rules_service.get_matcher_async(db, user_id)
+
+    # Postgres rejects an ON CONFLICT statement that touches the same row twice
+    rows_by_id = {}
+    for transaction in transactions:
+        row = transaction.model_dump(include=set(TRANSACTION_SYNC_FIELDS) | {"transaction_id", "category_id"})
+        row["timestamp"] = _naive_utc(row["timestamp"])
+        row["user_id"] = user_id
+        rows_by_id[row["transaction_id"]] = row
+    rows = list(rows_by_id.values())
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        try:
+            existing = {
+                current.transaction_id: current
+                for current in await db.execute(
+                    select(
+                        TransactionModel.transaction_id,
+                        TransactionModel.category_id,
+                        *[getattr(TransactionModel, field) for field in TRANSACTION_SYNC_FIELDS]
+                    ).where(TransactionModel.transaction_id.in_([row["transaction_id"] for row in batch]))
+                )
+            }
+
+            pending, new_rows = [], []
+            deltas, budget_deltas = {}, {}
+            for row in batch:
+                current = existing.get(row["transaction_id"])
+                if current is None:
+                    counts["inserted"] += 1
+                    pending.append(row)
+                    new_rows.append(row)
+                elif any(getattr(current, field) != row[field] for field in TRANSACTION_SYNC_FIELDS):
+                    counts["updated"] += 1
+                    pending.append(row)
+                    # La categoría se conserva; solo cambian importe y fecha
+                    spend_service.add_spend(deltas, current.category_id, current.amount, current.timestamp, sign=-1)
+                    spend_service.add_spend(deltas, current.category_id, row["amount"], row["timestamp"])
+                    budget_service.add_budget_delta(budget_deltas, current.category_id, current.amount, current.timestamp, sign=-1)
+                    budget_service.add_budget_delta(budget_deltas, current.category_id, row["amount"], row["timestamp"])
+                else:
+                    counts["unchanged"] += 1
+
+            counts["categorized"] += rules_service.categorize_rows(matcher, new_rows)
+            for row in new_rows:
+                spend_service.add_spend(deltas, row["category_id"], row["amount"], row["timestamp"])
+                budget_service.add_budget_delta(budget_deltas, row["category_id"], row["amount"], row["timestamp"])
+
+            if pending:
+                stmt = insert(TransactionModel).values(pending)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[TransactionModel.transaction_id],
+                    set_={field: getattr(stmt.excluded, field) for field in TRANSACTION_SYNC_FIELDS}
+                )
+                await db.execute(stmt)
+            await spend_service.apply_spend_deltas_async(db, user_id, deltas)
+            await budget_service.apply_budget_deltas_async(db, user_id, budget_deltas)
+            await db.commit()
+        except Exception as e:
+            logger.error(f"Error in bulk transaction upsert: {e}")
+            await db.rollback()
+            raise
+
+    logger.info(f"Bulk upsert for user_id {user_id}: {counts}")
+    return counts
+
+def _transaction_from_truelayer(account_id: str, transaction: dict) -> TransactionCreate:
+    return TransactionCreate(
+        account_id=account_id,
+        transaction_id=transaction['transaction_id'],
+        amount=transaction['amount'],
+        currency=transaction['currency'],
+        description=transaction.get('description', ''),
+        transaction_type=transaction.get('transaction_type', 'Unknown'),
+        transaction_category=transaction.get('transaction_category', 'Uncategorized'),
+        merchant_name=transaction.get('merchant_name'),
+        timestamp=datetime.fromisoformat(transaction['timestamp'])
+    )
+
+async def get_sync_state(db: AsyncSession, account_id: str) -> AccountSyncState:
+    state = await db.get(AccountSyncState, account_id)
+    if state is None:
+        state = AccountSyncState(account_id=account_id)
+        db.add(state)
+    return state
+
+def incremental_sync_window(state: AccountSyncState, now: datetime) -> Tuple[datetime, datetime]:
+    """Return the (from, to) window for the next sync of an account.
+
+    The window starts at the last successful sync minus a small overlap, so
+    transactions that post late with an earlier date are still picked up.
+    Accounts that never synced get the initial TRANSACTION_SYNC_INITIAL_DAYS.
+    """
+    if state.last_synced_at is None:
+        return now - timedelta(days=TRANSACTION_SYNC_INITIAL_DAYS), now
+    return state.last_synced_at - timedelta(days=TRANSACTION_SYNC_OVERLAP_DAYS), now
+
+def backfill_windows(now: datetime, days: int, chunk_days: int = TRANSACTION_BACKFILL_CHUNK_DAYS) -> List[Tuple[datetime, datetime]]:
+    """Split the last `days` days into chunks, newest first."""
+    windows = []
+    oldest = now - timedelta(days=days)
+    to_date = now
+    while to_date > oldest:
+        from_date = max(to_date - timedelta(days=chunk_days), oldest)
+        windows.append((from_date, to_date))
+        to_date = from_date
+    return windows
+
+async def sync_account_transactions(
+    db: AsyncSession,
+    user_id: str,
+    account_id: str,
+    backfill: bool = False,
+    backfill_days: int = TRANSACTION_BACKFILL_MAX_DAYS
+) -> Dict[str, int]:
     try:
-        logger.info(f"Syncing transactions for account_id: {account_id}, user_id: {user_id}")
-        transactions_data = await get_truelayer_transactions(user_id, account_id, db)
-        
-        synced_transactions = []
-        for transaction in transactions_data.get('results', []):
-            transaction_data = TransactionCreate(
-                account_id=account_id,
-                transaction_id=transaction['transaction_id'],
-                amount=transaction['amount'],
-                currency=transaction['currency'],
-                description=transaction.get('description', ''),
-                transaction_type=transaction.get('transaction_type', 'Unknown'),
-                transaction_category=transaction.get('transaction_category', 'Uncategorized'),
-                timestamp=datetime.fromisoformat(transaction['timestamp'])
-            )
-            
-            db_transaction = create_or_update_transaction(db, transaction_data)
-            synced_transactions.append(db_transaction)
-        
-        logger.info(f"Synced {len(synced_transactions)} transactions for account_id: {account_id}")
-        return synced_transactions
+        logger.info(f"Syncing transactions for account_id: {account_id}, user_id: {user_id}, backfill: {backfill}")
+        now = datetime.utcnow()
+        state = await get_sync_state(db, account_id)
+
+        if backfill:
+            windows = backfill_windows(now, backfill_days)
+        else:
+            windows = [incremental_sync_window(state, now)]
+
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "categorized": 0}
+        latest = state.latest_transaction_at
+        for from_date, to_date in windows:
+            transactions_data = await get_truelayer_transactions(user_id, account_id, from_date, to_date)
+            transactions = [
+                _transaction_from_truelayer(account_id, transaction)
+                for transaction in transactions_data.get('results', [])
+            ]
+            # Cada bloque se escribe antes de pedir el siguiente para no acumular el histórico en memoria
+            for key, value in (await bulk_upsert_transactions(db, user_id, transactions)).items():
+                counts[key] += value
+            if transactions:
+                newest = max(_naive_utc(transaction.timestamp) for transaction in transactions)
+                latest = newest if latest is None else max(latest, newest)
+
+        # La marca solo avanza cuando todas las ventanas se han escrito
+        state.last_synced_at = now
+        state.latest_transaction_at = latest
+        if backfill:
+            oldest = windows[-1][0] if windows else now
+            state.backfilled_from = oldest if state.backfilled_from is None else min(state.backfilled_from, oldest)
+        await db.commit()
+
+        logger.info(f"Synced transactions for account_id: {account_id}: {counts}")
+        return counts
+    except ProviderUnavailableError:
+        await db.rollback()
+        raise
     except Exception as e:
         logger.error(f"Error syncing transactions for account_id {account_id}: {str(e)}")
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error syncing transactions: {str(e)}")
 
-def get_account_transactions(db: Session, account_id: str):
+# Una sola sincronización en curso por usuario (cuentas) y por cuenta (transacciones)
+sync_flights = SingleFlight()
+
+async def coalesced_sync_user_accounts(user_id: str, fresh_for: float = SYNC_COALESCE_FRESH_SECONDS) -> List[AccountModel]:
+    """sync_user_accounts with single-flight semantics per user.
+
+    The shared work runs in its own session, so it does not depend on the
+    request of whichever caller happened to start it.
+    """
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return await sync_user_accounts(user_id, db)
+    return await sync_flights.do(("accounts", user_id), run, fresh_for)
+
+async def coalesced_sync_account_transactions(
+    user_id: str,
+    account_id: str,
+    backfill: bool = False,
+    backfill_days: int = TRANSACTION_BACKFILL_MAX_DAYS,
+    fresh_for: float = SYNC_COALESCE_FRESH_SECONDS
+) -> Dict[str, int]:
+    """sync_account_transactions with single-flight semantics per account and mode."""
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return await sync_account_transactions(db, user_id, account_id, backfill=backfill, backfill_days=backfill_days)
+    key = ("transactions", user_id, account_id, backfill, backfill_days if backfill else None)
+    return await sync_flights.do(key, run, fresh_for)
+
+async def get_account_transactions(db: AsyncSession, account_id: str):
     logger.info(f"Getting transactions for account_id: {account_id}")
     
     if db is None:
@@ -422,13 +867,13 @@ def get_account_transactions(db: Session, account_id: str):
     
     try:
         # Verify if the account exists
-        account = db.query(AccountModel).filter(AccountModel.account_id == account_id).first()
+        account = await db.scalar(select(AccountModel).where(AccountModel.account_id == account_id))
         if account is None:
             logger.warning(f"Account not found for account_id: {account_id}")
             raise HTTPException(status_code=404, detail="Account not found")
 
         # Get transactions
-        transactions = db.query(TransactionModel).filter(TransactionModel.account_id == account_id).all()
+        transactions = (await db.execute(select(TransactionModel).where(TransactionModel.account_id == account_id))).scalars().all()
         
         transaction_count = len(transactions)
         logger.info(f"Found {transaction_count} transactions for account_id: {account_id}")
@@ -444,30 +889,30 @@ def get_account_transactions(db: Session, account_id: str):
 # You might want to add more utility functions here as needed
 
 # For example, a function to get the total balance across all accounts for a user
-def get_total_balance(db: Session, user_id: str) -> float:
+async def get_total_balance(db: AsyncSession, user_id: str) -> float:
     try:
-        total_balance = db.query(func.sum(AccountModel.balance)).filter(AccountModel.user_id == user_id).scalar()
+        total_balance = await db.scalar(select(func.sum(AccountModel.balance)).where(AccountModel.user_id == user_id))
         return total_balance or 0.0
     except Exception as e:
         logger.error(f"Error calculating total balance for user_id {user_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Error calculating total balance")
 
 # Or a function to get the most recent transaction for each account
-def get_most_recent_transactions(db: Session, user_id: str) -> List[TransactionModel]:
+async def get_most_recent_transactions(db: AsyncSession, user_id: str) -> List[TransactionModel]:
     try:
-        subquery = db.query(
+        subquery = select(
             TransactionModel.account_id,
             func.max(TransactionModel.timestamp).label('max_timestamp')
         ).group_by(TransactionModel.account_id).subquery()
 
-        most_recent_transactions = db.query(TransactionModel).join(
+        most_recent_transactions = (await db.execute(select(TransactionModel).join(
             subquery,
             and_(
                 TransactionModel.account_id == subquery.c.account_id,
                 TransactionModel.timestamp == subquery.c.max_timestamp
             )
         ).join(AccountModel, AccountModel.account_id == TransactionModel.account_id
-        ).filter(AccountModel.user_id == user_id).all()
+        ).where(AccountModel.user_id == user_id))).scalars().all()
 
         return most_recent_transactions
     except Exception as e:
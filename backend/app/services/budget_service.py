@@ -0,0 +1,111 @@
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, Integer, Numeric, func, literal, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models import Budget, Category, CategoryGroup, ReadyToAssign
+from . import version_service
+
+logger = logging.getLogger(__name__)
+
+# (category_id, fecha de la transacción) -> suma de importes a aplicar a spent_amount
+BudgetDeltas = Dict[Tuple[int, date], Decimal]
+
+
+# Listados de GET /category-groups/, /categories/, /budgets/ y /ready-to-assign/
+def category_groups_query(user_id: str):
+    return select(CategoryGroup).where(CategoryGroup.user_id == user_id)
+
+
+def categories_query(user_id: str):
+    return select(Category).where(Category.user_id == user_id)
+
+
+def budgets_query(user_id: str):
+    return select(Budget).where(Budget.user_id == user_id)
+
+
+def ready_to_assign_query(user_id: str):
+    return select(ReadyToAssign).where(ReadyToAssign.user_id == user_id).limit(1)
+
+
+def add_budget_delta(deltas: BudgetDeltas, category_id: Optional[int], amount: Optional[float],
+                     timestamp: Optional[datetime], sign: int = 1):
+    """Add (sign=1) or revert (sign=-1) a transaction's effect on its category budget."""
+    if category_id is None or amount is None or timestamp is None:
+        return
+    key = (category_id, timestamp.date() if isinstance(timestamp, datetime) else timestamp)
+    # Los importes de las transacciones son Float; los presupuestos, Numeric
+    deltas[key] = deltas.get(key, Decimal("0")) + sign * Decimal(str(amount))
+
+
+def budget_spend_statement(user_id: str, deltas: BudgetDeltas):
+    """Build one atomic UPDATE ... SET spent_amount = spent_amount + delta ... RETURNING.
+
+    The deltas are inlined as a UNION ALL derived table and summed per budget
+    with a correlated subquery, so concurrent writers never lose an update
+    and any number of transactions costs a single round trip.
+    """
+    rows = [(key, delta) for key, delta in deltas.items() if delta != 0]
+    if not rows:
+        return None
+
+    changes = union_all(*[
+        select(
+            literal(category_id, Integer).label("category_id"),
+            literal(day, Date).label("day"),
+            literal(delta, Numeric(10, 2)).label("delta")
+        )
+        for (category_id, day), delta in rows
+    ]).subquery("budget_deltas")
+
+    matched = select(func.sum(changes.c.delta)).where(
+        changes.c.category_id == Budget.category_id,
+        changes.c.day >= Budget.period_start,
+        changes.c.day <= Budget.period_end
+    ).scalar_subquery()
+
+    return (
+        update(Budget)
+        .where(
+            Budget.user_id == user_id,
+            Budget.category_id.in_(sorted({category_id for (category_id, _), _ in rows})),
+            matched.isnot(None)
+        )
+        .values(spent_amount=func.coalesce(Budget.spent_amount, 0) + matched, updated_at=datetime.utcnow())
+        .returning(Budget.id, Budget.spent_amount)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def apply_budget_deltas(db: Session, user_id: str, deltas: BudgetDeltas) -> List[Tuple[int, Decimal]]:
+    """Apply the deltas inside the caller's transaction (no commit). Returns (budget_id, spent_amount)."""
+    stmt = budget_spend_statement(user_id, deltas)
+    if stmt is None:
+        return []
+    updated = [tuple(row) for row in db.execute(stmt)]
+    if updated:
+        version_service.bump(db, user_id, version_service.BUDGETS)
+    return updated
+
+
+async def apply_budget_deltas_async(db: AsyncSession, user_id: str, deltas: BudgetDeltas) -> List[Tuple[int, Decimal]]:
+    stmt = budget_spend_statement(user_id, deltas)
+    if stmt is None:
+        return []
+    updated = [tuple(row) for row in await db.execute(stmt)]
+    if updated:
+        await version_service.bump_async(db, user_id, version_service.BUDGETS)
+    return updated
+
+
+def adjust_budget_for_transaction(db: Session, transaction, user_id: str, reverse: bool = False) -> List[Tuple[int, Decimal]]:
+    """Single-transaction convenience wrapper around apply_budget_deltas."""
+    deltas = {}
+    add_budget_delta(deltas, transaction.category_id, transaction.amount, transaction.timestamp,
+                     sign=-1 if reverse else 1)
+    return apply_budget_deltas(db, user_id, deltas)
@@ -0,0 +1,82 @@
+import logging
+from calendar import monthrange
+from datetime import date
+from typing import Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from ..models import Budget, Category, CategoryGroup, ReadyToAssign
+from ..schemas.dashboard import Dashboard, DashboardCategory, DashboardGroup
+from . import spend_service, version_service
+
+logger = logging.getLogger(__name__)
+
+# Todo lo que puede cambiar el contenido del dashboard
+DASHBOARD_RESOURCES = (
+    version_service.CATEGORY_GROUPS,
+    version_service.CATEGORIES,
+    version_service.BUDGETS,
+    version_service.SPEND,
+    version_service.READY_TO_ASSIGN,
+)
+
+
+def month_end(month: date) -> date:
+    return date(month.year, month.month, monthrange(month.year, month.month)[1])
+
+
+def _budgets_in_period(user_id: str, month: date):
+    # user_id en el criterio para que la carga use ix_budgets_user_category_period
+    return Category.budgets.and_(
+        Budget.user_id == user_id,
+        Budget.period_start <= month_end(month),
+        Budget.period_end >= month,
+    )
+
+
+def _with_spent(categories: List[DashboardCategory], spent: Dict[int, float]) -> List[DashboardCategory]:
+    for category in categories:
+        category.spent = spent.get(category.id, 0.0)
+    return sorted(categories, key=lambda category: category.id)
+
+
+def get_dashboard(db: Session, user_id: str, month: date) -> Dashboard:
+    """Everything the budget screen needs for one month.
+
+    Runs a fixed number of queries whatever the number of categories:
+    groups, their categories and budgets via selectinload (3), ungrouped
+    categories and their budgets (2), spend per category (1) and
+    ready-to-assign (1).
+    """
+    budgets = _budgets_in_period(user_id, month)
+    groups = db.execute(
+        select(CategoryGroup)
+        .where(CategoryGroup.user_id == user_id)
+        .options(
+            selectinload(CategoryGroup.categories.and_(Category.user_id == user_id))
+            .selectinload(budgets)
+        )
+        .order_by(CategoryGroup.id)
+    ).scalars().all()
+    ungrouped = db.execute(
+        select(Category)
+        .where(Category.user_id == user_id, Category.group_id.is_(None))
+        .options(selectinload(budgets))
+        .order_by(Category.id)
+    ).scalars().all()
+    spent = spend_service.get_spent_by_category(db, user_id, month)
+    ready_to_assign = db.scalar(select(ReadyToAssign.amount).where(ReadyToAssign.user_id == user_id))
+
+    group_snapshots = []
+    for group in groups:
+        snapshot = DashboardGroup.model_validate(group)
+        snapshot.categories = _with_spent(snapshot.categories, spent)
+        group_snapshots.append(snapshot)
+
+    return Dashboard(
+        period=month,
+        ready_to_assign=float(ready_to_assign or 0),
+        groups=group_snapshots,
+        ungrouped=_with_spent([DashboardCategory.model_validate(category) for category in ungrouped], spent),
+    )
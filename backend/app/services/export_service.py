@@ -0,0 +1,75 @@
+import csv
+import io
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+import orjson
+from sqlalchemy import select
+
+from ..database import AsyncSessionLocal
+from ..models.transaction import TransactionModel
+from ..schemas.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+# Filas leídas del cursor de servidor y escritas por cada bloque de la respuesta
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_FIELDS = tuple(Transaction.model_fields)
+
+
+def export_query(
+    user_id: str,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    account_id: Optional[str] = None,
+    category_id: Optional[int] = None
+):
+    """Same filters and semantics as GET /transactions/ ([date_from, date_to)), oldest first."""
+    query = select(*[getattr(TransactionModel, field) for field in EXPORT_FIELDS]).where(
+        TransactionModel.user_id == user_id
+    )
+    if account_id is not None:
+        query = query.where(TransactionModel.account_id == account_id)
+    if category_id is not None:
+        query = query.where(TransactionModel.category_id == category_id)
+    if date_from is not None:
+        query = query.where(TransactionModel.timestamp >= date_from)
+    if date_to is not None:
+        query = query.where(TransactionModel.timestamp < date_to)
+    return query.order_by(TransactionModel.timestamp, TransactionModel.id)
+
+
+async def _row_chunks(query, chunk_size: int, session_factory) -> AsyncIterator[list]:
+    # La respuesta se envía después de cerrar las dependencias de FastAPI, así que
+    # el generador abre su propia sesión y la mantiene mientras dura el stream
+    async with session_factory() as db:
+        result = await db.stream(query.execution_options(yield_per=chunk_size))
+        exported = 0
+        async for rows in result.partitions():
+            exported += len(rows)
+            yield rows
+        logger.info(f"Exported {exported} transactions")
+
+
+async def ndjson_chunks(query, chunk_size: int = EXPORT_CHUNK_SIZE, session_factory=AsyncSessionLocal) -> AsyncIterator[bytes]:
+    async for rows in _row_chunks(query, chunk_size, session_factory):
+        yield b"".join(orjson.dumps(dict(zip(EXPORT_FIELDS, row))) + b"\n" for row in rows)
+
+
+async def csv_chunks(query, chunk_size: int = EXPORT_CHUNK_SIZE, session_factory=AsyncSessionLocal) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    async for rows in _row_chunks(query, chunk_size, session_factory):
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in rows
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    # Solo la cabecera si no hay filas
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import logging
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import IMPORT_BATCH_SIZE
+from ..database import dialect_insert
+from ..models.account import AccountModel
+from ..models.transaction import TransactionModel
+from ..schemas.statement_import import CsvImportMapping, ImportResult
+from . import budget_service, rules_service, spend_service
+from .statement_parsers import ParseErrors, StatementFormatError, parse_csv, parse_ofx, parse_qif
+
+logger = logging.getLogger(__name__)
+
+# Columnas que escribe una importación, en el orden del COPY
+IMPORT_COLUMNS = (
+    "transaction_id",
+    "account_id",
+    "user_id",
+    "amount",
+    "currency",
+    "description",
+    "transaction_type",
+    "transaction_category",
+    "merchant_name",
+    "timestamp",
+    "category_id",
+)
+
+STAGING_TABLE = "transaction_import_staging"
+
+
+def parse_statement(lines: Iterable[str], format: str, mapping: CsvImportMapping, errors: ParseErrors) -> Iterator[dict]:
+    if format == "csv":
+        return parse_csv(lines, mapping, errors)
+    if format == "ofx":
+        return parse_ofx(lines, errors)
+    if format == "qif":
+        return parse_qif(lines, errors, mapping.date_format)
+    raise StatementFormatError(f"Unsupported statement format: {format}")
+
+
+class _TransactionIds:
+    """Assigns transaction_id to parsed rows and drops the ones repeated within the file.
+
+    Ids from the file (OFX FITID, a mapped CSV column) are only unique per
+    account, so they are prefixed with the account_id. Rows without one get
+    a fingerprint of account, date, amount and description plus the number
+    of identical rows seen before it in the file: two equal coffees on the
+    same day stay two transactions, and importing the same file again maps
+    every row to the id it got the first time.
+    """
+
+    def __init__(self, account_id: str):
+        self.account_id = account_id
+        self.seen = set()
+        self.occurrences: Dict[str, int] = {}
+
+    def assign(self, row: dict) -> Optional[str]:
+        if row["transaction_id"]:
+            transaction_id = f"{self.account_id}:{row['transaction_id']}"
+        else:
+            content = f"{self.account_id}|{row['timestamp'].isoformat()}|{row['amount']:.2f}|{row['description']}"
+            occurrence = self.occurrences.get(content, 0)
+            self.occurrences[content] = occurrence + 1
+            transaction_id = "import-" + hashlib.sha256(f"{content}|{occurrence}".encode()).hexdigest()[:32]
+        if transaction_id in self.seen:
+            return None
+        self.seen.add(transaction_id)
+        return transaction_id
+
+
+def _take(records: Iterator[dict], size: int) -> List[dict]:
+    return list(islice(records, size))
+
+
+async def _copy_to_staging(db: AsyncSession, rows: List[dict]):
+    connection = await (await db.connection()).get_raw_connection()
+    await connection.driver_connection.copy_records_to_table(
+        STAGING_TABLE,
+        records=[tuple(row[column] for column in IMPORT_COLUMNS) for row in rows],
+        columns=IMPORT_COLUMNS
+    )
+
+
+async def import_statement(
+    db: AsyncSession,
+    user_id: str,
+    account: AccountModel,
+    lines: Iterable[str],
+    format: str,
+    mapping: CsvImportMapping,
+    batch_size: int = IMPORT_BATCH_SIZE
+) -> ImportResult:
+    """Import a bank statement into an account in a single DB transaction.
+
+    The file is parsed as a stream, batch_size records at a time (in a worker
+    thread, so the event loop keeps serving requests). New rows are run
+    through the user's categorization rules and inserted with ON CONFLICT
+    (transaction_id) DO NOTHING, so rows imported before are skipped. On
+    PostgreSQL with asyncpg the batches are COPY'd into a temporary table and
+    moved with one INSERT ... SELECT; other databases get one executemany
+    INSERT per batch.
+    Spend and budgets are updated once, from the rows actually inserted.
+    """
+    dialect = db.get_bind().dialect
+    use_copy = dialect.name == "postgresql" and dialect.driver == "asyncpg"
+    insert = dialect_insert(dialect.name)
+    columns = ", ".join(IMPORT_COLUMNS)
+    # Se compila una vez; las filas van como parámetros (executemany con insertmanyvalues)
+    insert_stmt = insert(TransactionModel).on_conflict_do_nothing(
+        index_elements=[TransactionModel.transaction_id]
+    ).returning(TransactionModel.category_id, TransactionModel.amount, TransactionModel.timestamp)
+
+    errors = ParseErrors()
+    ids = _TransactionIds(account.account_id)
+    records = parse_statement(lines, format, mapping, errors)
+    matcher = await rules_service.get_matcher_async(db, user_id)
+    parsed = 0
+    inserted = []
+
+    try:
+        if use_copy:
+            await db.execute(text(
+                f"CREATE TEMP TABLE {STAGING_TABLE} ON COMMIT DROP AS "
+                f"SELECT {columns} FROM {TransactionModel.__tablename__} WITH NO DATA"
+            ))
+        while True:
+            chunk = await asyncio.to_thread(_take, records, batch_size)
+            if not chunk:
+                break
+            parsed += len(chunk)
+            rows = []
+            for row in chunk:
+                row["transaction_id"] = ids.assign(row)
+                if row["transaction_id"] is None:
+                    continue
+                row.update(account_id=account.account_id, user_id=user_id, currency=account.currency, category_id=None)
+                rows.append(row)
+            rules_service.categorize_rows(matcher, rows)
+
+            if use_copy:
+                await _copy_to_staging(db, rows)
+                continue
+            if rows:
+                inserted.extend(await db.execute(insert_stmt, rows))
+
+        if use_copy:
+            inserted = list(await db.execute(text(
+                f"INSERT INTO {TransactionModel.__tablename__} ({columns}) SELECT {columns} FROM {STAGING_TABLE} "
+                f"ON CONFLICT (transaction_id) DO NOTHING RETURNING category_id, amount, timestamp"
+            )))
+
+        deltas, budget_deltas = {}, {}
+        for category_id, amount, timestamp in inserted:
+            spend_service.add_spend(deltas, category_id, amount, timestamp)
+            budget_service.add_budget_delta(budget_deltas, category_id, amount, timestamp)
+        await spend_service.apply_spend_deltas_async(db, user_id, deltas)
+        await budget_service.apply_budget_deltas_async(db, user_id, budget_deltas)
+        await db.commit()
+    except Exception as e:
+        logger.error(f"Error importing statement into account {account.account_id}: {e}")
+        await db.rollback()
+        raise
+
+    result = ImportResult(
+        parsed=parsed,
+        inserted=len(inserted),
+        duplicates=parsed - len(inserted),
+        categorized=sum(1 for category_id, _, _ in inserted if category_id is not None),
+        skipped=errors.count,
+        errors=errors.messages,
+    )
+    logger.info(f"Imported {format} statement into account {account.account_id} for user_id {user_id}: "
+                f"{result.model_dump(exclude={'errors'})}")
+    return result
@@ -0,0 +1,410 @@
+import logging
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.categorization_rule import CategorizationRule
+from ..models.transaction import TransactionModel
+from . import budget_service, spend_service, version_service
+
+logger = logging.getLogger(__name__)
+
+# Número máximo de usuarios con reglas compiladas en memoria
+MATCHER_CACHE_SIZE = 256
+
+
+class _Automaton:
+    """Aho-Corasick automaton: finds every pattern contained in a text in one pass."""
+
+    def __init__(self, patterns: Dict[str, List[int]]):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for pattern, rule_ids in patterns.items():
+            node = 0
+            for char in pattern:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[node][char] = child
+                node = child
+            self.out[node].extend(rule_ids)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                target = self.goto[state].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def search(self, text: str) -> Set[int]:
+        found = set()
+        node = 0
+        goto, fail, out = self.goto, self.fail, self.out
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+_REGEX_META = set(".^$*+?{}[]|()")
+
+
+def _required_literals(pattern: str) -> Optional[List[str]]:
+    """Lowercased literals such that every match of `pattern` contains at least one.
+
+    One literal per top-level alternative: the longest run of plain
+    characters that alternative must contain. Conservative: gives up on
+    verbose mode and non-ASCII text, ignores anything inside groups or
+    character classes, and returns None if any alternative has no literal.
+    """
+    if not pattern.isascii():
+        return None
+    try:
+        if re.compile(pattern).flags & re.VERBOSE:
+            return None
+    except re.error:
+        return None
+    branches, runs, current = [], [], ""
+    depth, i = 0, 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            i += 2
+            if depth == 0 and not escaped.isalnum():
+                current += escaped
+                continue
+            # Saltar los argumentos de \xhh, \uhhhh, \Uhhhhhhhh, \N{...} y octales
+            if escaped == "N":
+                i = pattern.find("}", i) + 1 or len(pattern)
+            else:
+                i += {"x": 2, "u": 4, "U": 8}.get(escaped, 0)
+                while escaped.isdigit() and i < len(pattern) and pattern[i].isdigit():
+                    i += 1
+            runs.append(current)
+            current = ""
+            continue
+        if char == "[":
+            runs.append(current)
+            current = ""
+            i += 1
+            if i < len(pattern) and pattern[i] == "]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+            continue
+        if char in "*?{" and current:
+            # El carácter anterior es opcional
+            current = current[:-1]
+        if char == "{":
+            runs.append(current)
+            current = ""
+            while i < len(pattern) and pattern[i] != "}":
+                i += 1
+            i += 1
+            continue
+        if char == "|" and depth == 0:
+            branches.append(runs + [current])
+            runs, current = [], ""
+        elif char in _REGEX_META:
+            runs.append(current)
+            current = ""
+            depth += char == "("
+            depth -= char == ")"
+        elif depth == 0:
+            current += char
+        i += 1
+    branches.append(runs + [current])
+
+    literals = []
+    for branch in branches:
+        literal = max(branch, key=len)
+        if len(literal) < 3:
+            return None
+        literals.append(literal.lower())
+    return literals
+
+
+class CompiledRules:
+    """Per-user matcher built once from all of the user's rules.
+
+    - description_contains: one Aho-Corasick automaton over all substrings.
+    - description_regex: the literals each expression requires go into the
+      same automaton, so only expressions whose literals appear are run;
+      expressions without one share a combined pattern of zero-width
+      lookaheads, ordered by priority, where the first alternative wins.
+      Those with amount bounds are run one by one instead: the first
+      alternative could fail its bounds and hide a lower-priority match.
+    - merchant / transaction_category: exact-match dict indexes.
+    - amount-only rules: elementary intervals with the best rule precomputed
+      for each, looked up by bisection.
+    Text rules may also carry amount bounds, checked on the few candidates.
+    """
+
+    def __init__(self, rules: Iterable[CategorizationRule]):
+        rules = sorted(rules, key=lambda rule: (rule.priority, rule.id))
+        # Rango de prioridad: posición en el orden global (menor = gana)
+        self.rank = {rule.id: position for position, rule in enumerate(rules)}
+        self.category = {rule.id: rule.category_id for rule in rules}
+        self.bounds = {
+            rule.id: (rule.min_amount, rule.max_amount)
+            for rule in rules
+            if rule.min_amount is not None or rule.max_amount is not None
+        }
+        self.size = len(rules)
+
+        contains, merchants, categories = {}, {}, {}
+        regex_rules, amount_rules = [], []
+        for rule in rules:
+            if rule.match_type == "description_contains":
+                contains.setdefault(rule.pattern.lower(), []).append(rule.id)
+            elif rule.match_type == "merchant":
+                merchants.setdefault(rule.pattern.strip().lower(), []).append(rule.id)
+            elif rule.match_type == "transaction_category":
+                categories.setdefault(rule.pattern.strip().upper(), []).append(rule.id)
+            elif rule.match_type == "description_regex":
+                regex_rules.append(rule)
+            elif rule.match_type == "amount":
+                amount_rules.append(rule)
+
+        self.merchants = merchants
+        self.categories = categories
+        self._compile_regexes(regex_rules, contains)
+        self.automaton = _Automaton(contains) if contains else None
+        self._compile_amounts(amount_rules)
+
+    def _compile_regexes(self, rules: List[CategorizationRule], literals: Dict[str, List[int]]):
+        # Las expresiones con literales obligatorios se filtran con el autómata y solo
+        # se evalúan si alguno aparece; el resto va a un único patrón combinado
+        self.regex = None
+        self.regex_groups = {}
+        self.prefiltered = {}
+        self.unfiltered = []
+        branches = []
+        for rule in rules:
+            required = _required_literals(rule.pattern)
+            if required is not None:
+                for literal in set(required):
+                    literals.setdefault(literal, []).append(rule.id)
+                self.prefiltered[rule.id] = re.compile(rule.pattern, re.IGNORECASE)
+                continue
+            if rule.id in self.bounds:
+                self.unfiltered.append((rule.id, re.compile(rule.pattern, re.IGNORECASE)))
+                continue
+            group = f"r{rule.id}"
+            self.regex_groups[group] = rule.id
+            branches.append(f"(?=[\\s\\S]*?(?:{rule.pattern}))(?P<{group}>)")
+        if branches:
+            self.regex = re.compile("^(?:" + "|".join(branches) + ")", re.IGNORECASE)
+
+    def _compile_amounts(self, rules: List[CategorizationRule]):
+        points = sorted({
+            bound for rule in rules for bound in (rule.min_amount, rule.max_amount) if bound is not None
+        })
+        self.amount_points = points
+
+        def best_for(value: float) -> Optional[int]:
+            for rule in rules:
+                if ((rule.min_amount is None or value >= rule.min_amount)
+                        and (rule.max_amount is None or value <= rule.max_amount)):
+                    return rule.id
+            return None
+
+        # Segmentos: (-inf, p0), [p0], (p0, p1), [p1], ..., (pn, +inf)
+        segments = []
+        for i, point in enumerate(points):
+            below = point - 1 if i == 0 else (points[i - 1] + point) / 2
+            segments.append(best_for(below))
+            segments.append(best_for(point))
+        segments.append(best_for(points[-1] + 1) if points else None)
+        self.amount_segments = segments
+
+    def _amount_rule(self, amount: float) -> Optional[int]:
+        i = bisect_left(self.amount_points, amount)
+        if i < len(self.amount_points) and self.amount_points[i] == amount:
+            return self.amount_segments[2 * i + 1]
+        return self.amount_segments[2 * i]
+
+    def _in_bounds(self, rule_id: int, amount: Optional[float]) -> bool:
+        bounds = self.bounds.get(rule_id)
+        if bounds is None:
+            return True
+        if amount is None:
+            return False
+        low, high = bounds
+        return (low is None or amount >= low) and (high is None or amount <= high)
+
+    def match(self, description: Optional[str], merchant_name: Optional[str],
+              transaction_category: Optional[str], amount: Optional[float]) -> Optional[int]:
+        """Return the category_id of the highest-priority matching rule, or None."""
+        if not self.size:
+            return None
+        candidates = set()
+        if description:
+            if self.automaton is not None:
+                found = self.automaton.search(description.lower())
+                for rule_id in found:
+                    pattern = self.prefiltered.get(rule_id)
+                    if pattern is None or pattern.search(description) is not None:
+                        candidates.add(rule_id)
+            if self.regex is not None:
+                found = self.regex.match(description)
+                if found is not None:
+                    candidates.add(self.regex_groups[found.lastgroup])
+            for rule_id, pattern in self.unfiltered:
+                if pattern.search(description) is not None:
+                    candidates.add(rule_id)
+        if merchant_name:
+            candidates.update(self.merchants.get(merchant_name.strip().lower(), ()))
+        if transaction_category:
+            candidates.update(self.categories.get(transaction_category.strip().upper(), ()))
+
+        best = None
+        for rule_id in candidates:
+            if self._in_bounds(rule_id, amount) and (best is None or self.rank[rule_id] < self.rank[best]):
+                best = rule_id
+        if amount is not None and self.amount_points:
+            amount_rule = self._amount_rule(amount)
+            if amount_rule is not None and (best is None or self.rank[amount_rule] < self.rank[best]):
+                best = amount_rule
+        return self.category[best] if best is not None else None
+
+
+class _MatcherCache:
+    """Compiled matchers per user, validated against the user's rules data version."""
+
+    def __init__(self, max_size: int = MATCHER_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, fingerprint) -> Optional[CompiledRules]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, user_id: str, fingerprint, matcher: CompiledRules):
+        with self._lock:
+            self._entries[user_id] = (fingerprint, matcher)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+matcher_cache = _MatcherCache()
+
+
+def _rules_query(user_id: str):
+    return select(CategorizationRule).where(CategorizationRule.user_id == user_id)
+
+
+def get_matcher(db: Session, user_id: str) -> CompiledRules:
+    fingerprint = version_service.get_versions(db, user_id, version_service.RULES)[version_service.RULES]
+    matcher = matcher_cache.get(user_id, fingerprint)
+    if matcher is None:
+        matcher = CompiledRules(db.execute(_rules_query(user_id)).scalars().all())
+        matcher_cache.put(user_id, fingerprint, matcher)
+    return matcher
+
+
+async def get_matcher_async(db: AsyncSession, user_id: str) -> CompiledRules:
+    fingerprint = (await version_service.get_versions_async(db, user_id, version_service.RULES))[version_service.RULES]
+    matcher = matcher_cache.get(user_id, fingerprint)
+    if matcher is None:
+        matcher = CompiledRules((await db.execute(_rules_query(user_id))).scalars().all())
+        matcher_cache.put(user_id, fingerprint, matcher)
+    return matcher
+
+
+def categorize_rows(matcher: CompiledRules, rows: List[dict]) -> int:
+    """Fill category_id on uncategorized row dicts in place. Returns how many were categorized."""
+    categorized = 0
+    for row in rows:
+        if row.get("category_id") is None:
+            category_id = matcher.match(
+                row.get("description"), row.get("merchant_name"), row.get("transaction_category"), row.get("amount")
+            )
+            if category_id is not None:
+                row["category_id"] = category_id
+                categorized += 1
+    return categorized
+
+
+def apply_rules_to_history(db: Session, user_id: str, overwrite: bool = False,
+                           chunk_size: int = 2000) -> Tuple[int, int]:
+    """Re-run the user's rules over stored transactions in one DB transaction.
+
+    Only uncategorized transactions are touched unless overwrite is set.
+    Returns (scanned, categorized).
+    """
+    matcher = get_matcher(db, user_id)
+    query = select(
+        TransactionModel.id,
+        TransactionModel.category_id,
+        TransactionModel.description,
+        TransactionModel.merchant_name,
+        TransactionModel.transaction_category,
+        TransactionModel.amount,
+        TransactionModel.timestamp
+    ).where(TransactionModel.user_id == user_id)
+    if not overwrite:
+        query = query.where(TransactionModel.category_id.is_(None))
+
+    scanned = 0
+    changes = []
+    deltas, budget_deltas = {}, {}
+    for row in db.execute(query.execution_options(yield_per=chunk_size)):
+        scanned += 1
+        category_id = matcher.match(row.description, row.merchant_name, row.transaction_category, row.amount)
+        if category_id is None or category_id == row.category_id:
+            continue
+        changes.append({"id": row.id, "category_id": category_id})
+        spend_service.add_spend(deltas, row.category_id, row.amount, row.timestamp, sign=-1)
+        spend_service.add_spend(deltas, category_id, row.amount, row.timestamp)
+        budget_service.add_budget_delta(budget_deltas, row.category_id, row.amount, row.timestamp, sign=-1)
+        budget_service.add_budget_delta(budget_deltas, category_id, row.amount, row.timestamp)
+
+    try:
+        for start in range(0, len(changes), chunk_size):
+            # UPDATE por clave primaria en modo executemany
+            db.execute(update(TransactionModel), changes[start:start + chunk_size])
+        spend_service.apply_spend_deltas(db, user_id, deltas)
+        budget_service.apply_budget_deltas(db, user_id, budget_deltas)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Error applying rules for user_id {user_id}: {e}")
+        db.rollback()
+        raise
+
+    logger.info(f"Applied {matcher.size} rules for user_id {user_id}: {len(changes)} of {scanned} transactions categorized")
+    return scanned, len(changes)
@@ -0,0 +1,131 @@
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..database import dialect_insert
+from ..models.category_spend import CategorySpend
+from ..models.transaction import TransactionModel
+from . import version_service
+
+logger = logging.getLogger(__name__)
+
+# (category_id, primer día del mes) -> gasto (positivo)
+SpendDeltas = Dict[Tuple[int, date], Decimal]
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def parse_period(period: str) -> date:
+    """Parse a "YYYY-MM" period into the first day of that month (400 if the month does not exist)."""
+    try:
+        return datetime.strptime(period, "%Y-%m").date()
+    except ValueError:
+        # El patrón de la query solo comprueba los dígitos: 2025-13 o 2025-00 llegan aquí
+        raise HTTPException(status_code=400, detail=f"Invalid period {period!r}; expected YYYY-MM")
+
+
+def add_spend(deltas: SpendDeltas, category_id: Optional[int], amount: Optional[float],
+              timestamp: Optional[datetime], sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) a transaction's contribution to the spend deltas.
+
+    Only categorized expenses (negative amounts) count as spend, matching
+    the historical definition of /categories/spent.
+    """
+    if category_id is None or amount is None or timestamp is None or amount >= 0:
+        return
+    key = (category_id, month_start(timestamp))
+    deltas[key] = deltas.get(key, Decimal("0")) + sign * -Decimal(str(amount))
+
+
+def spend_upsert_statement(dialect_name: str, user_id: str, deltas: SpendDeltas):
+    rows = [
+        {"user_id": user_id, "category_id": category_id, "month": month, "spent": delta}
+        for (category_id, month), delta in deltas.items()
+        if delta != 0
+    ]
+    if not rows:
+        return None
+    insert = dialect_insert(dialect_name)
+    stmt = insert(CategorySpend).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[CategorySpend.user_id, CategorySpend.category_id, CategorySpend.month],
+        set_={"spent": CategorySpend.spent + stmt.excluded.spent}
+    )
+
+
+def apply_spend_deltas(db: Session, user_id: str, deltas: SpendDeltas):
+    """Apply the deltas in one statement inside the caller's transaction (no commit)."""
+    stmt = spend_upsert_statement(db.get_bind().dialect.name, user_id, deltas)
+    if stmt is not None:
+        db.execute(stmt)
+        version_service.bump(db, user_id, version_service.SPEND)
+
+
+async def apply_spend_deltas_async(db: AsyncSession, user_id: str, deltas: SpendDeltas):
+    stmt = spend_upsert_statement(db.get_bind().dialect.name, user_id, deltas)
+    if stmt is not None:
+        await db.execute(stmt)
+        await version_service.bump_async(db, user_id, version_service.SPEND)
+
+
+def spent_by_category_query(user_id: str, period: Optional[date] = None):
+    query = select(CategorySpend.category_id, func.sum(CategorySpend.spent).label("total_spent")).where(
+        CategorySpend.user_id == user_id
+    )
+    if period is not None:
+        query = query.where(CategorySpend.month == month_start(period))
+    return query.group_by(CategorySpend.category_id)
+
+
+def get_spent_by_category(db: Session, user_id: str, period: Optional[date] = None) -> Dict[int, float]:
+    query = spent_by_category_query(user_id, period)
+    return {row.category_id: float(row.total_spent) for row in db.execute(query) if row.total_spent}
+
+
+def rebuild_spend_aggregates(db: Session, user_id: Optional[str] = None, chunk_size: int = 5000) -> int:
+    """Recompute category_spend from the transactions table. Returns the number of rows written."""
+    totals = defaultdict(dict)
+    query = select(
+        TransactionModel.user_id,
+        TransactionModel.category_id,
+        TransactionModel.amount,
+        TransactionModel.timestamp
+    ).where(TransactionModel.category_id.isnot(None), TransactionModel.amount < 0)
+    if user_id is not None:
+        query = query.where(TransactionModel.user_id == user_id)
+
+    for row in db.execute(query.execution_options(yield_per=chunk_size)):
+        add_spend(totals[row.user_id], row.category_id, row.amount, row.timestamp)
+
+    try:
+        cleanup = delete(CategorySpend)
+        if user_id is not None:
+            cleanup = cleanup.where(CategorySpend.user_id == user_id)
+            affected = {user_id}
+        else:
+            # También los usuarios que solo tenían filas que se borran: su gasto cacheado pasa a cero
+            affected = set(totals) | set(db.scalars(select(CategorySpend.user_id).distinct()))
+        db.execute(cleanup)
+        for owner in sorted(affected):
+            version_service.bump(db, owner, version_service.SPEND)
+        written = 0
+        for owner, deltas in totals.items():
+            apply_spend_deltas(db, owner, deltas)
+            written += len(deltas)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Error rebuilding spend aggregates: {e}")
+        db.rollback()
+        raise
+
+    logger.info(f"Rebuilt {written} spend aggregate rows" + (f" for user_id {user_id}" if user_id else ""))
+    return written
@@ -0,0 +1,208 @@
+"""Streaming parsers for bank statement files (CSV, OFX, QIF).
+
+Each parser consumes an iterator of text lines and yields one dict per
+transaction with the keys: transaction_id (None if the file has no id),
+timestamp (naive UTC), amount, description, merchant_name,
+transaction_type and transaction_category. Records that cannot be parsed
+are skipped and recorded in the ParseErrors passed in by the caller.
+"""
+import csv
+import html
+import re
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, Iterator, List, Optional
+
+from ..schemas.statement_import import CsvImportMapping
+
+# Se guardan como mucho tantos mensajes de error por importación
+MAX_REPORTED_ERRORS = 50
+
+# Sin formato explícito se prueban en este orden (los bancos del Reino Unido usan día/mes)
+CSV_DATE_FORMATS = ("%d/%m/%Y", "%d/%m/%y", "%Y/%m/%d", "%d-%m-%Y", "%d.%m.%Y", "%d %b %Y", "%d %B %Y")
+QIF_DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%y", "%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d")
+
+
+class StatementFormatError(ValueError):
+    """The file as a whole cannot be read (e.g. mapped CSV columns are missing)."""
+
+
+class ParseErrors:
+    """Counts every skipped record but keeps only the first MAX_REPORTED_ERRORS messages."""
+
+    def __init__(self, limit: int = MAX_REPORTED_ERRORS):
+        self.limit = limit
+        self.count = 0
+        self.messages: List[str] = []
+
+    def add(self, message: str):
+        self.count += 1
+        if len(self.messages) < self.limit:
+            self.messages.append(message)
+
+
+def parse_amount(value: str, decimal_separator: str = ".") -> float:
+    text = value.strip().replace(" ", "").replace("\u00a0", "")
+    negative = text.startswith("(") and text.endswith(")")
+    text = text.strip("()")
+    thousands = "," if decimal_separator == "." else "."
+    text = text.replace(thousands, "").replace(decimal_separator, ".")
+    # Símbolos de moneda y signos sueltos (p. ej. "£-12.50", "12.50-")
+    text = re.sub(r"[^0-9.+-]", "", text)
+    if text.endswith("-"):
+        text, negative = text[:-1], not negative
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"invalid amount {value!r}")
+    return float(-amount if negative else amount)
+
+
+def parse_date(value: str, date_format: Optional[str] = None, formats=CSV_DATE_FORMATS) -> datetime:
+    text = value.strip()
+    if date_format:
+        return datetime.strptime(text, date_format)
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        if parsed.tzinfo is not None:
+            parsed = (parsed - parsed.utcoffset()).replace(tzinfo=None)
+        return parsed
+    except ValueError:
+        pass
+    for candidate in formats:
+        try:
+            return datetime.strptime(text, candidate)
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date {value!r}")
+
+
+def _transaction_type(amount: float) -> str:
+    return "DEBIT" if amount < 0 else "CREDIT"
+
+
+def _field(record: dict, column: Optional[str]) -> Optional[str]:
+    if not column:
+        return None
+    return (record.get(column) or "").strip() or None
+
+
+def parse_csv(lines: Iterable[str], mapping: CsvImportMapping, errors: ParseErrors) -> Iterator[dict]:
+    if not mapping.amount_column and not (mapping.debit_column and mapping.credit_column):
+        raise StatementFormatError("an amount column or both debit and credit columns are required")
+    if len(mapping.delimiter) != 1:
+        raise StatementFormatError("the delimiter must be a single character")
+    reader = csv.DictReader(lines, delimiter=mapping.delimiter)
+    header = [name.strip() for name in (reader.fieldnames or [])]
+    reader.fieldnames = header
+    required = [mapping.date_column, mapping.description_column]
+    required += [mapping.amount_column] if mapping.amount_column else [mapping.debit_column, mapping.credit_column]
+    optional = [mapping.id_column, mapping.merchant_column, mapping.category_column]
+    missing = [column for column in required + optional if column and column not in header]
+    if missing:
+        raise StatementFormatError(f"CSV columns not found in header: {', '.join(missing)}")
+
+    for record in reader:
+        # line_num cuenta líneas físicas, así que es correcto con campos entre comillas multilínea
+        line = reader.line_num
+        try:
+            if mapping.amount_column:
+                amount = parse_amount(_field(record, mapping.amount_column) or "", mapping.decimal_separator)
+            else:
+                # Columnas separadas de cargo y abono; el cargo siempre resta
+                debit = _field(record, mapping.debit_column)
+                credit = _field(record, mapping.credit_column)
+                if debit is None and credit is None:
+                    raise ValueError("no debit or credit amount")
+                amount = (parse_amount(credit, mapping.decimal_separator) if credit else 0.0) \
+                    - (abs(parse_amount(debit, mapping.decimal_separator)) if debit else 0.0)
+            yield {
+                "transaction_id": _field(record, mapping.id_column),
+                "timestamp": parse_date(_field(record, mapping.date_column) or "", mapping.date_format),
+                "amount": amount,
+                "description": _field(record, mapping.description_column) or "",
+                "merchant_name": _field(record, mapping.merchant_column),
+                "transaction_type": _transaction_type(amount),
+                "transaction_category": _field(record, mapping.category_column) or "Uncategorized",
+            }
+        except ValueError as e:
+            errors.add(f"line {line}: {e}")
+
+
+_OFX_TOKEN = re.compile(r"<(/?)([A-Za-z0-9.]+)[^>]*>([^<]*)")
+
+
+def _ofx_date(value: str) -> datetime:
+    # YYYYMMDD[HHMMSS[.XXX]][[+-]H[.MM][:TZ]]
+    match = re.match(r"(\d{8})(\d{6})?(?:\.\d+)?(?:\[([+-]?\d+(?:\.\d+)?)(?::[^\]]*)?\])?", value.strip())
+    if not match:
+        raise ValueError(f"invalid OFX date {value!r}")
+    parsed = datetime.strptime(match.group(1) + (match.group(2) or "000000"), "%Y%m%d%H%M%S")
+    if match.group(3):
+        parsed -= timedelta(hours=float(match.group(3)))
+    return parsed
+
+
+def parse_ofx(lines: Iterable[str], errors: ParseErrors) -> Iterator[dict]:
+    """OFX 1.x (SGML, closing tags optional) and 2.x (XML), one <STMTTRN> at a time."""
+    current = None
+    index = 0
+    for line in lines:
+        for closing, tag, value in _OFX_TOKEN.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if not closing:
+                    current = {}
+                    continue
+                if current is not None:
+                    index += 1
+                    try:
+                        amount = parse_amount(current["TRNAMT"])
+                        name = current.get("NAME") or current.get("PAYEE") or ""
+                        memo = current.get("MEMO") or ""
+                        yield {
+                            "transaction_id": current.get("FITID") or None,
+                            "timestamp": _ofx_date(current.get("DTPOSTED") or current["DTUSER"]),
+                            "amount": amount,
+                            "description": " ".join(part for part in (name, memo) if part),
+                            "merchant_name": name or None,
+                            "transaction_type": (current.get("TRNTYPE") or _transaction_type(amount)).upper(),
+                            "transaction_category": "Uncategorized",
+                        }
+                    except (KeyError, ValueError) as e:
+                        errors.add(f"transaction {index}: {e!r}")
+                current = None
+            elif current is not None and not closing and value.strip():
+                current[tag] = html.unescape(value.strip())
+
+
+def parse_qif(lines: Iterable[str], errors: ParseErrors, date_format: Optional[str] = None) -> Iterator[dict]:
+    record = {}
+    index = 0
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line or line.startswith("!"):
+            continue
+        code, value = line[0], line[1:].strip()
+        if code != "^":
+            # Las transacciones divididas (S/E/$) se importan como un único movimiento
+            record.setdefault(code, value)
+            continue
+        index += 1
+        if record:
+            try:
+                amount = parse_amount(record.get("T") or record["U"])
+                payee = record.get("P") or ""
+                memo = record.get("M") or ""
+                yield {
+                    "transaction_id": None,
+                    "timestamp": parse_date(record["D"].replace("'", "/").replace(" ", ""), date_format, QIF_DATE_FORMATS),
+                    "amount": amount,
+                    "description": " ".join(part for part in (payee, memo) if part),
+                    "merchant_name": payee or None,
+                    "transaction_type": _transaction_type(amount),
+                    "transaction_category": record.get("L") or "Uncategorized",
+                }
+            except (KeyError, ValueError) as e:
+                errors.add(f"record {index}: {e!r}")
+        record = {}
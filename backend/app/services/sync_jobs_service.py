@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from ..core.config import TRUELAYER_MAX_CONCURRENCY
+from ..database import AsyncSessionLocal
+from ..models.sync_job import SyncJob, SyncJobAccount
+from . import accounts_service
+
+logger = logging.getLogger(__name__)
+
+# Los mensajes de error se recortan al guardarlos en el trabajo
+MAX_ERROR_LENGTH = 500
+
+
+def _error_message(error: Exception) -> str:
+    detail = getattr(error, "detail", None) or str(error) or type(error).__name__
+    return str(detail)[:MAX_ERROR_LENGTH]
+
+
+async def create_job(db: AsyncSession, user_id: str) -> SyncJob:
+    job = SyncJob(id=uuid.uuid4().hex, user_id=user_id, status="pending")
+    db.add(job)
+    await db.commit()
+    return job
+
+
+async def get_job(db: AsyncSession, job_id: str, user_id: str) -> Optional[SyncJob]:
+    return await db.scalar(
+        select(SyncJob)
+        .where(SyncJob.id == job_id, SyncJob.user_id == user_id)
+        .options(selectinload(SyncJob.accounts))
+    )
+
+
+async def _set_job(job_id: str, **values):
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(SyncJob).where(SyncJob.id == job_id).values(**values))
+        await db.commit()
+
+
+async def _set_job_account(job_account_id: int, **values):
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(SyncJobAccount).where(SyncJobAccount.id == job_account_id).values(**values))
+        await db.commit()
+
+
+async def _sync_job_account(user_id: str, job_account_id: int, account_id: str, semaphore: asyncio.Semaphore) -> bool:
+    async with semaphore:
+        await _set_job_account(job_account_id, status="running", started_at=datetime.utcnow())
+        try:
+            # Sesión propia por cuenta (las cuentas van en paralelo), compartida con
+            # cualquier sincronización de la misma cuenta que ya esté en curso
+            counts = await accounts_service.coalesced_sync_account_transactions(user_id, account_id, fresh_for=0)
+        except Exception as e:
+            logger.warning(f"Sync job account {account_id} failed: {e}")
+            await _set_job_account(job_account_id, status="failed", error=_error_message(e), finished_at=datetime.utcnow())
+            return False
+        await _set_job_account(
+            job_account_id, status="succeeded", inserted=counts["inserted"], updated=counts["updated"],
+            finished_at=datetime.utcnow()
+        )
+        return True
+
+
+async def run_job(job_id: str, user_id: str):
+    """Sync a user's TrueLayer accounts and their transactions, recording progress on the job.
+
+    Runs after the response has been sent, with its own sessions. Accounts
+    whose balance could not be fetched, or whose transactions failed, are
+    marked failed without stopping the others (job status "partial").
+    """
+    await _set_job(job_id, status="running", started_at=datetime.utcnow())
+    try:
+        accounts_data = await accounts_service.get_truelayer_accounts(user_id)
+        accounts = accounts_data.get('results', [])
+        fetched, failures = await accounts_service.fetch_truelayer_account_details(user_id, accounts)
+
+        async with AsyncSessionLocal() as db:
+            await accounts_service.bulk_create_or_update_accounts(db, fetched)
+            job_accounts = [SyncJobAccount(job_id=job_id, account_id=account.account_id, status="pending") for account in fetched]
+            job_accounts += [
+                SyncJobAccount(job_id=job_id, account_id=account_id, status="failed", error=_error_message(error),
+                               finished_at=datetime.utcnow())
+                for account_id, error in failures.items()
+            ]
+            db.add_all(job_accounts)
+            await db.commit()
+            pending = [(job_account.id, job_account.account_id) for job_account in job_accounts if job_account.status == "pending"]
+
+        semaphore = asyncio.Semaphore(TRUELAYER_MAX_CONCURRENCY)
+        results = await asyncio.gather(*(
+            _sync_job_account(user_id, job_account_id, account_id, semaphore)
+            for job_account_id, account_id in pending
+        ))
+        status = "succeeded" if all(results) and not failures else "partial"
+        await _set_job(job_id, status=status, finished_at=datetime.utcnow())
+        logger.info(f"Sync job {job_id} for user_id {user_id} finished: {status}, {len(job_accounts)} accounts")
+    except Exception as e:
+        logger.error(f"Sync job {job_id} for user_id {user_id} failed: {e}", exc_info=True)
+        await _set_job(job_id, status="failed", error=_error_message(e), finished_at=datetime.utcnow())
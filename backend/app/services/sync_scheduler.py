@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import or_, select, text
+
+from ..core.config import (
+    SYNC_INTERVAL_SECONDS,
+    SYNC_POLL_SECONDS,
+    SYNC_JITTER_SECONDS,
+    SYNC_MAX_CONCURRENCY,
+    SYNC_MAX_ACCOUNTS_PER_USER,
+)
+from ..database import AsyncSessionLocal, async_engine
+from ..models.account import AccountModel
+from ..models.account_sync_state import AccountSyncState
+from . import accounts_service
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock de PostgreSQL: una sola pasada a la vez entre todos los procesos
+SCHEDULER_LOCK_KEY = 0x5F5C_0001
+
+
+class SyncScheduler:
+    """Periodically syncs every linked account so reads only hit the database.
+
+    Every poll (SYNC_POLL_SECONDS plus random jitter) it picks the accounts
+    not synced for SYNC_INTERVAL_SECONDS, stalest first, and syncs them
+    user by user: at most max_concurrency users at a time and at most
+    max_accounts_per_user accounts per user per pass, so a user with many
+    accounts cannot starve the others; their remaining accounts are still
+    the stalest on the next pass. Users without a usable TrueLayer token
+    are skipped.
+    """
+
+    def __init__(
+        self,
+        interval: float = SYNC_INTERVAL_SECONDS,
+        poll: float = SYNC_POLL_SECONDS,
+        jitter: float = SYNC_JITTER_SECONDS,
+        max_concurrency: int = SYNC_MAX_CONCURRENCY,
+        max_accounts_per_user: int = SYNC_MAX_ACCOUNTS_PER_USER,
+        session_factory=AsyncSessionLocal
+    ):
+        self.interval = interval
+        self.poll = poll
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        self.max_accounts_per_user = max_accounts_per_user
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self.passes = 0
+        self.accounts_synced = 0
+        self.failures = 0
+        self.users_without_token = 0
+        self.last_pass_at: Optional[datetime] = None
+        self.last_pass_seconds: Optional[float] = None
+
+    async def due_accounts(self, db, now: datetime) -> Dict[str, List[str]]:
+        """Accounts to sync now, grouped by user; users ordered by their stalest account."""
+        rows = await db.execute(
+            select(AccountModel.user_id, AccountModel.account_id)
+            .outerjoin(AccountSyncState, AccountSyncState.account_id == AccountModel.account_id)
+            .where(or_(
+                AccountSyncState.last_synced_at.is_(None),
+                AccountSyncState.last_synced_at <= now - timedelta(seconds=self.interval)
+            ))
+            # Las cuentas que nunca se han sincronizado van primero
+            .order_by(AccountSyncState.last_synced_at.is_not(None), AccountSyncState.last_synced_at)
+        )
+        due: Dict[str, List[str]] = OrderedDict()
+        for user_id, account_id in rows:
+            accounts = due.setdefault(user_id, [])
+            if len(accounts) < self.max_accounts_per_user:
+                accounts.append(account_id)
+        return due
+
+    async def sync_user(self, user_id: str, account_ids: List[str]):
+        try:
+            # Puede refrescar el token: un fallo de TrueLayer aquí no debe cortar la pasada
+            access_token = await accounts_service.token_manager.get_valid_access_token(user_id)
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Background sync token lookup failed for user_id {user_id}: {e}")
+            return
+        if not access_token:
+            self.users_without_token += 1
+            logger.info(f"Background sync skipped for user_id {user_id}: no valid TrueLayer token")
+            return
+        # Mismas claves single-flight que los endpoints: si el usuario ya está sincronizando se reutiliza
+        try:
+            # Saldos (y cuentas nuevas) con una llamada por usuario
+            await accounts_service.coalesced_sync_user_accounts(user_id, fresh_for=0)
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Background account refresh failed for user_id {user_id}: {e}")
+        for account_id in account_ids:
+            try:
+                await accounts_service.coalesced_sync_account_transactions(user_id, account_id, fresh_for=0)
+                self.accounts_synced += 1
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"Background sync failed for account_id {account_id}: {e}")
+
+    @asynccontextmanager
+    async def _exclusive_pass(self):
+        """Yield whether this process may run a pass (always true outside PostgreSQL)."""
+        if async_engine.dialect.name != "postgresql":
+            yield True
+            return
+        async with async_engine.connect() as conn:
+            acquired = await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": SCHEDULER_LOCK_KEY})
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEDULER_LOCK_KEY})
+
+    async def run_once(self) -> int:
+        """Run one pass. Returns the number of accounts it tried to sync."""
+        async with self._exclusive_pass() as acquired:
+            if not acquired:
+                logger.debug("Background sync pass already running in another process")
+                return 0
+            started = time.perf_counter()
+            now = datetime.utcnow()
+            async with self.session_factory() as db:
+                due = await self.due_accounts(db, now)
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def run(user_id: str, account_ids: List[str]):
+                async with semaphore:
+                    await self.sync_user(user_id, account_ids)
+
+            # Todos los usuarios terminan antes de soltar el lock, aunque alguno falle
+            results = await asyncio.gather(
+                *(run(user_id, account_ids) for user_id, account_ids in due.items()), return_exceptions=True
+            )
+            for user_id, result in zip(due, results):
+                if isinstance(result, Exception):
+                    self.failures += 1
+                    logger.error(f"Background sync failed for user_id {user_id}: {result}", exc_info=result)
+            self.passes += 1
+            self.last_pass_at = now
+            self.last_pass_seconds = time.perf_counter() - started
+            total = sum(len(account_ids) for account_ids in due.values())
+            if total:
+                logger.info(f"Background sync pass: {total} accounts of {len(due)} users in {self.last_pass_seconds:.1f}s")
+            return total
+
+    async def run_forever(self):
+        # Retardo inicial aleatorio para que varios procesos no arranquen alineados
+        delay = random.uniform(0, self.jitter)
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+                break
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Background sync pass failed: {e}", exc_info=True)
+            delay = self.poll + random.uniform(0, self.jitter)
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run_forever())
+            logger.info(f"Background sync scheduler started (interval {self.interval}s, poll {self.poll}s)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            # Se deja terminar la cuenta en curso; si tarda demasiado se cancela
+            await asyncio.wait_for(self._task, timeout=30)
+        except asyncio.TimeoutError:
+            logger.warning("Background sync scheduler did not stop in time; cancelled")
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "passes": self.passes,
+            "accounts_synced": self.accounts_synced,
+            "failures": self.failures,
+            "users_without_token": self.users_without_token,
+            "last_pass_at": self.last_pass_at.isoformat() if self.last_pass_at else None,
+            "last_pass_seconds": self.last_pass_seconds,
+        }
+
+
+scheduler = SyncScheduler()
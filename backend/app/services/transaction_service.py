@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Iterable, Literal, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+
+from ..models.transaction import TransactionModel
+
+# Consultas de los routers de transacciones; benchmarks.check_query_plans comprueba sus planes
+
+
+def transactions_page_query(
+    user_id: str,
+    limit: int,
+    cursor: Optional[Tuple[datetime, int]] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    account_id: Optional[str] = None,
+    category_id: Optional[int] = None,
+    uncategorized: bool = False,
+    amount_sign: Optional[Literal["positive", "negative"]] = None
+):
+    """One page of GET /transactions/, newest first, with one extra row to tell whether there is a next page.
+
+    The order is a stable (timestamp, id) descending; `cursor` is the
+    (timestamp, id) of the last row of the previous page.
+    """
+    query = select(TransactionModel).where(TransactionModel.user_id == user_id)
+    if account_id is not None:
+        query = query.where(TransactionModel.account_id == account_id)
+    if uncategorized:
+        query = query.where(TransactionModel.category_id.is_(None))
+    elif category_id is not None:
+        query = query.where(TransactionModel.category_id == category_id)
+    if date_from is not None:
+        query = query.where(TransactionModel.timestamp >= date_from)
+    if date_to is not None:
+        query = query.where(TransactionModel.timestamp < date_to)
+    if amount_sign == "positive":
+        query = query.where(TransactionModel.amount > 0)
+    elif amount_sign == "negative":
+        query = query.where(TransactionModel.amount < 0)
+    if cursor is not None:
+        query = query.where(tuple_(TransactionModel.timestamp, TransactionModel.id) < tuple_(*cursor))
+    return query.order_by(TransactionModel.timestamp.desc(), TransactionModel.id.desc()).limit(limit + 1)
+
+
+def transaction_query(user_id: str, transaction_id: str):
+    return select(TransactionModel).where(
+        TransactionModel.transaction_id == transaction_id,
+        TransactionModel.user_id == user_id
+    )
+
+
+def transactions_by_ids_query(user_id: str, transaction_ids: Iterable[str]):
+    return select(TransactionModel).where(
+        TransactionModel.transaction_id.in_(list(transaction_ids)),
+        TransactionModel.user_id == user_id
+    )
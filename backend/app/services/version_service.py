@@ -0,0 +1,64 @@
+import logging
+from typing import Dict, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.read_cache import read_cache
+from ..database import dialect_insert
+from ..models.data_version import DataVersion
+
+logger = logging.getLogger(__name__)
+
+# Recursos versionados
+CATEGORY_GROUPS = "category_groups"
+CATEGORIES = "categories"
+BUDGETS = "budgets"
+ACCOUNTS = "accounts"
+SPEND = "spend"
+READY_TO_ASSIGN = "ready_to_assign"
+RULES = "rules"
+
+
+def bump_statement(dialect_name: str, user_id: str, resources: Iterable[str]):
+    # Orden fijo para que dos escrituras concurrentes bloqueen las filas en el mismo orden
+    rows = [{"user_id": user_id, "resource": resource, "version": 1} for resource in sorted(set(resources))]
+    insert = dialect_insert(dialect_name)
+    stmt = insert(DataVersion).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[DataVersion.user_id, DataVersion.resource],
+        set_={"version": DataVersion.version + 1}
+    )
+
+
+def bump(db: Session, user_id: str, *resources: str):
+    """Increment the versions inside the caller's transaction (no commit), so they move with the write.
+
+    The user's cached reads of those resources are dropped when it commits.
+    """
+    db.execute(bump_statement(db.get_bind().dialect.name, user_id, resources))
+    read_cache.invalidate_on_commit(db, user_id, *resources)
+
+
+async def bump_async(db: AsyncSession, user_id: str, *resources: str):
+    await db.execute(bump_statement(db.get_bind().dialect.name, user_id, resources))
+    read_cache.invalidate_on_commit(db, user_id, *resources)
+
+
+def versions_query(user_id: str, resources: Iterable[str]):
+    return select(DataVersion.resource, DataVersion.version).where(
+        DataVersion.user_id == user_id,
+        DataVersion.resource.in_(list(resources))
+    )
+
+
+def get_versions(db: Session, user_id: str, *resources: str) -> Dict[str, int]:
+    """Current versions; resources never written are at version 0."""
+    found = dict(db.execute(versions_query(user_id, resources)).all())
+    return {resource: found.get(resource, 0) for resource in resources}
+
+
+async def get_versions_async(db: AsyncSession, user_id: str, *resources: str) -> Dict[str, int]:
+    found = dict((await db.execute(versions_query(user_id, resources))).all())
+    return {resource: found.get(resource, 0) for resource in resources}
@@ -0,0 +1,4 @@
+import os
+
+# Los benchmarks crean y descartan sus propios tokens de TrueLayer: basta una clave efímera
+os.environ.setdefault("TOKEN_ENCRYPTION_ALLOW_EPHEMERAL", "true")
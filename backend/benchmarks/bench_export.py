@@ -0,0 +1,92 @@
+"""Memoria y velocidad de la exportación en streaming frente a cargar todo con .all().
+
+Siembra N transacciones y mide con tracemalloc el pico de memoria de Python
+al recorrer GET /exports/transactions (ndjson y csv) frente a cargar las
+instancias ORM y serializarlas de una vez. El pico del streaming no debe
+crecer con N.
+
+Uso (desde backend/):
+
+    python -m benchmarks.bench_export --sizes 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.database import Base
+from app.models import UserModel, TransactionModel
+from app.models.account import AccountModel
+from app.schemas.transaction import Transaction
+from app.services import export_service
+
+USER_ID = "bench-user"
+ACCOUNT_ID = "bench-account"
+
+
+async def seed(engine, size: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(UserModel).values(email="bench@example.com", firebase_uid=USER_ID))
+        await conn.execute(insert(AccountModel).values(
+            user_id=USER_ID, account_id=ACCOUNT_ID, account_type="TRANSACTION",
+            account_name="Bench", balance=0, currency="GBP", institution_name="Bench"
+        ))
+        base = datetime(2020, 1, 1)
+        for start in range(0, size, 10_000):
+            await conn.execute(insert(TransactionModel), [
+                dict(account_id=ACCOUNT_ID, user_id=USER_ID, transaction_id=f"tx-{i}", amount=-(i % 500) - 0.99,
+                     currency="GBP", description=f"CARD PAYMENT TO MERCHANT {i % 250}", transaction_type="DEBIT",
+                     transaction_category="PURCHASE", timestamp=base + timedelta(minutes=i))
+                for i in range(start, min(size, start + 10_000))
+            ])
+
+
+async def load_all(Session):
+    async with Session() as db:
+        transactions = (await db.execute(select(TransactionModel).where(TransactionModel.user_id == USER_ID))).scalars().all()
+        yield json.dumps([Transaction.model_validate(t).model_dump(mode="json") for t in transactions]).encode()
+
+
+async def measure(chunks):
+    tracemalloc.start()
+    started = time.perf_counter()
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, total
+
+
+async def run(url: str, sizes):
+    for size in sizes:
+        engine = create_async_engine(url)
+        await seed(engine, size)
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+        query = export_service.export_query(USER_ID)
+        strategies = (
+            ("all()", load_all(Session)),
+            ("ndjson", export_service.ndjson_chunks(query, session_factory=Session)),
+            ("csv", export_service.csv_chunks(query, session_factory=Session)),
+        )
+        for name, chunks in strategies:
+            elapsed, peak, total = await measure(chunks)
+            print(f"{size:8} rows  {name:7} {elapsed:7.2f}s  {size / elapsed:9.0f} rows/s  "
+                  f"peak {peak / 2 ** 20:8.1f} MiB  output {total / 2 ** 20:8.1f} MiB")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite+aiosqlite:///bench_export.db")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.sizes))
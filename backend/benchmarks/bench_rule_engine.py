@@ -0,0 +1,116 @@
+"""Compara el matcher compilado de reglas con un bucle regla a regla.
+
+No necesita base de datos: genera reglas y transacciones sintéticas en
+memoria, comprueba que ambos métodos eligen la misma categoría y mide cuánto
+tarda cada uno en clasificar todas las transacciones.
+
+Uso (desde backend/):
+
+    python -m benchmarks.bench_rule_engine --rules 500 --transactions 50000
+"""
+import argparse
+import random
+import re
+import time
+from types import SimpleNamespace
+
+from app.services.rules_service import CompiledRules
+
+WORDS = ["tesco", "amazon", "uber", "spotify", "netflix", "shell", "costa", "pret", "boots", "argos",
+         "deliveroo", "trainline", "ikea", "zara", "apple", "google", "paypal", "lidl", "aldi", "asos"]
+
+
+def make_rules(count: int, rng: random.Random):
+    rules = []
+    for i in range(count):
+        kind = ("description_contains", "description_contains", "description_regex",
+                "merchant", "transaction_category", "amount")[i % 6]
+        word = f"{rng.choice(WORDS)}{i}"
+        rule = SimpleNamespace(id=i + 1, category_id=i % 40 + 1, match_type=kind, pattern=None,
+                               min_amount=None, max_amount=None, priority=rng.randint(1, 200))
+        if kind == "description_contains":
+            rule.pattern = word
+        elif kind == "description_regex":
+            # Algunas sin literal obligatorio, para medir también el patrón combinado
+            rule.pattern = rf"\b{word}\b|^zz{i}" if i % 4 == 2 else rf"{word}\s+(ref|card)\s*\d+"
+        elif kind == "merchant":
+            rule.pattern = word.upper()
+        elif kind == "transaction_category":
+            rule.pattern = f"CAT_{i}"
+        if kind == "amount" or i % 7 == 0:
+            low = -float(rng.randint(1, 500))
+            rule.min_amount, rule.max_amount = low, low + rng.randint(1, 100)
+        rules.append(rule)
+    return rules
+
+
+def make_transactions(count: int, rule_count: int, rng: random.Random):
+    transactions = []
+    for i in range(count):
+        target = rng.randrange(rule_count * 2)
+        word = f"{rng.choice(WORDS)}{target}"
+        transactions.append((
+            f"CARD PAYMENT TO {word.upper()} ref {i} ON 01 JAN",
+            word if i % 3 == 0 else None,
+            f"CAT_{target}" if i % 5 == 0 else "PURCHASE",
+            -float(rng.randint(0, 600)) + rng.random(),
+        ))
+    return transactions
+
+
+def naive_match(rules, description, merchant_name, transaction_category, amount):
+    """Lo que haría un bucle sin compilar: probar cada regla y quedarse con la de mayor prioridad."""
+    best = None
+    for rule in rules:
+        if rule.match_type == "description_contains":
+            matched = bool(description) and rule.pattern.lower() in description.lower()
+        elif rule.match_type == "description_regex":
+            matched = bool(description) and re.search(rule.pattern, description, re.IGNORECASE) is not None
+        elif rule.match_type == "merchant":
+            matched = bool(merchant_name) and merchant_name.strip().lower() == rule.pattern.strip().lower()
+        elif rule.match_type == "transaction_category":
+            matched = bool(transaction_category) and transaction_category.strip().upper() == rule.pattern.strip().upper()
+        else:
+            matched = True
+        if matched and (rule.min_amount is not None or rule.max_amount is not None):
+            matched = amount is not None and (rule.min_amount is None or amount >= rule.min_amount) \
+                and (rule.max_amount is None or amount <= rule.max_amount)
+        if matched and (best is None or (rule.priority, rule.id) < (best.priority, best.id)):
+            best = rule
+    return best.category_id if best else None
+
+
+def run(rule_count: int, transaction_count: int, seed: int):
+    rng = random.Random(seed)
+    rules = make_rules(rule_count, rng)
+    transactions = make_transactions(transaction_count, rule_count, rng)
+
+    started = time.perf_counter()
+    matcher = CompiledRules(rules)
+    compile_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    compiled = [matcher.match(*transaction) for transaction in transactions]
+    compiled_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    naive = [naive_match(rules, *transaction) for transaction in transactions]
+    naive_time = time.perf_counter() - started
+
+    mismatches = sum(a != b for a, b in zip(compiled, naive))
+    matched = sum(category is not None for category in compiled)
+    print(f"{rule_count} rules, {transaction_count} transactions, {matched} categorized")
+    print(f"compile  {compile_time * 1000:10.1f}ms")
+    print(f"compiled {compiled_time:10.3f}s ({transaction_count / compiled_time:10.0f} tx/s)")
+    print(f"naive    {naive_time:10.3f}s ({transaction_count / naive_time:10.0f} tx/s)")
+    if mismatches:
+        raise SystemExit(f"{mismatches} transactions categorized differently")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=500)
+    parser.add_argument("--transactions", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    run(args.rules, args.transactions, args.seed)
@@ -0,0 +1,105 @@
+"""Filas por segundo de GET /accounts/{account_id}/transactions: antes y después.
+
+"before" reproduce el camino anterior: instancias ORM completas,
+Transaction.model_validate(transaction.__dict__) por fila, la revalidación de
+FastAPI contra response_model y el codificador json de la stdlib.
+"after" es el camino actual: solo las columnas del esquema, dicts planos y
+ORJSONResponse. Se mide consulta + serialización, y se comprueba que ambos
+producen el mismo JSON.
+
+Uso (desde backend/):
+
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --sizes 1000 10000 100000 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.database import Base
+from app.models import UserModel, TransactionModel
+from app.models.account import AccountModel
+from app.schemas.transaction import Transaction
+from app.services import accounts_service
+
+USER_ID = "bench-user"
+
+response_adapter = TypeAdapter(List[Transaction])
+
+
+async def seed(engine, sizes):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(UserModel).values(email="bench@example.com", firebase_uid=USER_ID))
+        base = datetime(2024, 1, 1)
+        for size in sizes:
+            account_id = f"bench-account-{size}"
+            await conn.execute(insert(AccountModel).values(
+                user_id=USER_ID, account_id=account_id, account_type="TRANSACTION",
+                account_name="Bench", balance=0, currency="GBP", institution_name="Bench"
+            ))
+            for start in range(0, size, 10_000):
+                await conn.execute(insert(TransactionModel), [
+                    dict(account_id=account_id, user_id=USER_ID, transaction_id=f"{account_id}-tx-{i}",
+                         amount=-(i % 500) - 0.99, currency="GBP", description=f"CARD PAYMENT TO MERCHANT {i % 250}",
+                         transaction_type="DEBIT", transaction_category="PURCHASE",
+                         merchant_name=f"Merchant {i % 250}", timestamp=base + timedelta(minutes=i),
+                         category_id=None)
+                    for i in range(start, min(size, start + 10_000))
+                ])
+
+
+async def before(db, account_id: str) -> bytes:
+    transactions = (await db.execute(select(TransactionModel).where(TransactionModel.account_id == account_id))).scalars().all()
+    models = [Transaction.model_validate(transaction.__dict__) for transaction in transactions]
+    # serialize_response de FastAPI: validar contra response_model y volcar en modo json
+    content = response_adapter.dump_python(response_adapter.validate_python(models), mode="json")
+    return JSONResponse(content).body
+
+
+async def after(db, account_id: str) -> bytes:
+    rows = await accounts_service.get_account_transaction_rows(db, account_id)
+    return ORJSONResponse(rows).body
+
+
+async def run(url: str, sizes, repeat: int):
+    engine = create_async_engine(url)
+    await seed(engine, sizes)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        for size in sizes:
+            account_id = f"bench-account-{size}"
+            bodies = {}
+            for name, strategy in (("before", before), ("after", after)):
+                timings = []
+                for _ in range(repeat):
+                    # Sesión nueva en cada vuelta: sin identity map caliente, como en una petición
+                    async with Session() as db:
+                        started = time.perf_counter()
+                        bodies[name] = await strategy(db, account_id)
+                        timings.append(time.perf_counter() - started)
+                best = min(timings)
+                print(f"{size:7} rows  {name:6} {best * 1000:9.1f}ms  {size / best:10.0f} rows/s  "
+                      f"{len(bodies[name]) / 1024:8.0f} KiB")
+            if json.loads(bodies["before"]) != json.loads(bodies["after"]):
+                raise SystemExit(f"Responses differ for {size} rows")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite+aiosqlite:///bench_serialization.db")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.sizes, args.repeat))
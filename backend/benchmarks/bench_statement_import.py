@@ -0,0 +1,113 @@
+"""Tiempo de importación de extractos (CSV, OFX, QIF) con import_service.
+
+Genera un fichero de --lines movimientos por formato, lo importa en una
+cuenta vacía y lo vuelve a importar: la segunda pasada debe descartarlo todo
+como duplicado. Con --url postgresql+asyncpg://... se mide el camino COPY.
+
+Uso (desde backend/):
+
+    python -m benchmarks.bench_statement_import
+    python -m benchmarks.bench_statement_import --lines 50000 --formats csv ofx
+"""
+import argparse
+import asyncio
+import io
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.database import Base
+from app.models import UserModel
+from app.models.account import AccountModel
+from app.schemas.statement_import import CsvImportMapping
+from app.services import import_service
+
+USER_ID = "bench-user"
+BASE = datetime(2023, 1, 1)
+
+
+def _movement(i: int):
+    # Un ingreso de cada 20 movimientos; el resto, cargos de tarjeta
+    amount = 1500.0 if i % 20 == 0 else -((i % 500) + 0.99)
+    return BASE + timedelta(minutes=17 * i), amount, f"CARD PAYMENT TO MERCHANT {i % 250}"
+
+
+def csv_statement(lines: int) -> str:
+    out = io.StringIO()
+    out.write("Date,Description,Amount\n")
+    for i in range(lines):
+        timestamp, amount, description = _movement(i)
+        out.write(f"{timestamp:%d/%m/%Y},{description} #{i},{amount:.2f}\n")
+    return out.getvalue()
+
+
+def ofx_statement(lines: int) -> str:
+    out = io.StringIO()
+    out.write("OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n")
+    for i in range(lines):
+        timestamp, amount, description = _movement(i)
+        out.write(f"<STMTTRN>\n<TRNTYPE>{'DEBIT' if amount < 0 else 'CREDIT'}\n<DTPOSTED>{timestamp:%Y%m%d%H%M%S}\n"
+                  f"<TRNAMT>{amount:.2f}\n<FITID>{i}\n<NAME>{description}\n</STMTTRN>\n")
+    out.write("</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+    return out.getvalue()
+
+
+def qif_statement(lines: int) -> str:
+    out = io.StringIO()
+    out.write("!Type:Bank\n")
+    for i in range(lines):
+        timestamp, amount, description = _movement(i)
+        out.write(f"D{timestamp:%m/%d/%Y}\nT{amount:.2f}\nP{description} #{i}\n^\n")
+    return out.getvalue()
+
+
+STATEMENTS = {"csv": csv_statement, "ofx": ofx_statement, "qif": qif_statement}
+
+
+async def seed(engine, formats):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(UserModel).values(email="bench@example.com", firebase_uid=USER_ID))
+        for format in formats:
+            await conn.execute(insert(AccountModel).values(
+                user_id=USER_ID, account_id=f"bench-import-{format}", account_type="TRANSACTION",
+                account_name="Bench", balance=0, currency="GBP", institution_name="Bench"
+            ))
+
+
+async def run(url: str, lines: int, formats):
+    engine = create_async_engine(url)
+    await seed(engine, formats)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    mapping = CsvImportMapping(date_column="Date", description_column="Description", amount_column="Amount")
+    try:
+        for format in formats:
+            statement = STATEMENTS[format](lines)
+            for attempt in ("first", "again"):
+                async with Session() as db:
+                    account = await db.scalar(select(AccountModel).where(AccountModel.account_id == f"bench-import-{format}"))
+                    started = time.perf_counter()
+                    result = await import_service.import_statement(
+                        db, USER_ID, account, io.StringIO(statement, newline=""), format, mapping
+                    )
+                    elapsed = time.perf_counter() - started
+                print(f"{format:4} {attempt:6} {len(statement) / 1024 / 1024:6.1f} MiB  {elapsed:7.2f}s  "
+                      f"{result.parsed / elapsed:9.0f} rows/s  inserted={result.inserted} "
+                      f"duplicates={result.duplicates} skipped={result.skipped}")
+                expected = lines if attempt == "first" else 0
+                if result.parsed != lines or result.inserted != expected:
+                    raise SystemExit(f"Unexpected result for {format} ({attempt}): {result}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite+aiosqlite:///bench_statement_import.db")
+    parser.add_argument("--lines", type=int, default=50_000)
+    parser.add_argument("--formats", nargs="+", choices=sorted(STATEMENTS), default=sorted(STATEMENTS))
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.lines, args.formats))
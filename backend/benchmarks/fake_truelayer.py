@@ -0,0 +1,175 @@
+"""TrueLayer local para pruebas y benchmarks de sincronización.
+
+Sirve los endpoints que usa accounts_service (token, cuentas, saldo y
+transacciones) con un volumen de datos, una latencia y una tasa de errores
+configurables. Los datos son deterministas: cada código de autorización es un
+usuario distinto, y volver a sincronizar devuelve las mismas transacciones.
+
+En proceso, sin red (como hace bench_sync):
+
+    app = create_app(FakeTrueLayerConfig(accounts=10, transactions=5000))
+    await http_client.start_http_client(transport=httpx.ASGITransport(app=app))
+
+Como servidor aparte (desde backend/), apuntando la API a él:
+
+    python -m benchmarks.fake_truelayer --port 9000 --accounts 10 --transactions 5000
+    TRUELAYER_AUTH_URL=http://localhost:9000 TRUELAYER_API_URL=http://localhost:9000 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import math
+import random
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+
+MERCHANTS = ("TESCO STORES", "SAINSBURYS", "AMAZON MARKETPLACE", "TFL TRAVEL", "PRET A MANGER",
+             "NETFLIX", "SHELL", "BOOTS", "UBER", "COSTA COFFEE")
+
+
+@dataclass
+class FakeTrueLayerConfig:
+    accounts: int = 10
+    # Transacciones por cuenta, repartidas uniformemente en los últimos history_days días
+    transactions: int = 5000
+    history_days: int = 30
+    latency_ms: float = 0.0
+    # Fracción de peticiones de datos que fallan (mitad 503, mitad 429 con Retry-After: 0)
+    error_rate: float = 0.0
+    expires_in: int = 3600
+    seed: int = 42
+
+
+def _user_from_token(authorization: Optional[str]) -> Optional[str]:
+    if not authorization or not authorization.startswith("Bearer access-"):
+        return None
+    return authorization[len("Bearer access-"):]
+
+
+def create_app(config: FakeTrueLayerConfig = FakeTrueLayerConfig()) -> FastAPI:
+    app = FastAPI(title="Fake TrueLayer")
+    rng = random.Random(config.seed)
+    # Fijo al crear la app: todas las sincronizaciones ven las mismas marcas de tiempo
+    end = datetime.now(timezone.utc).replace(microsecond=0)
+    start = end - timedelta(days=config.history_days)
+    step = (end - start) / max(config.transactions, 1)
+    app.state.counters = Counter()
+
+    async def simulate(route: str) -> Optional[JSONResponse]:
+        app.state.counters[route] += 1
+        if config.latency_ms:
+            await asyncio.sleep(config.latency_ms / 1000)
+        if config.error_rate and route != "token" and rng.random() < config.error_rate:
+            app.state.counters["errors_injected"] += 1
+            if rng.random() < 0.5:
+                return JSONResponse({"error": "service_unavailable"}, status_code=503)
+            return JSONResponse({"error": "rate_limited"}, status_code=429, headers={"Retry-After": "0"})
+        return None
+
+    def unauthorized() -> JSONResponse:
+        return JSONResponse({"error": "invalid_token"}, status_code=401)
+
+    @app.post("/connect/token")
+    async def token(request: Request):
+        await simulate("token")
+        # Cuerpo urlencoded leído a mano: Form() exigiría python-multipart
+        form = {key: values[0] for key, values in parse_qs((await request.body()).decode()).items()}
+        grant_type, code, refresh_token = form.get("grant_type"), form.get("code"), form.get("refresh_token")
+        if grant_type == "authorization_code" and code:
+            user = code
+        elif grant_type == "refresh_token" and refresh_token and refresh_token.startswith("refresh-"):
+            user = refresh_token[len("refresh-"):]
+        else:
+            return JSONResponse({"error": "invalid_grant"}, status_code=400)
+        return {
+            "access_token": f"access-{user}",
+            "refresh_token": f"refresh-{user}",
+            "expires_in": config.expires_in,
+            "token_type": "Bearer",
+        }
+
+    @app.get("/data/v1/accounts")
+    async def accounts(authorization: Optional[str] = Header(None)):
+        failure = await simulate("accounts")
+        if failure:
+            return failure
+        user = _user_from_token(authorization)
+        if user is None:
+            return unauthorized()
+        return {"results": [
+            {
+                "account_id": f"{user}-acc-{i}",
+                "account_type": "TRANSACTION",
+                "display_name": f"Current account {i}",
+                "currency": "GBP",
+                "provider": {"display_name": "Mock Bank"},
+            }
+            for i in range(config.accounts)
+        ]}
+
+    @app.get("/data/v1/accounts/{account_id}/balance")
+    async def balance(account_id: str, authorization: Optional[str] = Header(None)):
+        failure = await simulate("balance")
+        if failure:
+            return failure
+        if _user_from_token(authorization) is None:
+            return unauthorized()
+        return {"results": [{"currency": "GBP", "current": 1000 + len(account_id), "available": 1000}]}
+
+    @app.get("/data/v1/accounts/{account_id}/transactions")
+    async def transactions(account_id: str, request: Request, authorization: Optional[str] = Header(None)):
+        failure = await simulate("transactions")
+        if failure:
+            return failure
+        if _user_from_token(authorization) is None:
+            return unauthorized()
+        # from/to son fechas (YYYY-MM-DD); "to" incluye el día entero
+        window_from = datetime.fromisoformat(request.query_params.get("from", start.date().isoformat())).replace(tzinfo=timezone.utc)
+        window_to = datetime.fromisoformat(request.query_params.get("to", end.date().isoformat())).replace(tzinfo=timezone.utc) + timedelta(days=1)
+        first = max(0, math.ceil((window_from - start) / step))
+        last = min(config.transactions, math.ceil((window_to - start) / step))
+        results = []
+        for i in range(first, last):
+            merchant = MERCHANTS[i % len(MERCHANTS)]
+            amount = 2500.0 if i % 40 == 0 else -round(1 + (i * 7919 % 12000) / 100, 2)
+            results.append({
+                "transaction_id": f"{account_id}-tx-{i}",
+                "timestamp": (start + step * i).isoformat(),
+                "description": f"CARD PAYMENT TO {merchant}" if amount < 0 else "SALARY",
+                "amount": amount,
+                "currency": "GBP",
+                "transaction_type": "DEBIT" if amount < 0 else "CREDIT",
+                "transaction_category": "PURCHASE" if amount < 0 else "CREDIT",
+                "merchant_name": merchant if amount < 0 else None,
+            })
+        app.state.counters["transactions_served"] += len(results)
+        return {"results": results}
+
+    @app.get("/_stats")
+    async def stats():
+        return dict(app.state.counters)
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--accounts", type=int, default=FakeTrueLayerConfig.accounts)
+    parser.add_argument("--transactions", type=int, default=FakeTrueLayerConfig.transactions)
+    parser.add_argument("--history-days", type=int, default=FakeTrueLayerConfig.history_days)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(FakeTrueLayerConfig(
+        accounts=args.accounts, transactions=args.transactions, history_days=args.history_days,
+        latency_ms=args.latency_ms, error_rate=args.error_rate
+    )), host=args.host, port=args.port)
@@ -0,0 +1,14 @@
+"""Pruebas de carga de la API con datos sintéticos, sin servicios externos.
+
+    seed     genera usuarios, cuentas, grupos, categorías, presupuestos y años de transacciones
+    auth     sustituye la verificación de Firebase por tokens locales "bench:<uid>"
+    serve    arranca la API con uvicorn y la autenticación local (para medir un servidor real)
+    driver   lanza la carga y mide throughput y p50/p95/p99 por ruta
+    results  formato JSON de resultados y comparación entre dos ejecuciones
+
+Uso (desde backend/), con SQLite o con un PostgreSQL local:
+
+    python -m benchmarks.load.seed --url sqlite:///bench_api.db --users 20 --years 3
+    python -m benchmarks.load.driver --url sqlite:///bench_api.db --duration 30 --output before.json
+    python -m benchmarks.load.results before.json after.json
+"""
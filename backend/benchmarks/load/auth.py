@@ -0,0 +1,55 @@
+"""Autenticación local para las pruebas de carga: tokens "bench:<uid>" en lugar de ID tokens de Firebase.
+
+install_auth_stub() sustituye solo la verificación criptográfica
+(firebase_admin.auth.verify_id_token) tal y como la ve app.core.firebase: el
+resto del camino (HTTPBearer, get_current_user, la caché de tokens) sigue
+siendo el de producción, y las rutas de auth.py que llaman a
+get_current_user directamente también quedan cubiertas. Solo para benchmarks:
+nunca se instala desde la aplicación.
+"""
+import time
+
+BENCH_TOKEN_PREFIX = "bench:"
+# Validez de los claims generados; la caché de tokens los guarda hasta exp - margen
+TOKEN_LIFETIME = 3600
+
+
+def bench_token(uid: str) -> str:
+    return f"{BENCH_TOKEN_PREFIX}{uid}"
+
+
+def auth_headers(uid: str) -> dict:
+    return {"Authorization": f"Bearer {bench_token(uid)}"}
+
+
+class StubFirebaseAuth:
+    """Drop-in for the firebase_admin.auth calls app.core.firebase makes."""
+
+    def __init__(self):
+        self.verifications = 0
+
+    def verify_id_token(self, token: str, check_revoked: bool = False, **kwargs) -> dict:
+        if not token.startswith(BENCH_TOKEN_PREFIX) or len(token) == len(BENCH_TOKEN_PREFIX):
+            raise ValueError("Not a benchmark token")
+        self.verifications += 1
+        uid = token[len(BENCH_TOKEN_PREFIX):]
+        now = int(time.time())
+        return {
+            "uid": uid,
+            "user_id": uid,
+            # Mismo correo que genera benchmarks.load.seed: /me y /register encuentran al usuario
+            "email": f"{uid}@example.com",
+            "name": uid,
+            "iat": now,
+            "exp": now + TOKEN_LIFETIME,
+        }
+
+
+def install_auth_stub() -> StubFirebaseAuth:
+    """Make app.core.firebase accept bench tokens. Returns the stub (it counts verifications)."""
+    from app.core import firebase
+
+    stub = StubFirebaseAuth()
+    firebase.auth = stub
+    firebase.token_cache.clear()
+    return stub
@@ -0,0 +1,152 @@
+"""Formato de resultados de las pruebas de carga y comparación entre dos ejecuciones.
+
+Cada ejecución del driver escribe un JSON con claves ordenadas e indentado,
+pensado para guardarlo junto al commit medido y comparar con diff o con:
+
+    python -m benchmarks.load.results before.json after.json
+    python -m benchmarks.load.results before.json after.json --fail-above 10
+
+que muestra por ruta la variación de throughput y p50/p95/p99 y, con
+--fail-above, termina con error si el throughput o algún percentil empeora más
+de ese %.
+
+    {
+      "format": 1,
+      "started_at": "2026-10-18T10:00:00+00:00",
+      "git": {"commit": "…", "dirty": false},
+      "environment": {"python": "3.11.9", "platform": "Linux-…", "database": "sqlite"},
+      "dataset": {"users": 10, "accounts": 20, "transactions": 87000, …},
+      "config": {"concurrency": 20, "duration": 30.0, "mix": "read", "target": "in-process", …},
+      "totals": {"requests": 12000, "errors": 0, "seconds": 30.0, "throughput": 400.0, …},
+      "routes": {"GET /accounts": {"requests": 900, "errors": 0, "status": {"200": 900},
+                                   "throughput": 30.0, "mean_ms": 4.1, "p50_ms": 3.8,
+                                   "p95_ms": 7.2, "p99_ms": 11.5, "max_ms": 20.3}, …}
+    }
+"""
+import argparse
+import json
+import math
+import platform
+import subprocess
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+FORMAT_VERSION = 1
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], statuses: Counter, errors: int, seconds: float) -> dict:
+    """Per-route (or total) summary; latencies in seconds, reported in milliseconds."""
+    values = sorted(latencies)
+    summary = {
+        "requests": len(values),
+        "errors": errors,
+        "status": {str(status): count for status, count in sorted(statuses.items(), key=lambda item: str(item[0]))},
+        "throughput": round(len(values) / seconds, 2) if seconds else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = round(percentile(values, p) * 1000, 3)
+    return summary
+
+
+def git_info() -> dict:
+    def git(*args) -> Optional[str]:
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    commit = git("rev-parse", "HEAD")
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": commit, "dirty": bool(status) if status is not None else None}
+
+
+def build_result(started_at: datetime, database: str, dataset: dict, config: dict, totals: dict,
+                 routes: Dict[str, dict]) -> dict:
+    return {
+        "format": FORMAT_VERSION,
+        "started_at": started_at.astimezone(timezone.utc).isoformat(timespec="seconds"),
+        "git": git_info(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": database,
+        },
+        "dataset": dataset,
+        "config": config,
+        "totals": totals,
+        "routes": routes,
+    }
+
+
+def write_result(result: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_result(path: str) -> dict:
+    with open(path) as f:
+        result = json.load(f)
+    if result.get("format") != FORMAT_VERSION:
+        raise SystemExit(f"{path}: unsupported result format {result.get('format')!r}")
+    return result
+
+
+def _change(before: float, after: float) -> Optional[float]:
+    if not before:
+        return None
+    return (after - before) / before * 100
+
+
+def compare(before: dict, after: dict, fail_above: Optional[float] = None) -> List[str]:
+    """Print the per-route comparison; return the regressions above fail_above (in %)."""
+    metrics = ["throughput"] + [f"p{p}_ms" for p in PERCENTILES]
+    print(f"before {before['git'].get('commit') or '?'}  ({before['started_at']})")
+    print(f"after  {after['git'].get('commit') or '?'}  ({after['started_at']})")
+    if before["dataset"] != after["dataset"] or before["config"] != after["config"]:
+        print("warning: dataset or load configuration differ between the runs")
+    print(f"{'route':44} " + " ".join(f"{metric:>28}" for metric in metrics))
+
+    regressions = []
+    rows = [("TOTAL", before["totals"], after["totals"])] + [
+        (route, before["routes"].get(route), after["routes"].get(route))
+        for route in sorted(set(before["routes"]) | set(after["routes"]))
+    ]
+    for route, old, new in rows:
+        if old is None or new is None:
+            print(f"{route:44} only in {'after' if old is None else 'before'}")
+            continue
+        cells = []
+        for metric in metrics:
+            change = _change(old[metric], new[metric])
+            cells.append(f"{old[metric]:>9.1f} → {new[metric]:>9.1f}" + (f" {change:+5.0f}%" if change is not None else "       "))
+            # Para el throughput empeorar es bajar; para las latencias, subir
+            worse = -change if metric == "throughput" and change is not None else change
+            if fail_above is not None and worse is not None and worse > fail_above:
+                regressions.append(f"{route} {metric} {change:+.1f}%")
+        print(f"{route:44} " + " ".join(f"{cell:>28}" for cell in cells))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--fail-above", type=float, help="salir con error si algo empeora más de este %%")
+    args = parser.parse_args()
+    regressions = compare(load_result(args.before), load_result(args.after), args.fail_above)
+    if regressions:
+        print("Regressions:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
@@ -0,0 +1,41 @@
+"""Arranca la API con uvicorn contra la base de datos sembrada y la autenticación local.
+
+Sirve para medir un servidor real (workers de uvicorn, red local) en lugar
+de la app en proceso que usa el driver por defecto:
+
+    python -m benchmarks.load.serve --url sqlite:///bench_api.db --port 8001
+    python -m benchmarks.load.driver --url sqlite:///bench_api.db --base-url http://127.0.0.1:8001
+
+Acepta tokens "bench:<uid>"; nunca se debe exponer fuera de la máquina local.
+"""
+import argparse
+import logging
+import os
+
+
+def configure(url: str, log_level: str):
+    """Point the app at `url` and silence per-request logging. Must run before importing app.main."""
+    os.environ["DATABASE_URL"] = url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    # El scheduler llamaría a TrueLayer: las pruebas de carga no usan servicios externos
+    os.environ["SYNC_SCHEDULER_ENABLED"] = "false"
+    # El registro por petición (INFO/DEBUG) dominaría las latencias medidas
+    logging.disable(logging.getLevelName(log_level.upper()) - 10)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///bench_api.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+    configure(args.url, args.log_level)
+
+    from app.main import app
+    from benchmarks.load.auth import install_auth_stub
+
+    install_auth_stub()
+    uvicorn.run(app, host=args.host, port=args.port, log_level=args.log_level, access_log=False)
@@ -0,0 +1,64 @@
+"""Comandos de mantenimiento del backend.
+
+Uso (desde backend/):
+
+    python manage.py rebuild-spend [--user USER_ID]
+    python manage.py sync-worker [--once]
+"""
+import argparse
+import asyncio
+import signal
+
+from app.core import http_client
+from app.database import SessionLocal, async_engine
+from app.services import spend_service
+from app.services.sync_scheduler import scheduler
+
+
+def rebuild_spend(args):
+    with SessionLocal() as db:
+        written = spend_service.rebuild_spend_aggregates(db, args.user)
+    print(f"Rebuilt {written} category_spend rows")
+
+
+async def _sync_worker(once: bool):
+    await http_client.start_http_client()
+    try:
+        if once:
+            synced = await scheduler.run_once()
+            print(f"Synced {synced} accounts")
+            return
+        scheduler.start()
+        loop = asyncio.get_running_loop()
+        stopped = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stopped.set)
+        await stopped.wait()
+    finally:
+        await scheduler.stop()
+        await http_client.close_http_client()
+        await async_engine.dispose()
+
+
+def sync_worker(args):
+    asyncio.run(_sync_worker(args.once))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto Fácil maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-spend", help="Recompute category_spend from transactions")
+    rebuild.add_argument("--user", help="Only rebuild this user's aggregates (Firebase uid)")
+    rebuild.set_defaults(handler=rebuild_spend)
+
+    worker = commands.add_parser("sync-worker", help="Keep linked accounts synced in the background")
+    worker.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    worker.set_defaults(handler=sync_worker)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
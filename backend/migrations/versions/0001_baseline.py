@@ -0,0 +1,119 @@
+"""Esquema inicial (tablas existentes antes de introducir migraciones)
+
+Las bases de datos creadas antes de las migraciones ya tienen estas tablas:
+márcalas con `alembic stamp 0001` y después ejecuta `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("full_name", sa.String(255)),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("firebase_uid", sa.String(255), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_firebase_uid", "users", ["firebase_uid"], unique=True)
+
+    op.create_table(
+        "accounts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.firebase_uid")),
+        sa.Column("account_id", sa.String()),
+        sa.Column("account_type", sa.String()),
+        sa.Column("account_name", sa.String()),
+        sa.Column("balance", sa.Float()),
+        sa.Column("currency", sa.String()),
+        sa.Column("institution_name", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_accounts_id", "accounts", ["id"])
+    op.create_index("ix_accounts_account_id", "accounts", ["account_id"], unique=True)
+
+    op.create_table(
+        "category_groups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.firebase_uid"), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_category_groups_id", "category_groups", ["id"])
+
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("type", sa.String()),
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("category_groups.id")),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.firebase_uid"), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_categories_id", "categories", ["id"])
+
+    op.create_table(
+        "budgets",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id"), nullable=False),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.firebase_uid"), nullable=False),
+        sa.Column("estimated_amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("assigned_amount", sa.Numeric(10, 2)),
+        sa.Column("spent_amount", sa.Numeric(10, 2)),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("period_end", sa.Date(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_budgets_id", "budgets", ["id"])
+
+    op.create_table(
+        "transactions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("account_id", sa.String(), sa.ForeignKey("accounts.account_id")),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.firebase_uid"), nullable=False),
+        sa.Column("transaction_id", sa.String()),
+        sa.Column("amount", sa.Float()),
+        sa.Column("currency", sa.String()),
+        sa.Column("description", sa.String()),
+        sa.Column("transaction_type", sa.String()),
+        sa.Column("transaction_category", sa.String()),
+        sa.Column("timestamp", sa.DateTime()),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id"), nullable=True),
+    )
+    op.create_index("ix_transactions_id", "transactions", ["id"])
+    op.create_index("ix_transactions_transaction_id", "transactions", ["transaction_id"], unique=True)
+
+    op.create_table(
+        "ready_to_assign",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.String(255), sa.ForeignKey("users.firebase_uid"), nullable=False, unique=True),
+        sa.Column("amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_ready_to_assign_id", "ready_to_assign", ["id"])
+
+
+def downgrade():
+    op.drop_table("ready_to_assign")
+    op.drop_table("transactions")
+    op.drop_table("budgets")
+    op.drop_table("categories")
+    op.drop_table("category_groups")
+    op.drop_table("accounts")
+    op.drop_table("users")
@@ -0,0 +1,28 @@
+"""Marcas de sincronización incremental por cuenta
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "account_sync_states",
+        sa.Column("account_id", sa.String(), sa.ForeignKey("accounts.account_id"), primary_key=True),
+        sa.Column("last_synced_at", sa.DateTime(), nullable=True),
+        sa.Column("latest_transaction_at", sa.DateTime(), nullable=True),
+        sa.Column("backfilled_from", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("account_sync_states")
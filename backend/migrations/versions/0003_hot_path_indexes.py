@@ -0,0 +1,40 @@
+"""Índices compuestos para las consultas más frecuentes de los routers
+
+En PostgreSQL los índices se crean con CREATE INDEX CONCURRENTLY para no
+bloquear escrituras al aplicarlos sobre una base de datos en uso.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_transactions_user_timestamp_id", "transactions", ["user_id", "timestamp", "id"]),
+    ("ix_transactions_user_account_timestamp_id", "transactions", ["user_id", "account_id", "timestamp", "id"]),
+    ("ix_transactions_user_category_timestamp_id", "transactions", ["user_id", "category_id", "timestamp", "id"]),
+    ("ix_transactions_account_timestamp", "transactions", ["account_id", "timestamp"]),
+    ("ix_budgets_user_category_period", "budgets", ["user_id", "category_id", "period_start", "period_end"]),
+    ("ix_categories_user_id", "categories", ["user_id"]),
+    ("ix_category_groups_user_id", "category_groups", ["user_id"]),
+    ("ix_accounts_user_id", "accounts", ["user_id"]),
+]
+
+
+def upgrade():
+    # CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
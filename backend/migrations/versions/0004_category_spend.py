@@ -0,0 +1,43 @@
+"""Tabla agregada de gasto por usuario, categoría y mes
+
+Se rellena a partir de las transacciones existentes; después se mantiene
+en cada escritura. `python manage.py rebuild-spend` la recalcula si hiciera falta.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "category_spend",
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.firebase_uid"), primary_key=True),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id"), primary_key=True),
+        sa.Column("month", sa.Date(), primary_key=True),
+        sa.Column("spent", sa.Numeric(12, 2), nullable=False),
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        month = "date_trunc('month', timestamp)::date"
+    else:
+        month = "date(timestamp, 'start of month')"
+    op.execute(f"""
+        INSERT INTO category_spend (user_id, category_id, month, spent)
+        SELECT user_id, category_id, {month}, -SUM(amount)
+        FROM transactions
+        WHERE category_id IS NOT NULL AND amount < 0 AND timestamp IS NOT NULL
+        GROUP BY user_id, category_id, {month}
+    """)
+
+
+def downgrade():
+    op.drop_table("category_spend")
@@ -0,0 +1,41 @@
+"""Reglas de categorización automática y merchant_name en transacciones
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("transactions", sa.Column("merchant_name", sa.String(), nullable=True))
+    op.create_table(
+        "categorization_rules",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.firebase_uid"), nullable=False),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id"), nullable=False),
+        sa.Column("match_type", sa.String(), nullable=False),
+        sa.Column("pattern", sa.String(), nullable=True),
+        sa.Column("min_amount", sa.Float(), nullable=True),
+        sa.Column("max_amount", sa.Float(), nullable=True),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_categorization_rules_id", "categorization_rules", ["id"])
+    op.create_index("ix_categorization_rules_user_id", "categorization_rules", ["user_id"])
+
+
+def downgrade():
+    op.drop_index("ix_categorization_rules_user_id", table_name="categorization_rules")
+    op.drop_index("ix_categorization_rules_id", table_name="categorization_rules")
+    op.drop_table("categorization_rules")
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.drop_column("merchant_name")
@@ -0,0 +1,27 @@
+"""Versiones de datos por usuario y recurso para los ETag de los listados
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "data_versions",
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.firebase_uid"), primary_key=True),
+        sa.Column("resource", sa.String(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("data_versions")
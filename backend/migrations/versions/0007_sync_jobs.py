@@ -0,0 +1,50 @@
+"""Trabajos de sincronización en segundo plano y su progreso por cuenta
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "sync_jobs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.firebase_uid"), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_sync_jobs_user_id", "sync_jobs", ["user_id"])
+    op.create_table(
+        "sync_job_accounts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("job_id", sa.String(), sa.ForeignKey("sync_jobs.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("account_id", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("inserted", sa.Integer(), nullable=False),
+        sa.Column("updated", sa.Integer(), nullable=False),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_sync_job_accounts_id", "sync_job_accounts", ["id"])
+    op.create_index("ix_sync_job_accounts_job_id", "sync_job_accounts", ["job_id"])
+
+
+def downgrade():
+    op.drop_index("ix_sync_job_accounts_job_id", table_name="sync_job_accounts")
+    op.drop_index("ix_sync_job_accounts_id", table_name="sync_job_accounts")
+    op.drop_table("sync_job_accounts")
+    op.drop_index("ix_sync_jobs_user_id", table_name="sync_jobs")
+    op.drop_table("sync_jobs")
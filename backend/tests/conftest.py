@@ -0,0 +1,48 @@
+import os
+import tempfile
+import uuid
+
+import pytest
+
+# Los motores se crean al importar app.database: la configuración tiene que ir antes de cualquier import de app.
+# Un fichero SQLite (y no ":memory:") para que el motor síncrono, el asíncrono y los hilos del TestClient vean los mismos datos
+_db_dir = tempfile.mkdtemp(prefix="presupuesto-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_db_dir, 'test.db')}")
+os.environ.setdefault("SYNC_SCHEDULER_ENABLED", "false")
+# Clave fija solo para los tests; en producción viene del entorno
+os.environ.setdefault("TOKEN_ENCRYPTION_KEYS", "AAECAwQFBgcICQoLDA0ODxAREhMUFRYXGBkaGxwdHh8=")
+
+
+@pytest.fixture
+def db():
+    from app.database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def user():
+    # Un uid distinto por test: la caché de lecturas es del proceso y sobrevive entre tests
+    uid = f"user-{uuid.uuid4().hex[:12]}"
+    return {"uid": uid, "email": f"{uid}@example.com"}
+
+
+@pytest.fixture
+def client(db, user):
+    from fastapi.testclient import TestClient
+
+    from app.core.firebase import get_current_user
+    from app.main import app
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        with TestClient(app) as test_client:
+            yield test_client
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
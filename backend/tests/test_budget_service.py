@@ -0,0 +1,95 @@
+import random
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from app.models import Budget
+from app.services.budget_service import add_budget_delta, apply_budget_deltas, budget_spend_statement
+
+USER_ID = "budget-user"
+
+
+def budget(db, category_id, period_start, period_end, spent="0.00", user_id=USER_ID):
+    row = Budget(category_id=category_id, user_id=user_id, estimated_amount=Decimal("100.00"),
+                 assigned_amount=Decimal("0.00"), spent_amount=Decimal(spent),
+                 period_start=period_start, period_end=period_end)
+    db.add(row)
+    db.flush()
+    return row
+
+
+def spent(db, row) -> Decimal:
+    db.refresh(row)
+    return Decimal(row.spent_amount)
+
+
+def naive_spent(budgets, deltas):
+    """Presupuesto a presupuesto, como el bucle de SELECT + UPDATE anterior."""
+    return {
+        row.id: Decimal(row.spent_amount) + sum(
+            (delta for (category_id, day), delta in deltas.items()
+             if category_id == row.category_id and row.period_start <= day <= row.period_end),
+            Decimal("0")
+        )
+        for row in budgets
+    }
+
+
+def test_statement_is_skipped_when_the_deltas_cancel_out():
+    deltas = {}
+    add_budget_delta(deltas, 1, -20.0, datetime(2025, 6, 10), sign=-1)
+    add_budget_delta(deltas, 1, -20.0, datetime(2025, 6, 10))
+    assert budget_spend_statement(USER_ID, deltas) is None
+
+
+def test_moving_a_transaction_between_categories(db):
+    june_food = budget(db, 1, date(2025, 6, 1), date(2025, 6, 30), spent="-20.00")
+    june_rent = budget(db, 2, date(2025, 6, 1), date(2025, 6, 30))
+    july_food = budget(db, 1, date(2025, 7, 1), date(2025, 7, 31), spent="-5.00")
+
+    deltas = {}
+    add_budget_delta(deltas, 1, -20.0, datetime(2025, 6, 10, 9, 30), sign=-1)
+    add_budget_delta(deltas, 2, -20.0, datetime(2025, 6, 10, 9, 30))
+    updated = dict(apply_budget_deltas(db, USER_ID, deltas))
+
+    assert updated == {june_food.id: Decimal("0.00"), june_rent.id: Decimal("-20.00")}
+    assert spent(db, july_food) == Decimal("-5.00")
+
+
+def test_changing_the_amount_applies_only_the_difference(db):
+    june_food = budget(db, 1, date(2025, 6, 1), date(2025, 6, 30), spent="-20.00")
+
+    deltas = {}
+    add_budget_delta(deltas, 1, -20.0, datetime(2025, 6, 10), sign=-1)
+    add_budget_delta(deltas, 1, -35.5, datetime(2025, 6, 10))
+    assert apply_budget_deltas(db, USER_ID, deltas) == [(june_food.id, Decimal("-35.50"))]
+
+
+def test_only_the_users_budgets_are_updated(db):
+    mine = budget(db, 1, date(2025, 6, 1), date(2025, 6, 30))
+    theirs = budget(db, 1, date(2025, 6, 1), date(2025, 6, 30), user_id="someone-else")
+
+    deltas = {}
+    add_budget_delta(deltas, 1, -12.0, datetime(2025, 6, 3))
+    assert [budget_id for budget_id, _ in apply_budget_deltas(db, USER_ID, deltas)] == [mine.id]
+    assert spent(db, theirs) == Decimal("0.00")
+
+
+def test_matches_per_budget_reference(db):
+    rng = random.Random(7)
+    budgets = [
+        budget(db, category_id, date(2025, month, 1), date(2025, month, 28), spent=f"{rng.randint(-500, 0)}.00")
+        for category_id in range(1, 5) for month in range(1, 7)
+    ]
+    deltas = {}
+    for _ in range(200):
+        # Los días 29-31 y la categoría 5 quedan fuera de todos los presupuestos y no deben contar
+        day = datetime(2025, rng.randint(1, 6), 1) + timedelta(days=rng.randint(0, 30))
+        add_budget_delta(deltas, rng.randint(1, 5), round(rng.uniform(-80, 40), 2), day, sign=rng.choice((1, -1)))
+    expected = naive_spent(budgets, deltas)
+
+    updated = dict(apply_budget_deltas(db, USER_ID, deltas))
+
+    for row in budgets:
+        assert spent(db, row) == expected[row.id]
+        if row.id in updated:
+            assert updated[row.id] == expected[row.id]
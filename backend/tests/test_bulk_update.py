@@ -0,0 +1,64 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from app.database import SessionLocal
+from app.models import Budget, Category, TransactionModel
+from app.services import spend_service
+
+
+def test_bulk_update_reports_each_item_and_commits_once(client, db, user):
+    uid = user["uid"]
+    food = Category(name="Food", user_id=uid)
+    rent = Category(name="Rent", user_id=uid)
+    foreign = Category(name="Not mine", user_id="someone-else")
+    db.add_all([food, rent, foreign])
+    db.flush()
+    db.add_all([
+        Budget(category_id=food.id, user_id=uid, estimated_amount=Decimal("100.00"), spent_amount=Decimal("-20.00"),
+               period_start=date(2025, 6, 1), period_end=date(2025, 6, 30)),
+        Budget(category_id=rent.id, user_id=uid, estimated_amount=Decimal("100.00"), spent_amount=Decimal("0.00"),
+               period_start=date(2025, 6, 1), period_end=date(2025, 6, 30)),
+        TransactionModel(user_id=uid, transaction_id="tx-move", amount=-20.0, category_id=food.id,
+                         timestamp=datetime(2025, 6, 10)),
+        TransactionModel(user_id=uid, transaction_id="tx-foreign", amount=-7.0, category_id=None,
+                         timestamp=datetime(2025, 6, 11)),
+        TransactionModel(user_id="someone-else", transaction_id="tx-other-user", amount=-3.0,
+                         category_id=None, timestamp=datetime(2025, 6, 12)),
+    ])
+    db.commit()
+    spend_service.rebuild_spend_aggregates(db, uid)
+
+    commits = []
+    record = lambda session: commits.append(session)
+    event.listen(SessionLocal, "after_commit", record)
+    try:
+        response = client.post("/transactions/bulk-update", json={"items": [
+            {"transaction_id": "tx-move", "category_id": rent.id},
+            {"transaction_id": "tx-missing", "category_id": rent.id},
+            {"transaction_id": "tx-foreign", "category_id": foreign.id},
+            {"transaction_id": "tx-other-user", "category_id": rent.id},
+        ]})
+    finally:
+        event.remove(SessionLocal, "after_commit", record)
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [(item["transaction_id"], item["status"]) for item in results] == [
+        ("tx-move", "updated"),
+        ("tx-missing", "not_found"),
+        ("tx-foreign", "invalid_category"),
+        ("tx-other-user", "not_found"),
+    ]
+    assert results[0]["transaction"]["category_id"] == rent.id
+    assert len(commits) == 1
+
+    db.expire_all()
+    transactions = {t.transaction_id: t for t in db.query(TransactionModel)}
+    assert transactions["tx-move"].category_id == rent.id
+    assert transactions["tx-foreign"].category_id is None
+    assert transactions["tx-other-user"].category_id is None
+    budgets = {b.category_id: Decimal(b.spent_amount) for b in db.query(Budget)}
+    assert budgets == {food.id: Decimal("0.00"), rent.id: Decimal("-20.00")}
+    assert spend_service.get_spent_by_category(db, uid, date(2025, 6, 1)) == {rent.id: 20.0}
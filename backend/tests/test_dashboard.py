@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.mark.parametrize("period", ["2025-13", "2025-00"])
+def test_dashboard_with_invalid_period_is_a_400(client, period):
+    response = client.get("/dashboard", params={"period": period})
+    assert response.status_code == 400
+
+
+def test_dashboard_with_valid_period_is_ok(client):
+    assert client.get("/dashboard", params={"period": "2025-02"}).status_code == 200
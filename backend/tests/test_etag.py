@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from app.core.read_cache import read_cache
+from app.models import Category, TransactionModel
+from app.services import version_service
+
+
+def test_categories_etag_changes_once_a_write_commits(client, user):
+    first = client.get("/categories/")
+    assert first.status_code == 200
+    assert first.json() == []
+    etag = first.headers["etag"]
+
+    assert client.get("/categories/", headers={"If-None-Match": etag}).status_code == 304
+
+    assert client.post("/categories/", json={"name": "Food"}).status_code == 200
+
+    # La escritura invalida la entrada cacheada: ni 304 con el ETag viejo ni la lista vieja
+    after = client.get("/categories/", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["etag"] != etag
+    assert [category["name"] for category in after.json()] == ["Food"]
+    assert client.get("/categories/", headers={"If-None-Match": after.headers["etag"]}).status_code == 304
+
+
+def test_cached_read_is_dropped_on_commit_and_kept_on_rollback(db, user):
+    uid = user["uid"]
+    key = read_cache.key(uid, version_service.CATEGORIES)
+    read_cache.put(key, read_cache.lookup(uid, version_service.CATEGORIES).generation, 'W/"old"', b"[]")
+    assert read_cache.lookup(uid, version_service.CATEGORIES).hit
+
+    db.add(Category(name="Rolled back", user_id=uid))
+    version_service.bump(db, uid, version_service.CATEGORIES)
+    # Hasta el commit la entrada sigue siendo válida para los demás lectores
+    assert read_cache.lookup(uid, version_service.CATEGORIES).hit
+    db.rollback()
+    assert read_cache.lookup(uid, version_service.CATEGORIES).hit
+
+    db.add(Category(name="Committed", user_id=uid))
+    version_service.bump(db, uid, version_service.CATEGORIES)
+    db.commit()
+    assert not read_cache.lookup(uid, version_service.CATEGORIES).hit
+
+
+def test_spent_etag_changes_after_a_transaction_is_recategorized(client, db, user):
+    uid = user["uid"]
+    food = Category(name="Food", user_id=uid)
+    rent = Category(name="Rent", user_id=uid)
+    db.add_all([food, rent])
+    db.commit()
+    assert client.post("/transactions/", json={
+        "transaction_id": "tx-1", "account_id": "acc-1", "amount": -12.5, "currency": "GBP",
+        "description": "Shop", "transaction_type": "DEBIT", "transaction_category": "PURCHASE",
+        "timestamp": datetime(2025, 6, 10).isoformat(), "category_id": food.id,
+    }).status_code == 200
+
+    before = client.get("/categories/spent", params={"period": "2025-06"})
+    assert before.json() == {str(food.id): 12.5}
+    etag = before.headers["etag"]
+
+    assert client.put("/transactions/tx-1", json={"category_id": rent.id}).status_code == 200
+
+    after = client.get("/categories/spent", params={"period": "2025-06"}, headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["etag"] != etag
+    assert after.json() == {str(rent.id): 12.5}
+    assert db.query(TransactionModel).count() == 1
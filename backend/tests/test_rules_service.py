@@ -0,0 +1,72 @@
+import random
+import re
+from types import SimpleNamespace
+
+from app.services.rules_service import CompiledRules, categorize_rows
+
+
+def rule(id, category_id, match_type, pattern=None, min_amount=None, max_amount=None, priority=100):
+    return SimpleNamespace(id=id, category_id=category_id, match_type=match_type, pattern=pattern,
+                           min_amount=min_amount, max_amount=max_amount, priority=priority)
+
+
+def naive_match(rules, description, merchant_name, transaction_category, amount):
+    """Regla a regla, como antes del matcher compilado."""
+    best = None
+    for r in rules:
+        if r.match_type == "description_contains":
+            matched = bool(description) and r.pattern.lower() in description.lower()
+        elif r.match_type == "description_regex":
+            matched = bool(description) and re.search(r.pattern, description, re.IGNORECASE) is not None
+        elif r.match_type == "merchant":
+            matched = bool(merchant_name) and merchant_name.strip().lower() == r.pattern.strip().lower()
+        elif r.match_type == "transaction_category":
+            matched = bool(transaction_category) and transaction_category.strip().upper() == r.pattern.strip().upper()
+        else:
+            matched = True
+        if matched and (r.min_amount is not None or r.max_amount is not None):
+            matched = amount is not None and (r.min_amount is None or amount >= r.min_amount) \
+                and (r.max_amount is None or amount <= r.max_amount)
+        if matched and (best is None or (r.priority, r.id) < (best.priority, best.id)):
+            best = r
+    return best.category_id if best else None
+
+
+def test_bounded_regex_miss_does_not_hide_lower_priority_rule():
+    rules = [
+        rule(1, 10, "description_regex", r"\d+", min_amount=0, priority=1),
+        rule(2, 20, "description_regex", r"[a-z]{2}", priority=2),
+    ]
+    assert CompiledRules(rules).match("ab 12", None, None, -5.0) == 20
+    assert CompiledRules(rules).match("ab 12", None, None, 5.0) == 10
+
+
+def test_categorize_rows_matches_naive_loop_with_bounded_overlapping_regexes():
+    rng = random.Random(7)
+    # Expresiones sin literal obligatorio (van al patrón combinado o se prueban una a una) que se solapan
+    patterns = [r"\d+", r"[a-z]{2}", r"\b\w{4}\b", r"^\w", r"\s\d", r"[aeiou]{2}", r"x|y|z", r".{10,}"]
+    rules = []
+    for i in range(40):
+        low = float(rng.randint(-100, 50)) if rng.random() < 0.6 else None
+        high = low + rng.randint(0, 80) if low is not None and rng.random() < 0.7 else None
+        rules.append(rule(i + 1, i + 100, "description_regex", rng.choice(patterns),
+                          min_amount=low, max_amount=high, priority=rng.randint(1, 10)))
+    rules.append(rule(41, 500, "description_contains", "coffee", max_amount=0, priority=5))
+    rules.append(rule(42, 501, "amount", min_amount=-20, max_amount=-10, priority=3))
+
+    words = ["ab", "12", "coffee", "shop", "zz", "a", "999", "queue", "card payment"]
+    rows = [
+        {
+            "description": " ".join(rng.choice(words) for _ in range(rng.randint(1, 4))),
+            "merchant_name": None,
+            "transaction_category": None,
+            "amount": round(rng.uniform(-120, 80), 2),
+            "category_id": None,
+        }
+        for _ in range(2000)
+    ]
+    expected = [naive_match(rules, row["description"], None, None, row["amount"]) for row in rows]
+
+    categorize_rows(CompiledRules(rules), rows)
+
+    assert [row["category_id"] for row in rows] == expected
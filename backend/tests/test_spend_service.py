@@ -0,0 +1,42 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.category_spend import CategorySpend
+from app.models.transaction import TransactionModel
+from app.services import version_service
+from app.services.spend_service import get_spent_by_category, parse_period, rebuild_spend_aggregates
+
+
+def test_parse_period_returns_first_day_of_month():
+    assert parse_period("2025-02") == date(2025, 2, 1)
+
+
+@pytest.mark.parametrize("period", ["2025-13", "2025-00"])
+def test_parse_period_rejects_months_that_do_not_exist(period):
+    with pytest.raises(HTTPException) as exc_info:
+        parse_period(period)
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.parametrize("period", ["2025-13", "2025-00"])
+def test_spent_by_category_with_invalid_period_is_a_400(client, period):
+    response = client.get("/categories/spent", params={"period": period})
+    assert response.status_code == 400
+
+
+def test_full_rebuild_bumps_spend_for_every_affected_user(db):
+    # "stale" solo tiene filas agregadas que el rebuild borra; "active" tiene transacciones
+    db.add(CategorySpend(user_id="stale", category_id=1, month=date(2025, 1, 1), spent=Decimal("10.00")))
+    db.add(TransactionModel(user_id="active", transaction_id="tx-1", amount=-25.5, category_id=2,
+                            timestamp=datetime(2025, 2, 3, 12, 0)))
+    db.commit()
+
+    assert rebuild_spend_aggregates(db) == 1
+
+    for user_id in ("stale", "active"):
+        assert version_service.get_versions(db, user_id, version_service.SPEND) == {version_service.SPEND: 1}
+    assert get_spent_by_category(db, "stale") == {}
+    assert get_spent_by_category(db, "active", date(2025, 2, 1)) == {2: 25.5}
@@ -0,0 +1,17 @@
+import pytest
+
+from app.core import token_crypto
+from app.core.token_crypto import _create_fernet
+
+
+def test_missing_keys_fail_unless_ephemeral_is_allowed():
+    with pytest.raises(RuntimeError):
+        _create_fernet([])
+    fernet = _create_fernet([], allow_ephemeral=True)
+    assert fernet.decrypt(fernet.encrypt(b"refresh-token")) == b"refresh-token"
+
+
+def test_round_trip_with_configured_keys():
+    assert token_crypto.decrypt(token_crypto.encrypt("refresh-token")) == "refresh-token"
+    with pytest.raises(ValueError):
+        token_crypto.decrypt("not-a-token")
@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.core import token_crypto
+from app.models.truelayer_token import TrueLayerToken
+from app.services.accounts_service import TokenManager
+
+
+def store_expired(db, user_id, refresh_token):
+    db.add(TrueLayerToken(user_id=user_id, access_token=token_crypto.encrypt("access-old"),
+                          refresh_token=token_crypto.encrypt(refresh_token),
+                          expires_at=datetime.utcnow() - timedelta(minutes=5), updated_at=datetime.utcnow()))
+    db.commit()
+
+
+def test_refresh_saves_new_tokens(db):
+    store_expired(db, "u1", "refresh-1")
+    manager = TokenManager()
+
+    async def refresh_token(refresh_token):
+        assert refresh_token == "refresh-1"
+        return {"access_token": "access-2", "refresh_token": "refresh-2", "expires_in": 3600}
+
+    manager.refresh_token = refresh_token
+    assert asyncio.run(manager.get_valid_access_token("u1")) == "access-2"
+    db.expire_all()
+    assert token_crypto.decrypt(db.get(TrueLayerToken, "u1").refresh_token) == "refresh-2"
+
+
+def test_worker_that_loses_the_race_uses_the_stored_tokens(db):
+    store_expired(db, "u1", "refresh-1")
+    winner, loser = TokenManager(), TokenManager()
+
+    async def winner_refresh(refresh_token):
+        return {"access_token": "access-winner", "refresh_token": "refresh-winner", "expires_in": 3600}
+
+    async def loser_refresh(refresh_token):
+        # El otro worker gasta el mismo refresh token y guarda antes que este
+        await winner.get_valid_access_token("u1")
+        return {"access_token": "access-loser", "refresh_token": "refresh-loser", "expires_in": 3600}
+
+    winner.refresh_token, loser.refresh_token = winner_refresh, loser_refresh
+    assert asyncio.run(loser.get_valid_access_token("u1")) == "access-winner"
+    db.expire_all()
+    assert token_crypto.decrypt(db.get(TrueLayerToken, "u1").refresh_token) == "refresh-winner"
+
+
+def test_failed_refresh_falls_back_to_tokens_another_worker_stored(db):
+    store_expired(db, "u1", "refresh-1")
+    other, manager = TokenManager(), TokenManager()
+
+    async def other_refresh(refresh_token):
+        return {"access_token": "access-other", "refresh_token": "refresh-other", "expires_in": 3600}
+
+    async def spent_refresh(refresh_token):
+        # TrueLayer rechaza el refresh token porque el otro worker ya lo gastó
+        await other.get_valid_access_token("u1")
+        return None
+
+    other.refresh_token, manager.refresh_token = other_refresh, spent_refresh
+    assert asyncio.run(manager.get_valid_access_token("u1")) == "access-other"
@@ -110,11 +110,14 @@ export const processTruelayerCallback = async (code, state) => {
 
     console.log("Respuesta del servidor:", response.data);
 
-    if (response.data && response.data.accounts) {
-      console.log(`Cuentas procesadas: ${response.data.accounts.length}`);
+    // La sincronización continúa en segundo plano; esperamos a que termine el trabajo
+    const job = await waitForSyncJob(response.data.job_id);
+    console.log(`Sync job ${job.id} terminado: ${job.status}, cuentas: ${job.accounts.length}`);
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Failed to sync accounts');
     }
 
-    return response.data;
+    return job;
   } catch (error) {
     console.error('Error en processTruelayerCallback:', error);
     handleApiError(error, 'Failed to process Truelayer callback');
@@ -122,6 +125,31 @@ export const processTruelayerCallback = async (code, state) => {
   }
 };
 
+// Estado de un trabajo de sincronización en segundo plano
+export const getSyncJob = async (jobId) => {
+  try {
+    const response = await api.get(`/sync-jobs/${jobId}`);
+    return response.data;
+  } catch (error) {
+    handleApiError(error, 'Failed to fetch sync job');
+  }
+};
+
+const SYNC_JOB_POLL_MS = 1000;
+const SYNC_JOB_MAX_WAIT_MS = 5 * 60 * 1000;
+
+export const waitForSyncJob = async (jobId) => {
+  const deadline = Date.now() + SYNC_JOB_MAX_WAIT_MS;
+  while (Date.now() < deadline) {
+    const job = await getSyncJob(jobId);
+    if (!['pending', 'running'].includes(job.status)) {
+      return job;
+    }
+    await new Promise((resolve) => setTimeout(resolve, SYNC_JOB_POLL_MS));
+  }
+  throw new Error('La sincronización está tardando más de lo esperado');
+};
+
 // Función para obtener las cuentas del usuario
 export const getUserAccounts = async () => {
   try {